@@ -1,68 +1,24 @@
 # script for blender animation showing GPU tensor core processing
 
+import os
+import sys
+
 import bpy
-import math
 from mathutils import Vector
 
-# Clear the scene
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
-
-# Render settings (Instagram portrait)
-bpy.context.scene.render.resolution_x = 1080
-bpy.context.scene.render.resolution_y = 1350
-bpy.context.scene.render.resolution_percentage = 100
-bpy.context.scene.frame_start = 1
-bpy.context.scene.frame_end = 80
-bpy.context.scene.render.fps = 24
-bpy.context.scene.render.image_settings.file_format = 'FFMPEG'
-bpy.context.scene.render.ffmpeg.format = 'MPEG4'
-bpy.context.scene.render.filepath = "//gpu_tensor_render.mp4"  # Change if needed
-
-# Parameters
-grid_size = 4
-core_spacing = 2.0
-core_size = 0.5
-tensor_block_size = 0.6
-
-# Create GPU core grid (4x4)
-gpu_cores = []
-for x in range(grid_size):
-    for y in range(grid_size):
-        bpy.ops.mesh.primitive_cube_add(size=core_size, location=(x * core_spacing, y * core_spacing, 0))
-        core = bpy.context.active_object
-        core.name = f"GPU_Core_{x}_{y}"
-        
-        mat_core = bpy.data.materials.new(name=f"CoreMat_{x}_{y}")
-        mat_core.use_nodes = False
-        mat_core.diffuse_color = (0.1, 0.1, 0.1, 1)
-        core.data.materials.append(mat_core)
-        
-        gpu_cores.append(core)
+# Make the shared insta_lib helpers importable when run via `blender --python`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Helper: Create a 2x2x2 tensor cube
-def create_big_tensor(start_pos, base_color_list, name_prefix):
-    blocks = []
-    idx = 0
-    for x in range(2):
-        for y in range(2):
-            for z in range(2):
-                pos = start_pos + Vector((x * tensor_block_size, y * tensor_block_size, z * tensor_block_size))
-                bpy.ops.mesh.primitive_cube_add(size=tensor_block_size, location=pos)
-                block = bpy.context.active_object
-                block.name = f"{name_prefix}_Block_{idx}"
-                
-                # Create node-based material
-                mat = bpy.data.materials.new(name=f"{name_prefix}_Mat_{idx}")
-                mat.use_nodes = True
-                bsdf = mat.node_tree.nodes.get("Principled BSDF")
-                if bsdf:
-                    bsdf.inputs['Base Color'].default_value = base_color_list[idx % len(base_color_list)]
-                block.data.materials.append(mat)
-                
-                blocks.append(block)
-                idx += 1
-    return blocks
+from insta_lib.assets import AssetLibrary
+from insta_lib.framing import smart_camera_setup
+from insta_lib.instancing import create_instanced_grid, grid_points, instance_locations
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.materials import get_material, instance_color_material, object_color_material
+from insta_lib.presets import apply_render_presets, param_overrides
+from insta_lib.primitives import primitive_mesh
+from insta_lib.profiling import phase, profile_report
+from insta_lib.reconcile import Reconciler
+from insta_lib.reset import reset_scene
 
 # Color palettes
 colors_tensor1 = [
@@ -74,125 +30,145 @@ colors_tensor2 = [
     (0.1, 0.1, 0.7, 1), (0.2, 0.2, 0.9, 1), (0.3, 0.3, 0.8, 1), (0.0, 0.0, 0.7, 1),
 ]
 
-# Create tensors
-center_x = grid_size * core_spacing / 2
-start_pos_tensor1 = Vector((center_x - 1.2, center_x - 1.2, 5))
-start_pos_tensor2 = Vector((center_x + 1.2, center_x - 1.2, 5))
-
-tensor1_blocks = create_big_tensor(start_pos_tensor1, colors_tensor1, "Tensor1")
-tensor2_blocks = create_big_tensor(start_pos_tensor2, colors_tensor2, "Tensor2")
-all_blocks = tensor1_blocks + tensor2_blocks
-
 # Animation frames
 frame_start = 1
 frame_arrive = 40
 frame_hold = 60
 frame_return = 80
 
-# Animate all blocks moving in parallel 
-for i, block in enumerate(all_blocks):
-    original_loc = block.location.copy()
-    target_core = gpu_cores[i % len(gpu_cores)]
-    core_pos = target_core.location + Vector((0, 0, 0.7))
-
-    # Movement
-    block.keyframe_insert(data_path="location", frame=frame_start)
-    block.location = core_pos
-    block.keyframe_insert(data_path="location", frame=frame_arrive)
-    block.keyframe_insert(data_path="location", frame=frame_hold)
-    block.location = original_loc
-    block.keyframe_insert(data_path="location", frame=frame_return)
-
-    # Color change
-    mat = block.data.materials[0]
-    if mat.use_nodes:
-        bsdf = mat.node_tree.nodes.get("Principled BSDF")
-        if bsdf:
-            orig_color = bsdf.inputs['Base Color'].default_value[:]
-            bsdf.inputs['Base Color'].default_value = orig_color
-            bsdf.inputs['Base Color'].keyframe_insert(data_path="default_value", frame=frame_start)
-            bsdf.inputs['Base Color'].keyframe_insert(data_path="default_value", frame=frame_arrive)
-            bsdf.inputs['Base Color'].default_value = (1.0, 1.0, 1.0, 1.0)
-            bsdf.inputs['Base Color'].keyframe_insert(data_path="default_value", frame=frame_hold)
-            bsdf.inputs['Base Color'].default_value = orig_color
-            bsdf.inputs['Base Color'].keyframe_insert(data_path="default_value", frame=frame_return)
-
-# Add camera
-cam_data = bpy.data.cameras.new("Camera")
-cam_obj = bpy.data.objects.new("Camera", cam_data)
-bpy.context.collection.objects.link(cam_obj)
-
-# Position camera at an angle (stylish 3D look)
-cam_obj.location = (center_x + 6, center_x - 10, 12)
-cam_obj.rotation_euler = (1.1, 0, 0.9)  # tilt downward and angled
-bpy.context.scene.camera = cam_obj
-
-# Optional: Add sun light
-light_data = bpy.data.lights.new(name="Sun", type='SUN')
-light_obj = bpy.data.objects.new(name="Sun", object_data=light_data)
-light_obj.rotation_euler = (0.8, 0.2, 0.2)
-light_obj.location = (center_x, center_x - 5, 10)
-bpy.context.collection.objects.link(light_obj)
-
-def smart_camera_setup():
-    # Get all mesh objects in the scene
-    objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
-
-    if not objects:
-        print("No objects to frame.")
-        return
-
-    # Compute bounding box center and size
-    min_corner = Vector((float('inf'), float('inf'), float('inf')))
-    max_corner = Vector((float('-inf'), float('-inf'), float('-inf')))
-    for obj in objects:
-        for vertex in obj.bound_box:
-            v_world = obj.matrix_world @ Vector(vertex)
-            min_corner = Vector((min(min_corner[i], v_world[i]) for i in range(3)))
-            max_corner = Vector((max(max_corner[i], v_world[i]) for i in range(3)))
-
-    center = (min_corner + max_corner) / 2
-    size = max_corner - min_corner
-    max_dim = max(size.x, size.y, size.z)
-
-    # Create camera if it doesn't exist
-    if "Camera" in bpy.data.objects:
-        cam = bpy.data.objects["Camera"]
-    else:
-        cam_data = bpy.data.cameras.new("Camera")
-        cam = bpy.data.objects.new("Camera", cam_data)
-        bpy.context.collection.objects.link(cam)
-        bpy.context.scene.camera = cam
-
-    # Position the camera at an angle, scaled by scene size
-    distance = max_dim * 2.0
-    cam.location = center + Vector((distance, -distance * 1.2, distance * 1.2))
-    cam.rotation_euler = (math.radians(60), 0, math.radians(45))
-
-    # Look at the scene center using a track-to constraint
-    if "CameraTrack" not in bpy.data.objects:
-        empty = bpy.data.objects.new("CameraTrack", None)
-        empty.location = center
-        bpy.context.collection.objects.link(empty)
-    else:
-        empty = bpy.data.objects["CameraTrack"]
-        empty.location = center
-
-    if not any(c for c in cam.constraints if c.type == 'TRACK_TO'):
-        constraint = cam.constraints.new(type='TRACK_TO')
-        constraint.target = empty
-        constraint.track_axis = 'TRACK_NEGATIVE_Z'
-        constraint.up_axis = 'UP_Y'
-
-    # Set camera as active
-    bpy.context.scene.camera = cam
-
-# Call the function
-smart_camera_setup()
-
-# Set light green background color
-bpy.context.scene.world.use_nodes = True
-bg_tree = bpy.context.scene.world.node_tree
-bg_node = bg_tree.nodes.get('Background')
-if bg_node:
-    bg_node.inputs[0].default_value = (0.7, 1.0, 0.7, 1)  # RGBA: Light green
+# Helper: Create a 2x2x2 tensor cube
+def create_big_tensor(rec, start_pos, base_color_list, name_prefix, tensor_block_size):
+    block_mesh = primitive_mesh('CUBE', size=tensor_block_size)
+    # Node-based material shared by all blocks; each block's color is its object color
+    mat = object_color_material('PRINCIPLED')
+    blocks = []
+    idx = 0
+    for x in range(2):
+        for y in range(2):
+            for z in range(2):
+                pos = start_pos + Vector((x * tensor_block_size, y * tensor_block_size, z * tensor_block_size))
+                color = base_color_list[idx % len(base_color_list)]
+                block = rec.object(f"{name_prefix}_Block_{idx}", block_mesh, location=pos, material=mat, color=color)
+                # keyed from the declared values: a reconciled block's properties show the current frame
+                blocks.append((block, pos, color))
+                idx += 1
+    return blocks
+
+def build(scene=None, grid_size=4, core_spacing=2.0, core_size=0.5, tensor_block_size=0.6,
+          use_instancing=False, reconcile=False):
+    """Build the tensor core animation into scene (the current scene by default).
+
+    use_instancing makes one geometry-nodes grid object instead of grid_size**2 cores (large grids).
+    reconcile updates a previous build of the scene in place instead of
+    rebuilding it: only changed objects and keys are written.
+    """
+    assets = AssetLibrary()
+    if scene is None:
+        scene = bpy.context.scene
+
+    # Clear the scene (or keep what a previous build made, to reconcile against)
+    with phase("clear"):
+        if not reconcile:
+            reset_scene(scene)
+        rec = Reconciler(scene, "insta_gpu_tensor")
+
+    # Core and block cubes, materials and the instancer as earlier builds left them
+    assets.load()
+
+    # Render settings (Instagram portrait)
+    with phase("render_setup"):
+        scene.render.resolution_x = 1080
+        scene.render.resolution_y = 1350
+        scene.render.resolution_percentage = 100
+        scene.frame_start = 1
+        scene.frame_end = 80
+        scene.render.fps = 24
+        scene.render.image_settings.file_format = 'FFMPEG'
+        scene.render.ffmpeg.format = 'MPEG4'
+        scene.render.filepath = "//gpu_tensor_render.mp4"  # Change if needed
+
+    with phase("objects"):
+        # Create GPU core grid (grid_size x grid_size)
+        core_mesh = primitive_mesh('CUBE', size=core_size)
+        if use_instancing:
+            core_grid = rec.derived("GPU_Cores", (core_mesh, grid_size, core_spacing), lambda: create_instanced_grid(
+                "GPU_Cores", core_mesh, grid_points(grid_size, grid_size, core_spacing),
+                material=instance_color_material(), color=(0.1, 0.1, 0.1, 1)))
+            core_locations = instance_locations(core_grid)
+        else:
+            mat_core = get_material((0.1, 0.1, 0.1, 1))
+            core_locations = []
+            for x in range(grid_size):
+                for y in range(grid_size):
+                    location = Vector((x * core_spacing, y * core_spacing, 0))
+                    rec.object(f"GPU_Core_{x}_{y}", core_mesh, location=location, material=mat_core)
+                    core_locations.append(location)
+
+        # Create tensors
+        center_x = grid_size * core_spacing / 2
+        start_pos_tensor1 = Vector((center_x - 1.2, center_x - 1.2, 5))
+        start_pos_tensor2 = Vector((center_x + 1.2, center_x - 1.2, 5))
+
+        tensor1_blocks = create_big_tensor(rec, start_pos_tensor1, colors_tensor1, "Tensor1", tensor_block_size)
+        tensor2_blocks = create_big_tensor(rec, start_pos_tensor2, colors_tensor2, "Tensor2", tensor_block_size)
+        all_blocks = tensor1_blocks + tensor2_blocks
+
+    # Animate all blocks moving in parallel 
+    with phase("keyframes"):
+        keys = rec.keys(KeyframeBatch())
+        frames = (frame_start, frame_arrive, frame_hold, frame_return)
+        for i, (block, original_loc, orig_color) in enumerate(all_blocks):
+            core_pos = core_locations[i % len(core_locations)] + Vector((0, 0, 0.7))
+
+            # Movement
+            keys.add_vector(block, "location", frames, (original_loc, core_pos, core_pos, original_loc))
+
+            # Color change (object color, read by the shared block material)
+            keys.add_vector(block, "color", frames, (orig_color, orig_color, (1.0, 1.0, 1.0, 1.0), orig_color))
+        keys.flush()
+
+    with phase("camera"):
+        # Add camera, positioned at an angle (stylish 3D look)
+        cam_obj = rec.object("Camera", lambda: bpy.data.cameras.new("Camera"),
+                             location=(center_x + 6, center_x - 10, 12),
+                             rotation=(1.1, 0, 0.9))  # tilt downward and angled
+        if scene.camera != cam_obj:  # reassigning rebuilds the depsgraph relations
+            scene.camera = cam_obj
+
+    with phase("lights_world"):
+        # Optional: Add sun light
+        rec.object("Sun", lambda: bpy.data.lights.new(name="Sun", type='SUN'),
+                   location=(center_x, center_x - 5, 10), rotation=(0.8, 0.2, 0.2))
+
+    # Drop what a previous build made and this one no longer declares
+    rec.finish()
+
+    # Frame everything with the angled tracking camera, as the scene looks on its first frame
+    with phase("camera"):
+        smart_camera_setup(scene, frame_range=(scene.frame_start, scene.frame_start))
+
+    # Set light green background color
+    with phase("lights_world"):
+        if scene.world is None:
+            scene.world = bpy.data.worlds.new("World")
+        if not scene.world.use_nodes:
+            scene.world.use_nodes = True
+        bg_tree = scene.world.node_tree
+        bg_node = bg_tree.nodes.get('Background')
+        if bg_node:
+            bg_node.inputs[0].default_value = (0.7, 1.0, 0.7, 1)  # RGBA: Light green
+
+    # Add the cubes and materials of a new grid or block size to the library
+    assets.save()
+
+    return scene
+
+if __name__ == "__main__":
+    # A 4x4 core grid unless told otherwise (--set grid_size=64 --set use_instancing=True for a large one)
+    build(**param_overrides())
+
+    # --draft or --preview-percent 25 after `--` to check the portrait framing before a full render
+    apply_render_presets()
+
+    # With INSTA_PROFILE=1, what the grid and block keys cost as grid_size grows
+    profile_report()
@@ -1,32 +1,36 @@
-import bpy
-import random
+import os
+import sys
 
-# Clear the scene
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
+import bpy
 
-# Set scene frame range
-bpy.context.scene.frame_start = 1
-bpy.context.scene.frame_end = 150
+# Make the shared insta_lib helpers importable when run via `blender --python`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from insta_lib.assets import AssetLibrary
+from insta_lib.instancing import create_instanced_grid, grid_points, instance_locations
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.lod import apply_lod, remove_lod
+from insta_lib.materials import get_material, instance_color_material, object_color_material
+from insta_lib.packet_pool import key_pool, plan_pool
+from insta_lib.presets import apply_render_presets, param_overrides
+from insta_lib.primitives import primitive_mesh
+from insta_lib.profiling import phase, profile_report
+from insta_lib.reconcile import Reconciler
+from insta_lib.reset import reset_scene
+from insta_lib.scheduler import generate_jobs, simulate
+from insta_lib.shared_actions import SharedActions
 
 # Create the head node (master server)
-def create_head_node():
+def create_head_node(rec):
     location = (0, 0, 10)
-    bpy.ops.mesh.primitive_cube_add(size=2.5, location=location)
-    head = bpy.context.active_object
-    head.name = "Head_Node"
-    
-    # Create and apply black material
-    mat = bpy.data.materials.new(name="Head_Black_Mat")
-    mat.diffuse_color = (0, 0, 0, 1)  # RGBA (Black)
-    head.data.materials.append(mat)
-    
-    return head
-
-head_node = create_head_node()
+    # Shared black material
+    return rec.object("Head_Node", primitive_mesh('CUBE', size=2.5), location=location,
+                      material=get_material((0, 0, 0, 1)))  # RGBA (Black)
 
 # Create worker servers in a grid
-def create_worker_servers(rows=3, cols=4, spacing=3):
+def create_worker_servers(rec, rows=3, cols=4, spacing=3):
+    server_mesh = primitive_mesh('CUBE', size=2)
+    black_mat = get_material((0, 0, 0, 1))  # RGBA
     servers = []
     for i in range(rows):
         for j in range(cols):
@@ -35,94 +39,190 @@ def create_worker_servers(rows=3, cols=4, spacing=3):
             location = (x, y, 0)
             
             # Add cube and scale it flat
-            bpy.ops.mesh.primitive_cube_add(size=2, location=location)
-            server = bpy.context.active_object
-            server.name = f"Worker_{i}_{j}"
-            server.scale.z = 0.2  # Flatten vertically
-            
-            # Create black material
-            mat = bpy.data.materials.new(name=f"Black_Mat_{i}_{j}")
-            mat.diffuse_color = (0, 0, 0, 1)  # RGBA
-            server.data.materials.append(mat)
-            
+            server = rec.object(f"Worker_{i}_{j}", server_mesh, location=location,
+                                scale=(1, 1, 0.2), material=black_mat)  # Flatten vertically
             servers.append(server)
     return servers
 
-worker_servers = create_worker_servers()
+# Same grid as a single object instancing the server mesh on every node position
+# (row by row, so worker indices match create_worker_servers)
+def create_worker_grid(rec, rows=3, cols=4, spacing=3):
+    return rec.derived("Workers", (rows, cols, spacing), lambda: create_instanced_grid(
+        "Workers", primitive_mesh('CUBE', size=2), grid_points(cols, rows, spacing, centered=True, row_major=True),
+        material=instance_color_material(), scale=(1, 1, 0.2), color=(0, 0, 0, 1)))
 
 # Create and animate data packets
-def create_packet(start_loc, name):
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.5, location=start_loc)
-    packet = bpy.context.active_object
-    packet.name = name
-
-    # Create and apply blue material
-    mat = bpy.data.materials.new(name=f"{name}_Blue_Mat")
-    mat.diffuse_color = (0, 0.2, 1, 1)  # RGBA (Bright Blue)
-    packet.data.materials.append(mat)
-    
-    return packet
-
-def animate_packet(packet, start_frame, end_frame, start_loc, end_loc):
-    # Set initial location and blue color
-    packet.location = start_loc
-    packet.keyframe_insert(data_path="location", frame=start_frame)
+def create_packet(rec, start_loc, name):
+    # Shared material driven by the packet's object color
+    return rec.object(name, primitive_mesh('UV_SPHERE', radius=0.5), location=start_loc,
+                      material=object_color_material(), color=(0, 0.2, 1, 1))  # RGBA (Bright Blue)
 
+def animate_packet(keys, packet, start_frame, end_frame, start_loc, end_loc):
     # Create animation arc (optional)
     mid_frame = (start_frame + end_frame) // 2
     mid_loc = end_loc.copy()
     mid_loc.z += 1.5
-    packet.location = mid_loc
-    packet.keyframe_insert(data_path="location", frame=mid_frame)
-
-    # Final landing position
-    packet.location = end_loc
-    packet.keyframe_insert(data_path="location", frame=end_frame)
-
-    # Animate color change: hold blue until just before landing
-    mat = packet.data.materials[0]
-    mat.diffuse_color = (0, 0.2, 1, 1)  # Blue
-    mat.keyframe_insert(data_path="diffuse_color", frame=end_frame - 1)
-
-    mat.diffuse_color = (0, 1, 0, 1)  # Green
-    mat.keyframe_insert(data_path="diffuse_color", frame=end_frame)
-
-# Distribute jobs from head node to workers
-for i in range(12):
-    start = head_node.location.copy()
-    start.z -= 1.0  # Move slightly below head node
 
-    worker = random.choice(worker_servers)
-    end = worker.location.copy()
-    end.z = 0.25  # Land right on top of the flattened server
+    # Start, top of the arc, final landing position
+    keys.add_vector(packet, "location", (start_frame, mid_frame, end_frame), (start_loc, mid_loc, end_loc))
 
-
-    packet = create_packet(start_loc=start, name=f"Job_{i}")
-    animate_packet(packet, start_frame=10 * i + 1, end_frame=10 * i + 20, start_loc=start, end_loc=end)
+    # Animate color change: hold blue until just before landing, then green
+    keys.add_vector(packet, "color", (end_frame - 1, end_frame), ((0, 0.2, 1, 1), (0, 1, 0, 1)))
 
 # Add camera
-def setup_camera():
-    bpy.ops.object.camera_add(location=(0, -20, 10), rotation=(1.2, 0, 0))
-    cam = bpy.context.active_object
-    bpy.context.scene.camera = cam
+def setup_camera(rec, scene):
+    cam = rec.object("Camera", lambda: bpy.data.cameras.new("Camera"), location=(0, -20, 10), rotation=(1.2, 0, 0))
+    if scene.camera != cam:  # reassigning rebuilds the depsgraph relations
+        scene.camera = cam
 
 # Add light
-def setup_light():
-    bpy.ops.object.light_add(type='SUN', location=(0, 0, 30))
-
-bpy.context.scene.world.color = (0.05, 0.05, 0.05)
+def setup_light(rec):
+    rec.object("Sun", lambda: bpy.data.lights.new("Sun", type='SUN'), location=(0, 0, 30),
+               data_settings={"energy": 1.0})  # light_add default (lights.new starts suns at 10)
+
+# Frames a packet takes from the head node to its worker (part of the job's duration)
+flight_frames = 19
+
+def build(scene=None, job_count=12, rows=3, cols=4, spacing=3, use_instancing=False,
+          policy="fifo", seed=0, interarrival=10, durations=(20, 60), max_width=1, shared_actions=False,
+          packet_pool=False, reconcile=False, lod=False):
+    """Build the job distribution animation into scene (the current scene by default).
+
+    Jobs arrive every interarrival frames and are placed on the workers by the
+    scheduler model (policy 'fifo', 'least_loaded' or 'backfill'); a job
+    needing several workers sends one packet to each. The timeline depends only
+    on seed. use_instancing makes one geometry-nodes grid object instead of
+    rows * cols worker objects (large clusters). shared_actions plays the packet
+    flights from one shared relative action per worker on NLA strips.
+    packet_pool reuses a pool of packets, as many as jobs run at once: each
+    stays on its worker while the job runs and disappears when it finishes.
+    reconcile updates a previous build of the scene in place instead of
+    rebuilding it: only changed objects and keys are written. lod puts the
+    packets on sphere meshes tessellated for their size on screen (off by
+    default: reduced meshes are smooth-shaded, so the frames change slightly).
+    """
+    assets = AssetLibrary()
+    if scene is None:
+        scene = bpy.context.scene
+
+    # Clear the scene (or keep what a previous build made, to reconcile against)
+    with phase("clear"):
+        if not reconcile:
+            reset_scene(scene)
+        rec = Reconciler(scene, "insta_hpc_job")
+
+    # Server and packet meshes, materials and the instancer as earlier builds left them
+    assets.load()
+
+    # Set scene frame range
+    with phase("render_setup"):
+        scene.frame_start = 1
+        scene.frame_end = 150
+
+    with phase("objects"):
+        head_node = create_head_node(rec)
+
+        if use_instancing:
+            worker_locations = instance_locations(create_worker_grid(rec, rows, cols, spacing))
+        else:
+            worker_locations = [server.location for server in create_worker_servers(rec, rows, cols, spacing)]
+
+    # Schedule the jobs up front: which workers run each job, and when
+    with phase("schedule"):
+        jobs = generate_jobs(job_count, seed=seed, interarrival=interarrival, durations=durations,
+                             widths=(1, max_width))
+        placements = simulate(jobs, len(worker_locations), policy)
 
-setup_camera()
-setup_light()
-
-scene = bpy.context.scene
-scene.render.resolution_x = 1080
-scene.render.resolution_y = 1080
-scene.render.fps = 30
-scene.frame_start = 1
-scene.frame_end = 150
-
-scene.render.image_settings.file_format = 'FFMPEG'
-scene.render.ffmpeg.format = 'MPEG4'
-scene.render.ffmpeg.codec = 'H264'
-scene.render.filepath = "/Users/bill/Desktop/hpc_instagram.mp4"
+    start = head_node.location.copy()
+    start.z -= 1.0  # Move slightly below head node
+    if packet_pool:
+        with phase("objects"):
+            # One trip per (job, worker): fly over the arc, then sit on the worker until the job ends
+            events = []
+            for placement in placements:
+                for worker in placement.workers:
+                    end = worker_locations[worker].copy()
+                    end.z = 0.25  # Land right on top of the flattened server
+                    mid = end.copy()
+                    mid.z += 1.5
+                    path = ((0, start), (flight_frames // 2, mid), (flight_frames, end))
+                    events.append((placement.start + 1, path, placement.end - placement.start))
+            slot_count, trips = plan_pool(events)
+            packets = [create_packet(rec, start_loc=start, name=f"Packet_{slot}") for slot in range(slot_count)]
+
+        with phase("keyframes"):
+            keys = rec.keys(SharedActions() if shared_actions else KeyframeBatch())
+            key_pool(keys, packets, trips)
+            for trip in trips:
+                # Blue in flight, green from landing until the job is done
+                landing = trip.spawn + flight_frames
+                packet = packets[trip.slot]
+                keys.add_vector(packet, "color", (trip.spawn, landing - 1), ((0, 0.2, 1, 1), (0, 0.2, 1, 1)))
+                keys.add_vector(packet, "color", (landing,), ((0, 1, 0, 1),), 'CONSTANT')
+            keys.flush()
+    else:
+        with phase("objects"):
+            packets = []
+            for placement in placements:
+                for worker in placement.workers:
+                    name = f"Job_{placement.job.id}" if max_width == 1 else f"Job_{placement.job.id}_{worker}"
+                    packets.append((create_packet(rec, start_loc=start, name=name), placement, worker))
+
+        # Send every job from the head node to its workers as it is dispatched
+        with phase("keyframes"):
+            keys = rec.keys(SharedActions() if shared_actions else KeyframeBatch())
+            for packet, placement, worker in packets:
+                end = worker_locations[worker].copy()
+                end.z = 0.25  # Land right on top of the flattened server
+
+                dispatch = placement.start + 1  # frames start at 1
+                animate_packet(keys, packet, start_frame=dispatch, end_frame=dispatch + flight_frames,
+                               start_loc=start, end_loc=end)
+            keys.flush()
+
+    with phase("lights_world"):
+        if scene.world is None:
+            scene.world = bpy.data.worlds.new("World")
+        scene.world.color = (0.05, 0.05, 0.05)
+
+    with phase("camera"):
+        setup_camera(rec, scene)
+    with phase("lights_world"):
+        setup_light(rec)
+    rec.finish()
+
+    with phase("render_setup"):
+        scene.render.resolution_x = 1080
+        scene.render.resolution_y = 1080
+        scene.render.fps = 30
+        scene.frame_start = 1
+        # Long enough for the last job to land
+        last_landing = max((p.start + 1 + flight_frames for p in placements), default=0)
+        scene.frame_end = max(150, last_landing + 10)
+
+        scene.render.image_settings.file_format = 'FFMPEG'
+        scene.render.ffmpeg.format = 'MPEG4'
+        scene.render.ffmpeg.codec = 'H264'
+        scene.render.filepath = "/Users/bill/Desktop/hpc_instagram.mp4"
+
+    # Tessellate the packets for the camera and resolution set above
+    if lod:
+        apply_lod(scene)
+    elif reconcile:
+        # objects an earlier lod=True build left unchanged are still on its LOD meshes
+        remove_lod(scene)
+
+    # Add the meshes and materials this build had to create to the library
+    assets.save()
+
+    return scene
+
+if __name__ == "__main__":
+    # 12 jobs on a 3x4 cluster by default (--set job_count=1000 --set rows=10 --set cols=10 --set policy='backfill')
+    build(**param_overrides())
+
+    # Render presets after `--`; the frame range already ends just after the last job lands
+    apply_render_presets()
+
+    # With INSTA_PROFILE=1, scheduling time next to object and keyframe time
+    profile_report()
@@ -0,0 +1 @@
+# shared helpers for the insta_* blender animation scripts
@@ -0,0 +1,137 @@
+# prebuilt asset library for the insta_* scripts
+#
+# The prototypes a build shares between its objects (primitive meshes and
+# their levels of detail, palette materials, the geometry-nodes instancer,
+# baked label meshes) are named after what they are built from: the
+# primitive kind and its parameters, the shading and color, the label
+# strings and their placement. Every builder looks them up by that name in
+# bpy.data before building one. So all builds share one .blend library in the
+# asset cache ($INSTA_ASSET_CACHE, default ~/.cache/insta_assets, "0" turns
+# it off): a build appends the whole library with one
+# bpy.data.libraries.load before it starts, the builders find the
+# prototypes they ask for in place instead of converting texts and
+# tessellating meshes again, and only the ones nobody asked for are dropped
+# again at the end. A build that had to create a prototype writes the
+# library back with it added, so another script or another scene size
+# re-uses whatever it has in common with earlier builds.
+#
+# The library file is keyed by the insta_lib modules that build prototypes
+# and the Blender version only, so a changed builder never reads a stale
+# prototype. One file rather than one per prototype: opening a library costs
+# more than building a material. It only grows; delete it to start over.
+# Cameras and lights stay procedural (a datablock each, nothing to save), and
+# Eevee compiles the appended materials' shaders like built ones (it caches
+# them per session).
+#
+#   assets = AssetLibrary()
+#   assets.load()   # after the scene is cleared
+#   ...
+#   assets.save()   # at the end: adds what the build created
+#
+# Builds running at the same time each write the library they started from
+# plus their own prototypes; the last one wins and a prototype lost that way
+# is added again by the next build that needs it.
+
+import hashlib
+import json
+import os
+
+import bpy
+
+from .instancing import NODE_GROUP_NAME
+from .profiling import phase
+from .reset import remove_objects
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# insta_lib modules whose code builds the prototypes
+_BUILDERS = ("instancing.py", "labels.py", "lod.py", "materials.py", "primitives.py")
+
+# datablocks the builders look up by name, per bpy.data collection
+_PROTOTYPES = {
+    "meshes": ("Prim_", "Label"),
+    "materials": ("Pal_",),
+    "node_groups": (NODE_GROUP_NAME,),
+}
+
+
+def default_root():
+    """Asset cache directory, or None when $INSTA_ASSET_CACHE is "0"."""
+    root = os.environ.get("INSTA_ASSET_CACHE")
+    if root == "0":
+        return None
+    return root or os.path.join(os.path.expanduser("~"), ".cache", "insta_assets")
+
+
+def library_key():
+    """Hash of what builds the prototypes (their names say what they are built from)."""
+    digest = hashlib.sha256()
+    for name in _BUILDERS:
+        with open(os.path.join(LIB_DIR, name), "rb") as fh:
+            digest.update(fh.read())
+    digest.update(json.dumps(list(bpy.app.version)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _prototypes():
+    """(bpy.data collection name, datablock) of every local prototype."""
+    for attr, prefixes in _PROTOTYPES.items():
+        for id_data in getattr(bpy.data, attr):
+            if id_data.name.startswith(prefixes) and id_data.library is None:
+                yield attr, id_data
+
+
+class AssetLibrary:
+    """The prototypes of every earlier build, shared by all scripts."""
+
+    def __init__(self, root=None):
+        root = root or default_root()
+        self.path = None
+        if root is not None:
+            self.path = os.path.join(root, f"prototypes-{library_key()}.blend")
+        self._stored = set()
+        self._appended = []
+
+    def load(self):
+        """Append the library's prototypes that bpy.data does not have yet; True if it was read."""
+        self._stored = set()
+        self._appended = []
+        if self.path is None or not os.path.exists(self.path):
+            return False
+
+        with phase("assets"):
+            libraries = set(bpy.data.libraries)
+            try:
+                with bpy.data.libraries.load(self.path, link=False) as (data_from, data_to):
+                    for attr in _PROTOTYPES:
+                        present = getattr(bpy.data, attr)
+                        names = getattr(data_from, attr)
+                        setattr(data_to, attr, [name for name in names if name not in present])
+                        self._stored.update((attr, name) for name in names)
+            except OSError:
+                self._stored = set()
+                return False  # unreadable (e.g. truncated): rebuilt and rewritten by save()
+            # appended datablocks are local; the library entry is not needed afterwards
+            for library in [library for library in bpy.data.libraries if library not in libraries]:
+                bpy.data.libraries.remove(library)
+            self._appended = [id_data for attr in _PROTOTYPES for id_data in getattr(data_to, attr)
+                              if id_data is not None]
+        return True
+
+    def save(self):
+        """Add the prototypes this build created to the library; drop appended ones it did not use."""
+        if self.path is None:
+            return
+
+        with phase("assets"):
+            prototypes = list(_prototypes())
+            if any((attr, id_data.name) not in self._stored for attr, id_data in prototypes):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                # written next to the library and moved in place, so a concurrent build never reads half a file
+                partial = f"{self.path[:-len('.blend')]}.{os.getpid()}.blend"
+                bpy.data.libraries.write(partial, {id_data for _, id_data in prototypes}, fake_user=False)
+                os.replace(partial, self.path)
+                self._stored.update((attr, id_data.name) for attr, id_data in prototypes)
+            # whatever another build needed and this one did not
+            remove_objects((), self._appended)
+            self._appended = []
@@ -0,0 +1,90 @@
+# batch build and render of the insta_* scripts in as few Blender sessions as possible
+#
+#   python -m insta_lib.batch [insta_gpu_tensor.py ...] [-j 2] [--no-render] [-- --draft --set seed=3]
+#
+# Each script run on its own pays Blender startup, add-on registration and
+# shader compilation. Here the scripts are imported as modules and their
+# build() functions called inside one `blender --background` session (see
+# batch_worker.py), each into a scene of its own with its own world; the
+# primitive meshes and palette materials are shared between the scenes
+# through their caches in bpy.data. The scenes are then rendered one after
+# the other from the same session. With -j N the scripts are spread over N
+# sessions running side by side.
+#
+# Arguments after `--` are the scripts' render presets (see presets.py);
+# `--set name=value` goes to every script whose build() takes that parameter.
+
+import argparse
+import concurrent.futures
+import glob
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER = os.path.join(REPO, "insta_lib", "batch_worker.py")
+
+
+def load_builder(script):
+    """Import a scene script as a module without running its __main__ block."""
+    name = os.path.splitext(os.path.basename(script))[0]
+    spec = importlib.util.spec_from_file_location(name, os.path.abspath(script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_scripts():
+    return sorted(glob.glob(os.path.join(REPO, "insta_*.py")))
+
+
+def plan_sessions(scripts, sessions):
+    """Spread scripts round-robin over at most `sessions` Blender sessions."""
+    sessions = max(1, min(sessions, len(scripts)))
+    return [scripts[i::sessions] for i in range(sessions)]
+
+
+def run_session(blender, scripts, script_args, render=True, threads=None):
+    """Build (and render) scripts in one Blender session; raises if it fails."""
+    cmd = [blender, "--background", "--factory-startup", "--python-exit-code", "1"]
+    if threads:
+        cmd += ["--threads", str(threads)]
+    cmd += ["--python", WORKER, "--", "--scripts", *scripts, *script_args]
+    if not render:
+        cmd.append("--no-render")
+    subprocess.run(cmd, check=True)
+    return scripts
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    script_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, script_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(prog="python -m insta_lib.batch",
+                                     description="Build and render several insta_* scripts in shared Blender sessions.")
+    parser.add_argument("scripts", nargs="*", help="scene scripts (default: every insta_*.py)")
+    parser.add_argument("-j", "--sessions", type=int, default=1, help="Blender sessions run side by side")
+    parser.add_argument("--no-render", action="store_true", help="only build the scenes")
+    parser.add_argument("--blender", help="Blender executable (default: $BLENDER or blender)")
+    args = parser.parse_args(argv)
+    blender = args.blender or os.environ.get("BLENDER", "blender")
+    scripts = [os.path.abspath(script) for script in args.scripts] or default_scripts()
+
+    sessions = plan_sessions(scripts, args.sessions)
+    threads = max(1, (os.cpu_count() or 1) // len(sessions)) if len(sessions) > 1 else None
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        jobs = [pool.submit(run_session, blender, session, script_args, not args.no_render, threads)
+                for session in sessions]
+        for job in concurrent.futures.as_completed(jobs):
+            job.result()
+    print(f"Batch of {len(scripts)} scripts in {len(sessions)} sessions: {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
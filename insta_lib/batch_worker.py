@@ -0,0 +1,101 @@
+# runs inside Blender, driven by batch.py:
+#
+#   blender -b --factory-startup --python insta_lib/batch_worker.py -- \
+#       --scripts insta_gpu_tensor.py insta_parallel.py [--no-render] [--draft] [--set seed=3]
+#
+# Builds every script into a new scene named after it, applies the render
+# presets to each, then renders the scenes' animations one after the other
+# into the scripts' movie files. The startup scene is removed once the
+# first script has its own. Each new scene gets its own copy of the startup
+# world, which is what a script run on its own builds on, so a script that
+# keeps or edits the world it finds renders as it would alone.
+
+import argparse
+import inspect
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insta_lib.batch import load_builder
+from insta_lib.presets import apply_render_presets, param_overrides, script_argv
+from insta_lib.profiling import is_enabled, profile_report, reset_phases
+from insta_lib.reset import reset_scene
+
+
+def _args():
+    parser = argparse.ArgumentParser(prog="batch_worker")
+    parser.add_argument("--scripts", nargs="+", required=True)
+    parser.add_argument("--no-render", action="store_true")
+    # the remaining arguments are render presets and --set overrides
+    return parser.parse_known_args(script_argv())[0]
+
+
+def builder_params(builder, overrides):
+    """The --set overrides that builder.build() accepts."""
+    accepted = inspect.signature(builder.build).parameters
+    return {name: value for name, value in overrides.items() if name in accepted}
+
+
+def resolve_output(scene, script):
+    # no .blend file: make '//' relative to the script, as a direct run from its folder would
+    path = scene.render.filepath
+    if path.startswith("//"):
+        scene.render.filepath = os.path.join(os.path.dirname(os.path.abspath(script)), path[2:])
+
+
+def build_scene(script, overrides, world=None):
+    """Build script into a new scene of its name with a copy of world; returns the scene."""
+    builder = load_builder(script)
+    name = os.path.splitext(os.path.basename(script))[0]
+    scene = bpy.data.scenes.new(name)
+    if world is not None:
+        scene.world = world.copy()
+    start = time.perf_counter()
+    builder.build(scene, **builder_params(builder, overrides))
+    apply_render_presets(scene)
+    resolve_output(scene, script)
+    print(f"Built {name} in {time.perf_counter() - start:.2f}s")
+    if is_enabled():
+        profile_report()
+        reset_phases()
+    return scene
+
+
+def main():
+    args = _args()
+    overrides = param_overrides()
+    startup = list(bpy.data.scenes)
+    world = bpy.context.scene.world
+
+    scenes = []
+    for script in args.scripts:
+        scenes.append(build_scene(script, overrides, world))
+        if startup:
+            for scene in startup:
+                reset_scene(scene, verbose=False)
+                bpy.data.scenes.remove(scene)
+            startup = []
+
+    if args.no_render:
+        return
+    failed = []
+    for scene in scenes:
+        start = time.perf_counter()
+        try:
+            bpy.ops.render.render(animation=True, scene=scene.name)
+        except RuntimeError as exc:
+            # one scene's bad output settings should not cost the other renders
+            print(f"Render of {scene.name} failed: {exc}")
+            failed.append(scene.name)
+            continue
+        print(f"Rendered {scene.name} to {scene.render.filepath} in {time.perf_counter() - start:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
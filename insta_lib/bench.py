@@ -0,0 +1,170 @@
+# scene-build benchmark for the insta_* scripts
+#
+#   python -m insta_lib.bench [--scale medium] [--save-baseline] [-- --draft]
+#
+# Builds every script at increasing scale, each case in a fresh
+# `blender --background` process (see bench_worker.py), and records the
+# per-phase build times, datablock and keyframe counts, peak RSS and time to
+# the first rendered frame. Results go to a JSON file and are printed as a
+# table against a stored baseline (bench_baseline.json next to the scripts);
+# --save-baseline replaces the baseline with this run. Arguments after `--`
+# are passed to the scripts' render presets.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER = os.path.join(REPO, "insta_lib", "bench_worker.py")
+DEFAULT_BASELINE = os.path.join(REPO, "bench_baseline.json")
+
+SCALE_ORDER = ("small", "medium", "large")
+
+# slowdowns below this many seconds are timer noise, not regressions
+NOISE_FLOOR = 0.05
+
+# script -> [(scale, build() parameters)]
+CASES = {
+    "insta_gpu_tensor.py": [
+        ("small", {"grid_size": 4}),
+        ("medium", {"grid_size": 16}),
+        ("large", {"grid_size": 64}),
+    ],
+    "insta_hpc_job.py": [
+        ("small", {"job_count": 12, "rows": 3, "cols": 4}),
+        ("medium", {"job_count": 1000, "rows": 10, "cols": 10, "interarrival": 1}),
+        ("large", {"job_count": 10000, "rows": 30, "cols": 30, "interarrival": 0.1}),
+    ],
+    "insta_parallel.py": [
+        ("small", {"thread_count": 8, "task_count": 10}),
+        ("medium", {"thread_count": 100, "task_count": 100}),
+        ("large", {"thread_count": 1000, "task_count": 1000}),
+    ],
+    "insta_mem_cpu.py": [
+        ("small", {}),
+        ("medium", {"packet_count": 200, "packet_interval": 4}),
+        ("large", {"packet_count": 2000, "packet_interval": 4}),
+    ],
+}
+
+# (result key, column heading, formatter); compared as baseline -> current
+COLUMNS = [
+    ("build_time", "build s", "{:.2f}".format),
+    ("first_frame_time", "1st frame s", "{:.2f}".format),
+    ("peak_rss", "peak MiB", lambda value: f"{value / 2**20:.0f}"),
+    ("objects", "objects", str),
+    ("keyframes", "keys", str),
+]
+
+
+def case_name(result):
+    return f"{result['script']}:{result['scale']}"
+
+
+def run_case(blender, script, scale, params, preset_args=(), render=True, timeout=None):
+    """Build one case in a fresh Blender process and return its result dict."""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.json")
+        cmd = [blender, "--background", "--factory-startup", "--python-exit-code", "1",
+               "--python", WORKER, "--", "--script", os.path.join(REPO, script),
+               "--params", json.dumps(params), "--result", result_path, *preset_args]
+        if not render:
+            cmd.append("--no-render")
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, timeout=timeout)
+        with open(result_path) as fh:
+            result = json.load(fh)
+    result["scale"] = scale
+    return result
+
+
+def compare(results, baseline, tolerance=0.10):
+    """Print results against baseline; returns the case names that got slower.
+
+    A case regresses when its build or first-frame time exceeds the baseline
+    by more than tolerance (as a fraction) and by more than NOISE_FLOOR.
+    """
+    previous = {case_name(result): result for result in baseline}
+    regressions = []
+    rows = [["case"] + [heading for _, heading, _ in COLUMNS]]
+    for result in results:
+        name = case_name(result)
+        old = previous.get(name)
+        row = [name]
+        for key, _, fmt in COLUMNS:
+            value = result.get(key)
+            cell = "-" if value is None else fmt(value)
+            old_value = old.get(key) if old else None
+            if old_value is not None and value is not None:
+                cell = f"{fmt(old_value)} -> {cell}"
+                if key.endswith("_time") and old_value > 0:
+                    change = value / old_value - 1
+                    cell += f" ({change:+.0%})"
+                    if change > tolerance and value - old_value > NOISE_FLOOR:
+                        regressions.append(name)
+            row.append(cell)
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for i, row in enumerate(rows):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+        if i == 0:
+            print("  ".join("-" * width for width in widths))
+    return sorted(set(regressions))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    preset_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, preset_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(prog="python -m insta_lib.bench",
+                                     description="Benchmark the insta_* scene builds at increasing scale.")
+    parser.add_argument("--scripts", nargs="+", choices=sorted(CASES), help="scripts to run (default: all)")
+    parser.add_argument("--scale", choices=SCALE_ORDER, default="large", help="largest scale to run")
+    parser.add_argument("--no-render", action="store_true", help="skip the first-frame render")
+    parser.add_argument("--output", default="bench_results.json", help="results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before a case counts as a regression")
+    parser.add_argument("--timeout", type=float, help="seconds allowed per case")
+    parser.add_argument("--blender", help="Blender executable (default: $BLENDER or blender)")
+    args = parser.parse_args(argv)
+    blender = args.blender or os.environ.get("BLENDER", "blender")
+    max_scale = SCALE_ORDER.index(args.scale)
+
+    results = []
+    for script in args.scripts or CASES:
+        for scale, params in CASES[script]:
+            if SCALE_ORDER.index(scale) > max_scale:
+                continue
+            print(f"{script}:{scale} {params}", flush=True)
+            try:
+                results.append(run_case(blender, script, scale, params, preset_args,
+                                        not args.no_render, args.timeout))
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as exc:
+                print(f"  failed: {exc}")
+
+    with open(args.output, "w") as fh:
+        json.dump(results, fh, indent=2)
+
+    baseline = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Saved baseline {args.baseline}")
+    elif regressions:
+        print(f"Slower than baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+# runs inside Blender, driven by bench.py:
+#
+#   blender -b --factory-startup --python insta_lib/bench_worker.py -- \
+#       --script insta_hpc_job.py --params '{"job_count": 1000}' --result out.json [--no-render]
+#
+# Imports the script as a module, calls its build() with the given
+# parameters and writes the per-phase build times, datablock and keyframe
+# counts, peak RSS and the time to render the first frame as JSON. The
+# asset cache is off, so every case measures a full build whatever earlier
+# runs left in it.
+# Remaining arguments (--draft, --engine, ...) go to apply_render_presets.
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insta_lib.batch import load_builder
+from insta_lib.keyframes import action_fcurves
+from insta_lib.presets import apply_render_presets, script_argv
+from insta_lib.profiling import enable, phase_times, profile_data, reset_phases
+
+
+def _args():
+    parser = argparse.ArgumentParser(prog="bench_worker")
+    parser.add_argument("--script", required=True)
+    parser.add_argument("--params", default="{}", help="build() keyword arguments as JSON")
+    parser.add_argument("--result", required=True)
+    parser.add_argument("--no-render", action="store_true")
+    return parser.parse_known_args(script_argv())[0]
+
+
+def datablock_counts():
+    counts = {}
+    for name in dir(bpy.data):
+        collection = getattr(bpy.data, name, None)
+        if isinstance(collection, bpy.types.bpy_prop_collection) and len(collection):
+            counts[name] = len(collection)
+    return counts
+
+
+def keyframe_count():
+    return sum(len(fcurve.keyframe_points)
+               for action in bpy.data.actions for fcurve in action_fcurves(action))
+
+
+def render_first_frame(scene):
+    """Render scene.frame_start to a throwaway PNG; returns wall seconds."""
+    render = scene.render
+    scene.frame_set(scene.frame_start)
+    with tempfile.TemporaryDirectory() as tmp:
+        render.image_settings.file_format = 'PNG'
+        render.filepath = os.path.join(tmp, "first_frame.png")
+        start = time.perf_counter()
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+        return time.perf_counter() - start
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS reports bytes, Linux KiB
+
+
+def main():
+    args = _args()
+    params = json.loads(args.params)
+    scene = bpy.context.scene
+
+    # timings must not depend on how warm the asset cache is (see assets.py)
+    os.environ["INSTA_ASSET_CACHE"] = "0"
+    builder = load_builder(args.script)
+    enable()
+    reset_phases()
+    start = time.perf_counter()
+    builder.build(scene, **params)
+    build_time = time.perf_counter() - start
+    apply_render_presets(scene)
+
+    result = {
+        "script": os.path.basename(args.script),
+        "params": params,
+        "build_time": build_time,
+        "phases": phase_times(),
+        "operator_calls": profile_data()["totals"]["ops"],
+        "datablocks": datablock_counts(),
+        "objects": len(scene.objects),
+        "keyframes": keyframe_count(),
+        "first_frame_time": None if args.no_render else render_first_frame(scene),
+        "peak_rss": peak_rss_bytes(),
+        "blender_version": bpy.app.version_string,
+    }
+    with open(args.result, "w") as fh:
+        json.dump(result, fh, indent=2)
+
+
+main()
@@ -0,0 +1,150 @@
+# multi-format delivery for the insta_* scripts
+#
+# Each script renders for one Instagram format (1080x1350, 1080x1080 or
+# 1080x1920). Rendering the same animation once per format repeats the
+# whole render. Here the formats to deliver are planned against the scene
+# camera instead: every target shows what a render of the script at that
+# resolution would show (same lens, the camera's sensor fit deciding which
+# side of the frame the sensor spans), the master view is the union of those
+# views, and the master resolution is the finest pixel density any target
+# needs. Each target is then a centred crop of the master, scaled to its
+# size; render_pool.py encodes all of them from the master frames in one
+# ffmpeg pass (split, crop and scale per output).
+#
+#   python -m insta_lib.render_pool insta_gpu_tensor.py -j 4 -- --deliver portrait,square,reel
+#
+# (A direct `blender -b --python ... --render-anim -- --deliver ...` renders
+# the master movie only: the per-format encode happens in render_pool.py.)
+#
+# For the portrait script that is one 1920x1920 master (3.7 MP per frame)
+# instead of 1.5 + 1.2 + 2.1 MP of separate renders, and one scene build.
+# Camera shift is not taken into account: the targets are centred.
+#
+# Plain Python: render_pool.py imports it outside Blender.
+
+import json
+import math
+import os
+
+# name -> (width, height) of the formats the scripts target
+FORMATS = {
+    "portrait": (1080, 1350),
+    "square": (1080, 1080),
+    "reel": (1080, 1920),
+    "landscape": (1920, 1080),
+}
+
+# scene custom property holding the delivery plan (JSON)
+DELIVERIES_KEY = "insta_deliveries"
+
+
+def parse_targets(spec):
+    """'portrait,square' or '1080x1350,720x720' -> [(name, width, height)]."""
+    targets = []
+    for item in spec.split(","):
+        item = item.strip()
+        if item in FORMATS:
+            targets.append((item, *FORMATS[item]))
+            continue
+        width, _, height = item.partition("x")
+        try:
+            targets.append((item, int(width), int(height)))
+        except ValueError:
+            raise ValueError(f"unknown delivery format {item!r} "
+                             f"(use {', '.join(FORMATS)} or WIDTHxHEIGHT)") from None
+    return targets
+
+
+def _even(value):
+    # yuv420p needs even frame sizes
+    return max(2, 2 * math.ceil(value / 2 - 1e-6))
+
+
+def view_size(camera, width, height):
+    """(width, height) of the camera view rendered at width x height.
+
+    In sensor millimetres for perspective cameras (the lens stays fixed) and
+    in scene units for orthographic ones.
+    """
+    fit = camera.sensor_fit
+    if camera.type == 'ORTHO':
+        horizontal = vertical = camera.ortho_scale
+    else:
+        horizontal = camera.sensor_width
+        vertical = camera.sensor_width if fit == 'AUTO' else camera.sensor_height
+    if fit == 'AUTO':
+        fit = 'HORIZONTAL' if width >= height else 'VERTICAL'
+    if fit == 'HORIZONTAL':
+        return horizontal, horizontal * height / width
+    return vertical * width / height, vertical
+
+
+def plan_master(camera, targets):
+    """Master (view size, resolution) and the targets' crops of it.
+
+    Crops are (x, y, width, height) fractions of the master frame, from the
+    top left corner.
+    """
+    views = [view_size(camera, width, height) for _, width, height in targets]
+    view_w = max(w for w, _ in views)
+    view_h = max(h for _, h in views)
+    density = max(max(width / w, height / h) for (_, width, height), (w, h) in zip(targets, views))
+    resolution = (_even(view_w * density), _even(view_h * density))
+
+    # the master renders with AUTO fit: its longer side spans the union's longer side
+    longest = max(view_w, view_h)
+    if resolution[0] >= resolution[1]:
+        view_w, view_h = longest, longest * resolution[1] / resolution[0]
+    else:
+        view_w, view_h = longest * resolution[0] / resolution[1], longest
+    crops = [((1 - w / view_w) / 2, (1 - h / view_h) / 2, w / view_w, h / view_h) for w, h in views]
+    return (longest, resolution), crops
+
+
+def setup_master(scene, targets):
+    """Turn the scene camera and resolution into the master for targets.
+
+    The movie path becomes <name>_master<ext> and each target is delivered
+    to <name>_<target><ext>. Returns the delivery plan, also kept on the scene.
+    """
+    camera = scene.camera.data
+    (longest, (res_x, res_y)), crops = plan_master(camera, targets)
+    if camera.type == 'ORTHO':
+        camera.ortho_scale = longest
+    else:
+        camera.sensor_width = longest
+    camera.sensor_fit = 'AUTO'
+
+    render = scene.render
+    render.resolution_x = res_x
+    render.resolution_y = res_y
+    base, ext = os.path.splitext(render.filepath)
+    render.filepath = f"{base}_master{ext}"
+    deliveries = [{"name": name, "size": [width, height], "crop": list(crop), "filepath": f"{base}_{name}{ext}"}
+                  for (name, width, height), crop in zip(targets, crops)]
+    scene[DELIVERIES_KEY] = json.dumps(deliveries)
+    print(f"Delivery master {res_x}x{res_y} for " + ", ".join(f"{name} {width}x{height}"
+                                                              for name, width, height in targets))
+    return deliveries
+
+
+def scene_deliveries(scene):
+    """The scene's delivery plan, target sizes scaled by its resolution percentage."""
+    if DELIVERIES_KEY not in scene:
+        return []
+    percent = scene.render.resolution_percentage
+    deliveries = json.loads(scene[DELIVERIES_KEY])
+    for delivery in deliveries:
+        delivery["size"] = [_even(size * percent / 100) for size in delivery["size"]]
+    return deliveries
+
+
+def delivery_filter(deliveries):
+    """ffmpeg filter graph splitting input 0 into one cropped, scaled stream [vN] per delivery."""
+    graph = [f"[0:v]split={len(deliveries)}" + "".join(f"[m{i}]" for i in range(len(deliveries)))]
+    for i, delivery in enumerate(deliveries):
+        x, y, w, h = delivery["crop"]
+        width, height = delivery["size"]
+        graph.append(f"[m{i}]crop=iw*{w!r}:ih*{h!r}:iw*{x!r}:ih*{y!r},"
+                     f"scale={width}:{height}:flags=lanczos,setsar=1[v{i}]")
+    return ";".join(graph)
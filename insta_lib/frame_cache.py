@@ -0,0 +1,83 @@
+# resumable frame-sequence cache for render_pool.py
+#
+# Frames are rendered as lossless PNGs into a directory keyed by the script
+# and a hash of everything that changes the pixels (script + insta_lib
+# sources, script arguments, resolution, engine, samples, color management).
+# Frame range and movie encoding settings are deliberately left out, so an
+# interrupted render only re-renders the missing frames. Movie settings
+# written in the script are still part of its source: a re-encode at a
+# different quality or codec re-uses every frame when it is asked for on
+# the render_pool command line (`--crf`, `--preset`, `--codec`) instead.
+#
+# PNG rather than EXR: EXR stores scene-linear data without the view
+# transform, so a movie encoded from it would not match Blender's output.
+
+import glob
+import hashlib
+import json
+import os
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_END = b"IEND\xaeB`\x82"
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_root():
+    return os.environ.get("INSTA_FRAME_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "insta_frames")
+
+
+def settings_hash(script, script_args, render_key):
+    digest = hashlib.sha256()
+    for path in [script] + sorted(glob.glob(os.path.join(LIB_DIR, "*.py"))):
+        with open(path, "rb") as fh:
+            digest.update(fh.read())
+    digest.update(json.dumps([list(script_args), render_key], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def cache_dir(script, script_args, render_key, root=None):
+    """Frame directory for this script and its pixel-relevant settings."""
+    name = os.path.splitext(os.path.basename(script))[0]
+    key = settings_hash(script, script_args, render_key)[:16]
+    return os.path.join(root or default_root(), f"{name}-{key}")
+
+
+def frame_path(directory, frame):
+    return os.path.join(directory, f"frame_{frame:04d}.png")
+
+
+def is_valid_frame(path):
+    """True for a complete PNG file (signature at the start, IEND chunk at the end)."""
+    try:
+        with open(path, "rb") as fh:
+            if fh.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+                return False
+            fh.seek(-len(PNG_END), os.SEEK_END)
+            return fh.read() == PNG_END
+    except OSError:
+        return False
+
+
+def missing_frames(directory, frames):
+    """Frames without a valid file; truncated leftovers (e.g. from a crash) are removed."""
+    missing = []
+    for frame in frames:
+        path = frame_path(directory, frame)
+        if is_valid_frame(path):
+            continue
+        if os.path.exists(path):
+            os.remove(path)
+        missing.append(frame)
+    return missing
+
+
+def contiguous_runs(frames, step=1):
+    """Split a sorted frame list into runs of consecutive (by step) frames."""
+    runs = []
+    for frame in frames:
+        if runs and frame - runs[-1][-1] == step:
+            runs[-1].append(frame)
+        else:
+            runs.append([frame])
+    return runs
@@ -0,0 +1,122 @@
+# vectorized scene bounds and camera framing for the insta_* scripts
+#
+# World matrices and local bound boxes of all objects are read in one
+# foreach_get each and transformed together with NumPy, so computing the
+# scene AABB stays cheap even at 10^5 objects.
+
+import math
+
+import bpy
+import numpy as np
+from mathutils import Vector
+
+from .profiling import phase
+
+
+def _bounds(objects, types):
+    """(min, max) world AABB of a collection of objects, or None if none match."""
+    count = len(objects)
+    if not count:
+        return None
+    mask = np.fromiter((obj.type in types for obj in objects), dtype=bool, count=count)
+    if not mask.any():
+        return None
+
+    matrices = np.empty(count * 16, dtype=np.float32)
+    corners = np.empty(count * 24, dtype=np.float32)
+    objects.foreach_get("matrix_world", matrices)
+    objects.foreach_get("bound_box", corners)
+    # foreach_get flattens Blender's column-major matrices: row 3 holds the translation
+    matrices = matrices.reshape(count, 4, 4)[mask]
+    corners = corners.reshape(count, 8, 3)[mask]
+
+    world = np.einsum('nci,nij->ncj', corners, matrices[:, :3, :3]) + matrices[:, None, 3, :3]
+    world = world.reshape(-1, 3)
+    return world.min(axis=0), world.max(axis=0)
+
+
+def scene_bounds(scene=None, collection=None, frame_range=None, frame_step=4, types=('MESH',)):
+    """World-space (min_corner, max_corner) Vectors of the objects in a scene.
+
+    collection limits framing to that collection's objects (children included).
+    frame_range=(start, end) samples the animation every frame_step frames (and
+    at the end frame) so the box covers the animated extents; the current frame
+    is restored afterwards. Returns None when there is nothing to frame.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+    objects = collection.all_objects if collection is not None else scene.objects
+
+    if frame_range == (scene.frame_current, scene.frame_current):
+        # only the current frame: an update evaluates just what changed, frame_set everything
+        frame_range = None
+    if frame_range is None:
+        scene.view_layers[0].update()
+        boxes = [_bounds(objects, types)]
+    else:
+        start, end = frame_range
+        frames = list(range(start, end + 1, frame_step))
+        if frames[-1] != end:
+            frames.append(end)
+        current = scene.frame_current
+        boxes = []
+        for frame in frames:
+            scene.frame_set(frame)
+            boxes.append(_bounds(objects, types))
+        scene.frame_set(current)
+
+    boxes = [box for box in boxes if box is not None]
+    if not boxes:
+        return None
+    min_corner = np.min([box[0] for box in boxes], axis=0)
+    max_corner = np.max([box[1] for box in boxes], axis=0)
+    return Vector(min_corner.tolist()), Vector(max_corner.tolist())
+
+
+def smart_camera_setup(scene=None, collection=None, frame_range=None):
+    """Aim an angled camera (with a track-to target) at the scene bounds."""
+    with phase("framing"):
+        if scene is None:
+            scene = bpy.context.scene
+        bounds = scene_bounds(scene, collection=collection, frame_range=frame_range)
+        if bounds is None:
+            print("No objects to frame.")
+            return
+
+        min_corner, max_corner = bounds
+        center = (min_corner + max_corner) / 2
+        size = max_corner - min_corner
+        max_dim = max(size.x, size.y, size.z)
+
+        # Create camera if the scene doesn't have one
+        if scene.camera is not None:
+            cam = scene.camera
+        else:
+            cam_data = bpy.data.cameras.new("Camera")
+            cam = bpy.data.objects.new("Camera", cam_data)
+            scene.collection.objects.link(cam)
+            scene.camera = cam
+
+        # Position the camera at an angle, scaled by scene size
+        distance = max_dim * 2.0
+        cam.location = center + Vector((distance, -distance * 1.2, distance * 1.2))
+        cam.rotation_euler = (math.radians(60), 0, math.radians(45))
+
+        # Look at the scene center using a track-to constraint
+        empty = scene.objects.get("CameraTrack")
+        if empty is None:
+            empty = bpy.data.objects.new("CameraTrack", None)
+            empty.location = center
+            scene.collection.objects.link(empty)
+        else:
+            empty.location = center
+
+        if not any(c for c in cam.constraints if c.type == 'TRACK_TO'):
+            constraint = cam.constraints.new(type='TRACK_TO')
+            constraint.target = empty
+            constraint.track_axis = 'TRACK_NEGATIVE_Z'
+            constraint.up_axis = 'UP_Y'
+
+        # Set camera as active (reassigning rebuilds the depsgraph relations)
+        if scene.camera != cam:
+            scene.camera = cam
@@ -0,0 +1,146 @@
+# geometry-nodes instanced grids for the insta_* scripts
+#
+# A grid of thousands of cores/servers as separate objects chokes both the
+# viewport and render sync. Here the whole grid is one object: its mesh holds
+# one vertex per grid cell (with per-instance "color" and "highlight" point
+# attributes) and a shared geometry-nodes tree instances the prototype mesh
+# on every vertex. Materials read the attributes with an Instancer Attribute
+# node (see materials.instance_color_material).
+
+import bpy
+import numpy as np
+from mathutils import Vector
+
+NODE_GROUP_NAME = "InstaGridInstancer"
+
+
+def grid_points(count_x, count_y, spacing, centered=False, row_major=False):
+    """(count_x * count_y, 3) cell positions on the z=0 plane, x-major order.
+
+    Index ix * count_y + iy sits at (ix * spacing, iy * spacing, 0), the same
+    order as nested `for x ... for y ...` loops; row_major gives the order of
+    `for y ... for x ...` loops instead (index iy * count_x + ix). centered
+    puts the grid middle at the origin.
+    """
+    ix, iy = np.meshgrid(np.arange(count_x), np.arange(count_y), indexing='xy' if row_major else 'ij')
+    points = np.zeros((count_x * count_y, 3), dtype=np.float32)
+    points[:, 0] = ix.ravel() * spacing
+    points[:, 1] = iy.ravel() * spacing
+    if centered:
+        points[:, 0] -= (count_x - 1) * spacing / 2
+        points[:, 1] -= (count_y - 1) * spacing / 2
+    return points
+
+
+def _new_socket(tree, name, in_out, socket_type):
+    if hasattr(tree, "interface"):  # Blender 4.0+
+        return tree.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = tree.inputs if in_out == 'INPUT' else tree.outputs
+    return sockets.new(socket_type, name)
+
+
+def _instancer_node_group():
+    """Shared tree: instance the Instance object on every vertex of the input mesh."""
+    tree = bpy.data.node_groups.get(NODE_GROUP_NAME)
+    if tree is not None:
+        return tree
+
+    tree = bpy.data.node_groups.new(NODE_GROUP_NAME, 'GeometryNodeTree')
+    _new_socket(tree, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    _new_socket(tree, "Instance", 'INPUT', 'NodeSocketObject')
+    _new_socket(tree, "Material", 'INPUT', 'NodeSocketMaterial')
+    scale = _new_socket(tree, "Scale", 'INPUT', 'NodeSocketVector')
+    scale.default_value = (1.0, 1.0, 1.0)
+    _new_socket(tree, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+
+    nodes = tree.nodes
+    links = tree.links
+    group_in = nodes.new('NodeGroupInput')
+    group_out = nodes.new('NodeGroupOutput')
+    info = nodes.new('GeometryNodeObjectInfo')
+    set_material = nodes.new('GeometryNodeSetMaterial')
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    join = nodes.new('GeometryNodeJoinGeometry')
+    group_in.location = (-600, 0)
+    info.location = (-400, -150)
+    set_material.location = (-200, -150)
+    instance.location = (0, 0)
+    join.location = (200, 0)
+    group_out.location = (400, 0)
+
+    # point attributes (color, highlight) propagate to the instance domain
+    links.new(group_in.outputs["Geometry"], instance.inputs["Points"])
+    links.new(group_in.outputs["Instance"], info.inputs["Object"])
+    links.new(info.outputs["Geometry"], set_material.inputs["Geometry"])
+    links.new(group_in.outputs["Material"], set_material.inputs["Material"])
+    links.new(set_material.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(group_in.outputs["Scale"], instance.inputs["Scale"])
+    # the (face-less, unrendered) points stay in the output so the object's
+    # bound box covers the grid; object bounds ignore instances
+    links.new(group_in.outputs["Geometry"], join.inputs["Geometry"])
+    links.new(instance.outputs["Instances"], join.inputs["Geometry"])
+    links.new(join.outputs["Geometry"], group_out.inputs["Geometry"])
+    return tree
+
+
+def _input_identifier(tree, name):
+    if hasattr(tree, "interface"):
+        for item in tree.interface.items_tree:
+            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name:
+                return item.identifier
+    return tree.inputs[name].identifier
+
+
+def create_instanced_grid(name, prototype_mesh, points, material=None, scale=(1, 1, 1),
+                          color=(1, 1, 1, 1), location=(0, 0, 0)):
+    """Create (unlinked) one object instancing prototype_mesh on every point.
+
+    Every instance starts with the given color and highlight 0; change them
+    with set_instance_attribute. The grid's object color is the given color
+    too, which is what Workbench draws the instances in. Link the result with
+    primitives.link_objects.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    mesh = bpy.data.meshes.new(f"{name}_Points")
+    mesh.vertices.add(len(points))
+    mesh.vertices.foreach_set("co", points.ravel())
+    mesh.attributes.new("color", 'FLOAT_COLOR', 'POINT')
+    mesh.attributes.new("highlight", 'FLOAT', 'POINT')
+    mesh.update()
+
+    grid = bpy.data.objects.new(name, mesh)
+    grid.location = location
+    grid.color = color
+    set_instance_attribute(grid, "color", np.tile(np.asarray(color, dtype=np.float32), len(points)))
+
+    # prototype stays unlinked; the modifier pulls it into the depsgraph
+    prototype = bpy.data.objects.get(f"{name}_Prototype")
+    if prototype is None:
+        prototype = bpy.data.objects.new(f"{name}_Prototype", prototype_mesh)
+
+    tree = _instancer_node_group()
+    modifier = grid.modifiers.new("Instances", 'NODES')
+    modifier.node_group = tree
+    modifier[_input_identifier(tree, "Instance")] = prototype
+    modifier[_input_identifier(tree, "Scale")] = scale
+    if material is not None:
+        modifier[_input_identifier(tree, "Material")] = material
+    return grid
+
+
+def set_instance_attribute(grid, name, values):
+    """Write per-instance values ("color": flat RGBA, "highlight": 0..1)."""
+    attribute = grid.data.attributes[name]
+    prop = "color" if attribute.data_type == 'FLOAT_COLOR' else "value"
+    attribute.data.foreach_set(prop, np.asarray(values, dtype=np.float32).ravel())
+    grid.data.update()
+
+
+def instance_locations(grid):
+    """World location of every instance, in point order, as Vectors."""
+    count = len(grid.data.vertices)
+    co = np.empty(count * 3, dtype=np.float32)
+    grid.data.vertices.foreach_get("co", co)
+    # matrix_basis is valid before the depsgraph has evaluated the new object
+    matrix = grid.matrix_basis
+    return [matrix @ Vector(point) for point in co.reshape(count, 3).tolist()]
@@ -0,0 +1,174 @@
+# label subsystem for the insta_* scripts
+#
+# A text label as a FONT curve object is its own datablock pair, and the
+# depsgraph re-tessellates the glyph outlines of every one of them on each
+# full evaluation before they are synced to the viewport or render engine
+# one object at a time. Here the text is converted once per unique string
+# and style; the resulting geometry is cached, and a LabelBatch bakes all
+# static labels of a scene into a single mesh object per color with one
+# shared palette material. A thousand labels then evaluate and sync like one
+# mesh.
+#
+#   labels = LabelBatch()
+#   labels.add("Core 1", (0, 6.7, 0), size=0.4)
+#   labels.add("Memory", (-5, 0, 2.5), rotation=(1.5708, 0, 0.7854), color=(0, 0, 1, 1),
+#              size=0.7, extrude=0.05, align_x='CENTER')
+#   labels.flush(scene.collection)
+#
+# Labels that have to move on their own get an object on the shared mesh of
+# their string instead: new_object(name, label_mesh("Core 1", size=0.4)).
+
+import hashlib
+
+import bpy
+import numpy as np
+from mathutils import Euler, Matrix, Vector
+
+from .materials import get_material
+from .primitives import link_objects, new_object, set_object_material
+from .profiling import phase
+
+# (text, size, extrude, align_x) -> (co, loop vertex indices, loop starts, smooth flags)
+_geometry = {}
+
+
+def _style_key(text, size, extrude, align_x):
+    return (text, float(size), float(extrude), align_x)
+
+
+def _text_meshes(keys, name):
+    """Convert texts with their styles into new mesh datablocks.
+
+    One temporary FONT object is restyled for every text, so the conversion
+    costs the tessellation only, not a curve and object per text.
+    """
+    font = bpy.data.curves.new(name, type='FONT')
+    obj = bpy.data.objects.new(name, font)
+    meshes = []
+    for text, size, extrude, align_x in keys:
+        font.body = text
+        font.size = size
+        font.extrude = extrude
+        font.align_x = align_x
+        meshes.append(bpy.data.meshes.new_from_object(obj))
+    bpy.data.batch_remove([obj, font])
+    return meshes
+
+
+def _convert(keys):
+    """Fill the geometry cache for the texts not converted yet."""
+    missing = list(dict.fromkeys(key for key in keys if key not in _geometry))
+    if not missing:
+        return
+    meshes = _text_meshes(missing, "LabelTmp")
+    for key, mesh in zip(missing, meshes):
+        co = np.empty(3 * len(mesh.vertices), dtype=np.float32)
+        loops = np.empty(len(mesh.loops), dtype=np.int32)
+        starts = np.empty(len(mesh.polygons), dtype=np.int32)
+        smooth = np.empty(len(mesh.polygons), dtype=bool)
+        mesh.vertices.foreach_get("co", co)
+        mesh.loops.foreach_get("vertex_index", loops)
+        mesh.polygons.foreach_get("loop_start", starts)
+        mesh.polygons.foreach_get("use_smooth", smooth)
+        _geometry[key] = (co.reshape(-1, 3), loops, starts, smooth)
+    bpy.data.batch_remove(meshes)
+
+
+def label_mesh(text, size=1.0, extrude=0.0, align_x='LEFT'):
+    """Return the shared mesh of a text in a style, converting it on first use.
+
+    Like the primitive meshes it has one empty material slot for an
+    object-linked material (see set_object_material).
+    """
+    key = _style_key(text, size, extrude, align_x)
+    name = "Label_" + hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+    mesh = bpy.data.meshes.get(name)
+    if mesh is not None:
+        return mesh
+
+    with phase("labels"):
+        mesh = _text_meshes([key], name)[0]
+        mesh.name = name
+        mesh.materials.clear()
+        mesh.materials.append(None)
+    return mesh
+
+
+def _build_mesh(name, parts):
+    """One mesh from (geometry, 4x4 matrix) parts."""
+    co, loops, starts, smooth = [], [], [], []
+    vertex_offset = loop_offset = 0
+    for (part_co, part_loops, part_starts, part_smooth), matrix in parts:
+        co.append(part_co @ matrix[:3, :3].T + matrix[:3, 3])
+        loops.append(part_loops + vertex_offset)
+        starts.append(part_starts + loop_offset)
+        smooth.append(part_smooth)
+        vertex_offset += len(part_co)
+        loop_offset += len(part_loops)
+
+    mesh = bpy.data.meshes.new(name)
+    co = np.concatenate(co).astype(np.float32)
+    starts = np.concatenate(starts)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(loop_offset)
+    mesh.loops.foreach_set("vertex_index", np.concatenate(loops))
+    mesh.polygons.add(len(starts))
+    mesh.polygons.foreach_set("loop_start", starts)
+    mesh.update(calc_edges=True)
+    mesh.polygons.foreach_set("use_smooth", np.concatenate(smooth))
+    return mesh
+
+
+class LabelBatch:
+    """Collect static text labels and bake them into one mesh per color."""
+
+    def __init__(self):
+        # color -> [(style key, 4x4 matrix)]
+        self._labels = {}
+
+    def add(self, text, location, rotation=(0, 0, 0), scale=1.0, color=None,
+            size=1.0, extrude=0.0, align_x='LEFT'):
+        """Queue a label; text, size, extrude and align_x are the FONT curve settings.
+
+        color picks the shared palette material; None leaves the label without
+        a material like a plain text object.
+        """
+        if isinstance(scale, (int, float)):
+            scale = (scale, scale, scale)
+        matrix = np.array(Matrix.LocRotScale(Vector(location), Euler(rotation), Vector(scale)))
+        color = tuple(color) if color is not None else None
+        self._labels.setdefault(color, []).append((_style_key(text, size, extrude, align_x), matrix))
+
+    def _bake(self, name, color, labels):
+        # named after its labels, so a bake appended from the asset library (see assets.py) is found
+        content = repr([(key, matrix.tolist()) for key, matrix in labels])
+        mesh_name = "LabelBake_" + hashlib.sha1(content.encode()).hexdigest()[:12]
+        with phase("labels"):
+            mesh = bpy.data.meshes.get(mesh_name)
+            if mesh is None:
+                _convert(key for key, _ in labels)
+                mesh = _build_mesh(mesh_name, [(_geometry[key], matrix) for key, matrix in labels])
+                # an empty slot like the shared meshes, so the library holds no material of its own
+                mesh.materials.append(None)
+            obj = new_object(name, mesh)
+            if color is not None:
+                set_object_material(obj, get_material(color))
+            return obj
+
+    def flush(self, collection=None, name="Labels", reconciler=None):
+        """Create the label objects, link them into collection and reset the batch.
+
+        With a reconciler (see reconcile.Reconciler) the objects are declared
+        through it and only rebaked when their labels changed.
+        """
+        objects = []
+        for color, labels in self._labels.items():
+            object_name = name if not objects else f"{name}_{len(objects)}"
+            if reconciler is None:
+                objects.append(link_objects([self._bake(object_name, color, labels)], collection)[0])
+            else:
+                objects.append(reconciler.derived(object_name, (color, labels),
+                                                  lambda: self._bake(object_name, color, labels)))
+        self._labels.clear()
+        return objects
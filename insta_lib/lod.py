@@ -0,0 +1,274 @@
+# screen-space level of detail for the insta_* primitives
+#
+# Spheres and cylinders are built at the bpy.ops defaults (32 segments),
+# which is hundreds of vertices for a packet a few pixels wide and only
+# lengthens Cycles' BVH build. Once the camera and the render resolution are
+# set, apply_lod() bounds where each primitive's keys can take it (from the
+# key and handle values, no frame is evaluated), estimates the largest radius
+# in pixels it reaches on screen and moves the object onto the
+# coarsest cached LOD mesh whose silhouette stays within a tolerance of the
+# true circle. A circle of radius R pixels drawn with n segments is off by at
+# most R * (1 - cos(pi / n)) pixels, so at the default half-pixel tolerance
+# 8 segments hold up to a radius of 6 pixels. The primitives are flat-shaded,
+# so only objects whose facets are too small to see (a radius of about 10
+# pixels at 32 segments) are reduced, onto smooth-shaded LOD meshes.
+#
+#   smart_camera_setup(scene)
+#   apply_lod(scene)
+#
+# LOD meshes are ordinary shared primitives (primitive_mesh with fewer
+# segments); an object never gets more segments than it was built with. The
+# full mesh stays in bpy.data (without users once all its objects moved), so
+# a reconciled build asking for it again does not create a datablock. A
+# reconciled build without level of detail calls remove_lod() instead: the
+# objects it keeps unchanged are still on the LOD meshes of the earlier
+# build and go back to their full meshes.
+
+import math
+
+import bpy
+import numpy as np
+
+from .keyframes import action_fcurves
+from .primitives import PARAMS_KEY, PRIMITIVE_KEY, primitive_mesh
+from .profiling import phase
+from .reset import remove_objects
+
+# custom property of an LOD mesh: the build parameters of the primitive it reduces
+SOURCE_KEY = "insta_lod_source"
+
+# transform channels that move or scale a primitive
+_CHANNELS = ("location", "delta_location", "scale")
+
+# segment counts to pick from, coarsest first
+LEVELS = (8, 12, 16, 24, 32)
+
+
+def _sphere_lod(params, segments):
+    return dict(params, segments=segments, ring_count=max(segments // 2, 3))
+
+
+def _cylinder_lod(params, segments):
+    return dict(params, vertices=segments)
+
+
+def _sphere_bound(params):
+    return params["radius"]
+
+
+def _cylinder_bound(params):
+    # out to the rim of a cap: a tall cylinder reaches much further than its radius
+    return math.hypot(params["radius"], params["depth"] / 2)
+
+
+# kind -> (parameter holding the segment count, its default, LOD params, bounding radius)
+_TESSELLATED = {
+    'UV_SPHERE': ("segments", 32, _sphere_lod, _sphere_bound),
+    'CYLINDER': ("vertices", 32, _cylinder_lod, _cylinder_bound),
+}
+
+
+def _pixels_per_unit(scene, camera):
+    """(focal length in pixels, is orthographic) of a camera at the scene's render size."""
+    render = scene.render
+    width = render.resolution_x * render.resolution_percentage / 100
+    height = render.resolution_y * render.resolution_percentage / 100
+    data = camera.data
+    fit = data.sensor_fit
+    if fit == 'AUTO':
+        pixels, sensor = max(width, height), data.sensor_width
+    elif fit == 'HORIZONTAL':
+        pixels, sensor = width, data.sensor_width
+    else:
+        pixels, sensor = height, data.sensor_height
+    if data.type == 'ORTHO':
+        return pixels / data.ortho_scale, True
+    return pixels * data.lens / sensor, False
+
+
+def _played_actions(obj):
+    anim = obj.animation_data
+    if anim is None:
+        return []
+    actions = [anim.action] if anim.action else []
+    actions += [strip.action for track in anim.nla_tracks for strip in track.strips if strip.action]
+    return actions
+
+
+def _keyed_extent(obj):
+    """(min corner, max corner, largest scale) of where the object's keys can take it.
+
+    A Bezier segment stays inside the hull of its keys and handles, so the
+    range of all key and handle values bounds every channel over the whole
+    animation without evaluating a single frame. Parents and constraints are
+    not followed.
+    """
+    low = {path: np.array(getattr(obj, path), dtype=np.float64) for path in _CHANNELS}
+    high = {path: values.copy() for path, values in low.items()}
+    for action in _played_actions(obj):
+        for fcurve in action_fcurves(action):
+            if fcurve.data_path not in low or fcurve.array_index > 2 or not len(fcurve.keyframe_points):
+                continue
+            points = fcurve.keyframe_points
+            values = np.empty((3, 2 * len(points)))
+            for row, attribute in zip(values, ("co", "handle_left", "handle_right")):
+                points.foreach_get(attribute, row)
+            values = values[:, 1::2]
+            index = fcurve.array_index
+            low[fcurve.data_path][index] = min(low[fcurve.data_path][index], values.min())
+            high[fcurve.data_path][index] = max(high[fcurve.data_path][index], values.max())
+    scale = max(np.abs(low["scale"]).max(), np.abs(high["scale"]).max())
+    return low["location"] + low["delta_location"], high["location"] + high["delta_location"], scale
+
+
+def _frustum_sides(scene, camera):
+    """(normals, offsets) of the side planes of a camera's view in camera space, pointing inward."""
+    corners = [np.array(corner, dtype=np.float64) for corner in camera.data.view_frame(scene=scene)]
+    center = sum(corners) / 4
+    normals, offsets = [], []
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        if camera.data.type == 'ORTHO':
+            # parallel sides: through the frame edge, along the view axis
+            normal = np.cross(b - a, (0.0, 0.0, -1.0))
+        else:
+            normal = np.cross(a, b)
+        normal /= np.linalg.norm(normal)
+        if normal @ (center - a) < 0:
+            normal = -normal
+        normals.append(normal)
+        offsets.append(-(normal @ a) if camera.data.type == 'ORTHO' else 0.0)
+    return np.array(normals), np.array(offsets)
+
+
+def projected_radii(scene, objects, radii, bounds=None):
+    """Largest on-screen radius in pixels of circles on objects over their animation.
+
+    radii are the object-space circle radii and bounds the radii of spheres
+    around the whole objects (default: radii), both scaled by each object's
+    largest scale. The camera is taken as it is on the current frame. Objects
+    whose bounding spheres can never enter its view get 0; objects that can
+    reach the camera plane count as infinitely large.
+    """
+    scene.view_layers[0].update()
+    extents = [_keyed_extent(obj) for obj in objects]
+    low = np.array([extent[0] for extent in extents])
+    high = np.array([extent[1] for extent in extents])
+    scale = np.array([extent[2] for extent in extents])
+    radius = np.asarray(radii) * scale
+    bound = np.asarray(bounds if bounds is not None else radii) * scale
+    center = (low + high) / 2
+    half = (high - low) / 2
+
+    camera = scene.camera
+    view = np.array(camera.matrix_world.inverted(), dtype=np.float64)
+    rotation, translation = view[:3, :3], view[:3, 3]
+
+    def farthest(normals, offsets):
+        # largest signed distance of each box (grown by the bounding radius) from camera-space planes:
+        # a plane's distance is linear in the position, so a box reaches it with one corner
+        world = normals @ rotation
+        return (center @ world.T + np.abs(half) @ np.abs(world).T + normals @ translation + offsets
+                + bound[:, None])
+
+    normals, offsets = _frustum_sides(scene, camera)
+    visible = (farthest(np.vstack([normals, (0.0, 0.0, -1.0)]), np.append(offsets, 0.0)) > 0).all(axis=1)
+
+    focal, ortho = _pixels_per_unit(scene, camera)
+    if ortho:
+        pixels = radius * focal
+    else:
+        # nearest depth of the box, minus the bounding radius
+        near = -farthest(np.array([(0.0, 0.0, 1.0)]), np.zeros(1))[:, 0]
+        pixels = np.where(near > 0, radius * focal / np.maximum(near, 1e-9), np.inf)
+    return np.where(visible, pixels, 0.0)
+
+
+def lod_segments(radius_pixels, tolerance=0.5, levels=LEVELS):
+    """Fewest segments from levels keeping a circle of that radius within tolerance pixels."""
+    for segments in levels:
+        if radius_pixels * (1 - math.cos(math.pi / segments)) <= tolerance:
+            return segments
+    return levels[-1]
+
+
+def _smooth(mesh):
+    """Smooth-shade an LOD mesh, keeping cylinder caps sharp."""
+    mesh.shade_smooth()
+    if hasattr(mesh, "set_sharp_from_angle"):  # Blender 4.1+
+        mesh.set_sharp_from_angle(angle=math.radians(60))
+
+
+def apply_lod(scene=None, tolerance=0.5, facet_pixels=2.0):
+    """Put the scene's sphere and cylinder primitives on LOD meshes for its camera.
+
+    Call it once the camera and the render resolution are final. The
+    primitives are flat-shaded, so an object is only reduced where its facets
+    are at most facet_pixels wide on screen (where the faceting does not show);
+    LOD meshes are smooth-shaded. Returns the number of objects moved to
+    another mesh.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+    if scene.camera is None:
+        return 0
+
+    with phase("lod"):
+        candidates = []
+        radii = []
+        bounds = []
+        for obj in scene.objects:
+            mesh = obj.data if obj.type == 'MESH' else None
+            if mesh is None or mesh.get(PRIMITIVE_KEY) not in _TESSELLATED:
+                continue
+            candidates.append((obj, mesh))
+            radii.append(mesh[PARAMS_KEY]["radius"])
+            bounds.append(_TESSELLATED[mesh[PRIMITIVE_KEY]][3](mesh[PARAMS_KEY]))
+        if not candidates:
+            return 0
+
+        pixels = projected_radii(scene, [obj for obj, _ in candidates], radii, bounds)
+        moved = 0
+        for (obj, mesh), radius_pixels in zip(candidates, pixels):
+            kind = mesh[PRIMITIVE_KEY]
+            key, default, lod_params, _ = _TESSELLATED[kind]
+            # LOD meshes remember the primitive they reduce, so a later pass can pick again
+            source = (mesh.get(SOURCE_KEY) or mesh[PARAMS_KEY]).to_dict()
+            built = source.get(key, default)
+            if 2 * math.pi * radius_pixels / built > facet_pixels:
+                segments = built
+            else:
+                segments = lod_segments(radius_pixels, tolerance, [level for level in LEVELS if level < built] + [built])
+            lod = primitive_mesh(kind, **(source if segments == built else lod_params(source, segments)))
+            if segments != built and SOURCE_KEY not in lod:
+                lod[SOURCE_KEY] = source
+                _smooth(lod)
+            if lod != mesh:
+                obj.data = lod
+                moved += 1
+
+    return moved
+
+
+def remove_lod(scene=None):
+    """Put the scene's objects on LOD meshes back on the full primitives they reduce.
+
+    LOD meshes left without users are removed. Returns the number of objects
+    moved to another mesh.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+
+    with phase("lod"):
+        moved = 0
+        released = {}
+        for obj in scene.objects:
+            mesh = obj.data if obj.type == 'MESH' else None
+            if mesh is None or SOURCE_KEY not in mesh:
+                continue
+            obj.data = primitive_mesh(mesh[PRIMITIVE_KEY], **mesh[SOURCE_KEY].to_dict())
+            released[mesh.name] = mesh
+            moved += 1
+        if released:
+            remove_objects((), released.values())
+
+    return moved
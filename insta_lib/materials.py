@@ -0,0 +1,131 @@
+# material cache for the insta_* scripts
+#
+# Materials are shared per unique look (shading mode + color) instead of
+# being created per object. Per-object colors, including animated ones, live
+# on object.color and are read by a shared material through an Object Info
+# node, so the material count stays at the size of the palette.
+#
+# Workbench and the solid viewport do not evaluate node trees: they draw a
+# material's diffuse_color (shading color_type 'MATERIAL') or the object's
+# color ('OBJECT'). A material shared by objects of different colors can only
+# show them the second way, so every object carries its color in object.color
+# (set_object_material copies a palette material's color there) and the
+# --draft preset draws with color_type 'OBJECT' (see presets.py).
+
+import bpy
+
+from .profiling import phase
+
+# Principled roughness matching the non-node material defaults
+_FLAT_ROUGHNESS = 0.4
+
+# marks the materials whose color comes from the object (or instancer), not diffuse_color
+OBJECT_COLOR_KEY = "insta_object_color"
+
+
+def _color_key(color):
+    return "_".join(f"{c:.4g}" for c in color)
+
+
+def _mix_to_white(tree, factor, color, bsdf):
+    """Feed color, mixed toward white by factor, into the BSDF base color."""
+    mix = tree.nodes.new("ShaderNodeMix")
+    mix.data_type = 'RGBA'
+    mix.location = (bsdf.location.x - 250, bsdf.location.y)
+    mix_inputs = {socket.identifier: socket for socket in mix.inputs}
+    mix_inputs["B_Color"].default_value = (1.0, 1.0, 1.0, 1.0)
+    tree.links.new(factor, mix.inputs['Factor'])
+    tree.links.new(color, mix_inputs["A_Color"])
+    result = next(s for s in mix.outputs if s.identifier == "Result_Color")
+    tree.links.new(result, bsdf.inputs['Base Color'])
+
+
+def get_material(color, shading='FLAT'):
+    """Return the shared material for a color.
+
+    shading is 'FLAT' (plain non-node material) or 'PRINCIPLED' (Principled BSDF).
+    """
+    name = f"Pal_{shading}_{_color_key(color)}"
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+
+    with phase("materials"):
+        mat = bpy.data.materials.new(name=name)
+        mat.diffuse_color = color
+        if shading == 'PRINCIPLED':
+            mat.use_nodes = True
+            bsdf = mat.node_tree.nodes.get("Principled BSDF")
+            if bsdf:
+                bsdf.inputs['Base Color'].default_value = color
+        else:
+            mat.use_nodes = False
+    return mat
+
+
+def object_color_material(shading='FLAT'):
+    """Return the shared material whose base color is each object's color.
+
+    Set (and keyframe) object.color on the objects using it; both shading
+    modes need nodes for that, 'FLAT' just keeps the non-node roughness. An
+    object's "highlight" custom property (0-1, absent = 0) mixes its color
+    toward white, so a flash can be keyed the same way on every object.
+    diffuse_color stays at the default: Workbench and the solid viewport
+    show the objects' colors only with shading color_type 'OBJECT'.
+    """
+    name = f"Pal_{shading}_ObjectColor"
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+
+    with phase("materials"):
+        mat = bpy.data.materials.new(name=name)
+        mat[OBJECT_COLOR_KEY] = True
+        mat.use_nodes = True
+        tree = mat.node_tree
+        bsdf = tree.nodes.get("Principled BSDF")
+        if bsdf:
+            info = tree.nodes.new("ShaderNodeObjectInfo")
+            info.location = (bsdf.location.x - 500, bsdf.location.y)
+            highlight = tree.nodes.new("ShaderNodeAttribute")
+            highlight.attribute_type = 'OBJECT'
+            highlight.attribute_name = "highlight"
+            highlight.location = (bsdf.location.x - 500, bsdf.location.y - 200)
+            _mix_to_white(tree, highlight.outputs['Fac'], info.outputs['Color'], bsdf)
+            if shading == 'FLAT':
+                bsdf.inputs['Roughness'].default_value = _FLAT_ROUGHNESS
+    return mat
+
+
+def instance_color_material(shading='FLAT'):
+    """Return the shared material for geometry-nodes instances (see instancing).
+
+    Base color comes from the instancer's "color" attribute, mixed toward
+    white by its "highlight" attribute. Workbench draws the instances in the
+    instancer object's color instead (shading color_type 'OBJECT').
+    """
+    name = f"Pal_{shading}_InstanceColor"
+    mat = bpy.data.materials.get(name)
+    if mat is not None:
+        return mat
+
+    with phase("materials"):
+        mat = bpy.data.materials.new(name=name)
+        mat[OBJECT_COLOR_KEY] = True
+        mat.use_nodes = True
+        tree = mat.node_tree
+        bsdf = tree.nodes.get("Principled BSDF")
+        if bsdf:
+            color = tree.nodes.new("ShaderNodeAttribute")
+            color.attribute_type = 'INSTANCER'
+            color.attribute_name = "color"
+            color.location = (bsdf.location.x - 500, bsdf.location.y)
+            highlight = tree.nodes.new("ShaderNodeAttribute")
+            highlight.attribute_type = 'INSTANCER'
+            highlight.attribute_name = "highlight"
+            highlight.location = (bsdf.location.x - 500, bsdf.location.y - 200)
+
+            _mix_to_white(tree, highlight.outputs['Fac'], color.outputs['Color'], bsdf)
+            if shading == 'FLAT':
+                bsdf.inputs['Roughness'].default_value = _FLAT_ROUGHNESS
+    return mat
@@ -0,0 +1,93 @@
+# pooled packet streams for the insta_* scripts
+#
+# A stream is an iterable (a list or a generator) of (spawn_frame, path,
+# duration) events. Instead of one object per packet, plan_pool() assigns
+# the events to as few reusable slots as can carry them (interval
+# partitioning: the slot count is the largest number of packets in flight
+# at once), and key_pool() keys each slot's object through all of its trips:
+# shown at spawn, moved along the path, hidden (hide_viewport/hide_render)
+# when the trip ends until its next spawn. Object count and per-frame
+# evaluation then follow the stream's concurrency, not its length.
+#
+# Each trip is keyed so the object moves exactly like a fresh packet would:
+# it holds its start point from the (hidden) frame before spawn and its end
+# point until the (hidden) frame after the trip, so the Bezier handles of
+# the first and last keys are flat as on a single-trip fcurve. A slot is
+# therefore reused at the earliest three frames after its trip ends.
+#
+#   events = [(1 + 10 * i, [memory_pos, core_pos], 79) for i in range(1000)]
+#   slot_count, trips = plan_pool(events)
+#   packets = [create_packet(f"Packet_{slot}") for slot in range(slot_count)]
+#   key_pool(keys, packets, trips)
+#
+# A path is either a sequence of points spread evenly over the duration or
+# a sequence of (frame offset, point) pairs. plan_pool is plain Python.
+
+import heapq
+from collections import namedtuple
+
+# slot: pool index; event: index into the events; waypoints: ((frame, point), ...)
+Trip = namedtuple("Trip", "slot event spawn end waypoints")
+
+
+def _waypoints(spawn, path, duration):
+    path = list(path)
+    if path and len(path[0]) == 2 and not isinstance(path[0][1], (int, float)):
+        return tuple((spawn + offset, tuple(point)) for offset, point in path)
+    if len(path) == 1:
+        return ((spawn, tuple(path[0])),)
+    step = duration / (len(path) - 1)
+    return tuple((spawn + i * step, tuple(point)) for i, point in enumerate(path))
+
+
+def plan_pool(events):
+    """Assign stream events to pool slots; returns (slot count, trips by spawn frame).
+
+    Raises ValueError for an event whose path has a key after its duration
+    (its slot would be handed on while the packet is still moving).
+    """
+    free = []  # (free from frame, slot)
+    slot_count = 0
+    trips = []
+    for index, (spawn, path, duration) in sorted(enumerate(events), key=lambda item: item[1][0]):
+        end = spawn + duration
+        waypoints = _waypoints(spawn, path, duration)
+        if waypoints and waypoints[-1][0] > end:
+            raise ValueError(f"event {index}: path ends {waypoints[-1][0] - spawn} frames after spawn, "
+                             f"after its duration of {duration}")
+        if free and free[0][0] <= spawn:
+            _, slot = heapq.heappop(free)
+        else:
+            slot = slot_count
+            slot_count += 1
+        # frames spawn - 1 .. end + 1 are keyed for the trip, see key_pool
+        heapq.heappush(free, (end + 3, slot))
+        trips.append(Trip(slot, index, spawn, end, waypoints))
+    return slot_count, trips
+
+
+def key_pool(keys, objects, trips, interpolation='BEZIER'):
+    """Key visibility and location of the pooled objects for their trips.
+
+    keys is a KeyframeBatch (or SharedActions); objects[slot] carries the
+    trips of that slot. The object is shown from spawn to end; the path's
+    last point is held until then.
+    """
+    by_slot = {}
+    for trip in trips:
+        by_slot.setdefault(trip.slot, []).append(trip)
+    for slot, slot_trips in by_slot.items():
+        obj = objects[slot]
+        visibility_frames = []
+        visibility = []
+        for trip in slot_trips:
+            frames = [frame for frame, _ in trip.waypoints]
+            points = [point for _, point in trip.waypoints]
+            # hidden hold keys around the trip: jump to the start point, stay on the end point
+            keys.add_vector(obj, "location", (trip.spawn - 1,), points[:1], 'CONSTANT')
+            keys.add_vector(obj, "location", frames, points, interpolation)
+            keys.add_vector(obj, "location", (trip.end + 1,), points[-1:], 'CONSTANT')
+            visibility_frames += [trip.spawn - 1, trip.spawn, trip.end + 1]
+            visibility += [1.0, 0.0, 1.0]
+        for data_path in ("hide_viewport", "hide_render"):
+            keys.add(obj, data_path, 0, visibility_frames, visibility, 'CONSTANT')
@@ -0,0 +1,128 @@
+# command-line render presets for the insta_* scripts
+#
+# Scripts keep their own final-quality settings and call
+# apply_render_presets() last; flags given after `--` are layered on top:
+#
+#   blender -b --python insta_parallel.py --render-anim -- --draft
+#   blender -b --python insta_parallel.py -- --preview-percent 25 --engine eevee --samples 16
+#   python -m insta_lib.render_pool insta_gpu_tensor.py -j 4 -- --deliver portrait,square,reel
+#
+# --deliver only turns the scene into the over-scan master (see delivery.py);
+# the per-format movies are cut from its frames by render_pool.py, so a
+# direct `blender --render-anim` with it writes just the master movie.
+# Without flags nothing is changed, so final renders stay exactly as before.
+
+import argparse
+import ast
+import os
+import sys
+
+import bpy
+
+from .delivery import parse_targets, setup_master
+from .lod import SOURCE_KEY, apply_lod
+
+ENGINES = {
+    'workbench': ('BLENDER_WORKBENCH',),
+    'eevee': ('BLENDER_EEVEE_NEXT', 'BLENDER_EEVEE'),
+    'cycles': ('CYCLES',),
+}
+# Workbench anti-aliasing levels by sample count
+WORKBENCH_AA = ((1, 'FXAA'), (5, '5'), (8, '8'), (11, '11'), (16, '16'), (32, '32'))
+
+# what --draft means unless a flag says otherwise
+DRAFT = {'engine': 'workbench', 'preview_percent': 25, 'samples': 1}
+
+
+def script_argv(argv=None):
+    """Arguments after `--` (Blender's own arguments come before it)."""
+    argv = sys.argv if argv is None else argv
+    return argv[argv.index("--") + 1:] if "--" in argv else []
+
+
+def parse_render_args(argv=None):
+    parser = argparse.ArgumentParser(prog="insta render presets", add_help=False)
+    parser.add_argument("--draft", action="store_true", help="fast layout check render")
+    parser.add_argument("--preview-percent", type=int, help="resolution percentage")
+    parser.add_argument("--engine", choices=sorted(ENGINES), help="render engine")
+    parser.add_argument("--samples", type=int, help="render samples (or Workbench AA level)")
+    parser.add_argument("--frame-step", type=int, help="render every K-th frame")
+    parser.add_argument("--deliver", help="formats rendered from one master, e.g. portrait,square,reel")
+    # the same `--` arguments may carry options for other tools
+    args = parser.parse_known_args(script_argv(argv))[0]
+    if args.draft:
+        for name, value in DRAFT.items():
+            if getattr(args, name) is None:
+                setattr(args, name, value)
+    return args
+
+
+def _set_engine(render, name):
+    # the Eevee identifier differs between Blender versions
+    for engine in ENGINES[name]:
+        try:
+            render.engine = engine
+            return
+        except TypeError:
+            continue
+    raise ValueError(f"render engine {name!r} is not available")
+
+
+def _set_samples(scene, samples):
+    engine = scene.render.engine
+    if engine == 'CYCLES':
+        scene.cycles.samples = samples
+    elif engine == 'BLENDER_WORKBENCH':
+        scene.display.render_aa = next((aa for count, aa in WORKBENCH_AA if count >= samples), '32')
+    else:
+        scene.eevee.taa_render_samples = samples
+
+
+def apply_render_presets(scene=None, argv=None):
+    """Apply the `--` render flags on top of the scene's own settings."""
+    if scene is None:
+        scene = bpy.context.scene
+    args = parse_render_args(argv)
+    render = scene.render
+
+    if args.engine:
+        _set_engine(render, args.engine)
+        if render.engine == 'BLENDER_WORKBENCH':
+            # Workbench skips node trees: draw the palette from object.color (see materials.py)
+            scene.display.shading.light = 'STUDIO'
+            scene.display.shading.color_type = 'OBJECT'
+    if args.samples:
+        _set_samples(scene, args.samples)
+    if args.preview_percent:
+        render.resolution_percentage = args.preview_percent
+    if args.frame_step:
+        scene.frame_step = args.frame_step
+    if args.draft:
+        render.ffmpeg.constant_rate_factor = 'LOW'
+        render.ffmpeg.ffmpeg_preset = 'REALTIME'
+        # keep drafts from overwriting the final movie
+        base, ext = os.path.splitext(render.filepath)
+        render.filepath = f"{base}_draft{ext}"
+    if args.deliver:
+        setup_master(scene, parse_targets(args.deliver))
+        # the master is finer than the resolution the primitives were reduced for
+        if any(SOURCE_KEY in mesh for mesh in bpy.data.meshes):
+            apply_lod(scene)
+    return args
+
+
+def param_overrides(argv=None):
+    """Build parameters given as `--set name=value` after `--` (values are Python literals).
+
+        blender -b --python insta_gpu_tensor.py -- --set grid_size=64 --set use_instancing=True
+    """
+    parser = argparse.ArgumentParser(prog="insta build parameters", add_help=False)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE")
+    overrides = {}
+    for item in parser.parse_known_args(script_argv(argv))[0].set:
+        name, _, value = item.partition("=")
+        try:
+            overrides[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[name] = value
+    return overrides
@@ -0,0 +1,102 @@
+# shared-mesh primitive builder for the insta_* scripts
+#
+# bpy.ops.mesh.primitive_*_add runs a full operator (depsgraph update + undo
+# push) per object. Here each primitive mesh is built once with bmesh, kept in
+# bpy.data.meshes, and every object that needs it is created with
+# bpy.data.objects.new on that shared mesh and linked in one batch.
+
+import bmesh
+import bpy
+
+from .materials import OBJECT_COLOR_KEY
+from .profiling import phase
+
+# custom properties recording a primitive mesh's kind and build parameters
+PRIMITIVE_KEY = "insta_primitive"
+PARAMS_KEY = "insta_params"
+
+
+def _mesh_name(kind, params):
+    args = "_".join(f"{key}{value:g}" for key, value in sorted(params.items()))
+    return f"Prim_{kind}_{args}"
+
+
+def _build_cube(bm, size):
+    bmesh.ops.create_cube(bm, size=size, calc_uvs=True)
+
+
+def _build_uv_sphere(bm, radius, segments=32, ring_count=16):
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=ring_count,
+                              radius=radius, calc_uvs=True)
+
+
+def _build_cylinder(bm, radius, depth, vertices=32):
+    bmesh.ops.create_cone(bm, cap_ends=True, cap_tris=False, segments=vertices,
+                          radius1=radius, radius2=radius, depth=depth, calc_uvs=True)
+
+
+_BUILDERS = {
+    'CUBE': _build_cube,
+    'UV_SPHERE': _build_uv_sphere,
+    'CYLINDER': _build_cylinder,
+}
+
+
+def primitive_mesh(kind, **params):
+    """Return the shared mesh for a primitive, building it on first use.
+
+    kind is 'CUBE' (size), 'UV_SPHERE' (radius, segments, ring_count) or
+    'CYLINDER' (radius, depth, vertices); defaults match bpy.ops.mesh.
+    """
+    name = _mesh_name(kind, params)
+    mesh = bpy.data.meshes.get(name)
+    if mesh is not None:
+        return mesh
+
+    with phase("primitives"):
+        bm = bmesh.new()
+        bm.loops.layers.uv.new("UVMap")
+        _BUILDERS[kind](bm, **params)
+        mesh = bpy.data.meshes.new(name)
+        bm.to_mesh(mesh)
+        bm.free()
+        # one empty slot so objects can carry their own (object-linked) material
+        mesh.materials.append(None)
+        # what the mesh was built from, for level of detail (see lod.py)
+        mesh[PRIMITIVE_KEY] = kind
+        mesh[PARAMS_KEY] = params
+    return mesh
+
+
+def new_object(name, data, location=(0, 0, 0), rotation=None, scale=None):
+    """Create an (unlinked) object on shared data; link it with link_objects."""
+    obj = bpy.data.objects.new(name, data)
+    obj.location = location
+    if rotation is not None:
+        obj.rotation_euler = rotation
+    if scale is not None:
+        obj.scale = scale
+    return obj
+
+
+def link_objects(objects, collection=None):
+    """Link freshly created objects into a collection in one pass."""
+    if collection is None:
+        collection = bpy.context.collection
+    link = collection.objects.link
+    for obj in objects:
+        link(obj)
+    return objects
+
+
+def set_object_material(obj, mat):
+    """Assign a material to obj without touching the mesh it shares.
+
+    A fixed palette color is copied to obj.color as well, for Workbench
+    (see materials.py); per-object color materials leave it to the caller.
+    """
+    slot = obj.material_slots[0]
+    slot.link = 'OBJECT'
+    slot.material = mat
+    if mat is not None and OBJECT_COLOR_KEY not in mat:
+        obj.color = mat.diffuse_color
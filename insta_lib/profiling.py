@@ -0,0 +1,217 @@
+# build profiling for the insta_* scripts
+#
+# Scripts wrap each build stage in `with phase("name"):` and the library
+# marks its own stages the same way (primitive meshes and materials when
+# they are built on a cache miss, camera framing). Profiling is off unless
+# $INSTA_PROFILE is set (or enable() is called, as bench_worker.py does);
+# while off, phase() hands back a shared no-op context and nothing is hooked
+# into Blender.
+#
+#   INSTA_PROFILE=1 blender -b --python insta_hpc_job.py
+#   INSTA_PROFILE=profile.json INSTA_PROFILE_CPROFILE=prof/ blender -b --python insta_hpc_job.py
+#
+# Per phase it records wall time, operator calls (bpy.ops), keyframes
+# written, net datablocks created and depsgraph updates. Phases nest, and a
+# nested phase is reported under its parent's path ("objects/materials"),
+# its counts included in the parent's. With $INSTA_PROFILE_CPROFILE set each
+# top-level phase is also run under cProfile and dumped to DIR/<phase>.prof.
+# profile_report() prints the report and writes it as JSON when
+# $INSTA_PROFILE names a .json file.
+
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import time
+
+import bpy
+
+COUNTERS = ("ops", "keyframes", "datablocks", "depsgraph_updates")
+
+_NULL_PHASE = contextlib.nullcontext()
+
+_enabled = False
+_original_op_call = None
+_stack = []
+# phase path -> {"time", "calls", counter: delta}
+_phases = {}
+_counters = dict.fromkeys(COUNTERS, 0)
+# operator idname -> calls
+_op_calls = {}
+# top-level phase name -> cProfile.Profile
+_profilers = {}
+
+
+def _setting(name):
+    value = os.environ.get(name, "")
+    return "" if value in ("", "0") else value
+
+
+def _datablock_total():
+    return sum(len(collection) for collection in (getattr(bpy.data, name) for name in dir(bpy.data))
+               if isinstance(collection, bpy.types.bpy_prop_collection))
+
+
+def _snapshot():
+    _counters["datablocks"] = _datablock_total()
+    return dict(_counters)
+
+
+@bpy.app.handlers.persistent
+def _on_depsgraph_update(scene, depsgraph):
+    _counters["depsgraph_updates"] += 1
+
+
+def _operator_type():
+    return type(bpy.ops.object.select_all)  # bpy.ops._BPyOpsSubModOp
+
+
+def _counted_op_call(op, *args, **kwargs):
+    _counters["ops"] += 1
+    name = op.idname_py()
+    _op_calls[name] = _op_calls.get(name, 0) + 1
+    return _original_op_call(op, *args, **kwargs)
+
+
+def enable():
+    """Turn profiling on (same as starting with $INSTA_PROFILE set)."""
+    global _enabled, _original_op_call
+    if _enabled:
+        return
+    operator_type = _operator_type()
+    _original_op_call = operator_type.__call__
+    operator_type.__call__ = _counted_op_call
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    atexit.register(disable)
+    _enabled = True
+
+
+def disable():
+    """Turn profiling off and unhook it from Blender; collected data is kept."""
+    global _enabled
+    if not _enabled:
+        return
+    _operator_type().__call__ = _original_op_call
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    atexit.unregister(disable)
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+@contextlib.contextmanager
+def _timed_phase(name):
+    path = "/".join(_stack + [name])
+    profiler = None
+    if not _stack and _setting("INSTA_PROFILE_CPROFILE"):
+        profiler = _profilers.setdefault(name, cProfile.Profile())
+    stats = _phases.setdefault(path, dict({"time": 0.0, "calls": 0}, **dict.fromkeys(COUNTERS, 0)))
+    _stack.append(name)
+    before = _snapshot()
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+        after = _snapshot()
+        _stack.pop()
+        stats["time"] += elapsed
+        stats["calls"] += 1
+        for counter in COUNTERS:
+            stats[counter] += after[counter] - before[counter]
+
+
+def phase(name):
+    """Context manager timing a build stage; repeated phases accumulate."""
+    if not _enabled:
+        return _NULL_PHASE
+    return _timed_phase(name)
+
+
+def count(counter, amount=1):
+    """Add to a counter (the library counts keyframes it writes this way)."""
+    if _enabled:
+        _counters[counter] += amount
+
+
+def phase_times():
+    return {path: stats["time"] for path, stats in _phases.items()}
+
+
+def profile_data():
+    return {
+        "phases": {path: dict(stats) for path, stats in _phases.items()},
+        "operators": dict(sorted(_op_calls.items(), key=lambda item: -item[1])),
+        "totals": {counter: _counters[counter] for counter in COUNTERS if counter != "datablocks"},
+    }
+
+
+def reset_phases():
+    _phases.clear()
+    _op_calls.clear()
+    _profilers.clear()
+    for counter in COUNTERS:
+        _counters[counter] = 0
+
+
+def _report_order(paths, parent=""):
+    """Phase paths with each parent directly followed by its nested phases."""
+    ordered = []
+    for path in paths:
+        head, _, _ = path.rpartition("/")
+        if head == parent:
+            ordered.append(path)
+            ordered += _report_order(paths, path)
+    return ordered
+
+
+def profile_report(path=None):
+    """Print the profile; write it as JSON to path (default: $INSTA_PROFILE if it is a .json file).
+
+    Does nothing while profiling is off.
+    """
+    if not _enabled:
+        return None
+    data = profile_data()
+    rows = [("phase", "time s", "calls", "ops", "keys", "datablocks", "depsgraph")]
+    for phase_path in _report_order(list(data["phases"])):
+        stats = data["phases"][phase_path]
+        depth = phase_path.count("/")
+        rows.append(("  " * depth + phase_path.rsplit("/", 1)[-1], f"{stats['time']:.3f}", str(stats["calls"]),
+                     str(stats["ops"]), str(stats["keyframes"]), f"{stats['datablocks']:+d}",
+                     str(stats["depsgraph_updates"])))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    print("Build profile:")
+    for row in rows:
+        print("  " + "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                               for i, (cell, width) in enumerate(zip(row, widths))))
+    if data["operators"]:
+        print("  operators: " + ", ".join(f"{name} x{calls}" for name, calls in data["operators"].items()))
+
+    profile_dir = _setting("INSTA_PROFILE_CPROFILE")
+    if profile_dir and _profilers:
+        os.makedirs(profile_dir, exist_ok=True)
+        for name, profiler in _profilers.items():
+            profiler.dump_stats(os.path.join(profile_dir, f"{name}.prof"))
+        print(f"  cProfile stats in {profile_dir}")
+
+    setting = _setting("INSTA_PROFILE")
+    if path is None and setting.endswith(".json"):
+        path = setting
+    if path:
+        with open(path, "w") as fh:
+            json.dump(data, fh, indent=2)
+        print(f"  written to {path}")
+    return data
+
+
+if _setting("INSTA_PROFILE"):
+    enable()
@@ -0,0 +1,243 @@
+# parallel frame-range rendering for the insta_* scripts
+#
+#   python -m insta_lib.render_pool insta_parallel.py -j 4 [-- script args]
+#
+# Splits the scene's frame range into chunks, renders each chunk as a PNG
+# sequence in its own `blender --background` worker, retries failed chunks,
+# then encodes the sequence into the script's configured movie file with the
+# same container/codec/quality settings Blender would use. Frames are
+# rendered exactly as in a serial render; only the movie encode moves out of
+# Blender. Needs `blender` and `ffmpeg` on PATH (or $BLENDER / $FFMPEG).
+#
+# Frames go to the frame cache (see frame_cache.py): frames that are already
+# there are skipped, so an interrupted render resumes where it stopped, and
+# the movie is only encoded once the sequence is complete. `-j 1` gives a
+# plain resumable serial render. The cache key covers the script's source,
+# so to re-encode at another quality without rendering again override the
+# movie settings here (`--crf`, `--preset`, `--codec`) instead of editing
+# them in the script.
+#
+# Static spans (see static_spans.py) are rendered once: only the first frame
+# of a span where nothing changes is rendered, and the encode repeats it.
+#
+# With `-- --deliver portrait,square,reel` the frames are one over-scan
+# master (see delivery.py) and a single ffmpeg pass encodes every format
+# from it.
+
+import argparse
+import concurrent.futures
+import fractions
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+
+from .delivery import delivery_filter
+from .frame_cache import cache_dir, contiguous_runs, frame_path, is_valid_frame, missing_frames
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+
+# Blender's ffmpeg enums -> ffmpeg command line (mirrors Blender's own ffmpeg writer)
+CONTAINERS = {'MPEG4': 'mp4', 'QUICKTIME': 'mov', 'MKV': 'matroska', 'AVI': 'avi',
+              'WEBM': 'webm', 'OGG': 'ogg', 'FLASH': 'flv', 'MPEG1': 'mpeg', 'MPEG2': 'dvd'}
+CODECS = {'H264': 'libx264', 'H265': 'libx265', 'MPEG4': 'mpeg4', 'AV1': 'libaom-av1',
+          'WEBM': 'libvpx-vp9', 'THEORA': 'libtheora', 'PNG': 'png', 'QTRLE': 'qtrle',
+          'FFV1': 'ffv1', 'DNXHD': 'dnxhd', 'HUFFYUV': 'huffyuv', 'MPEG1': 'mpeg1video',
+          'MPEG2': 'mpeg2video', 'FLASH': 'flv'}
+CRF = {'LOSSLESS': 0, 'PERC_LOSSLESS': 17, 'HIGH': 20, 'MEDIUM': 23, 'LOW': 26,
+       'VERYLOW': 29, 'LOWEST': 32}
+PRESETS = {'BEST': 'slower', 'GOOD': 'medium', 'REALTIME': 'superfast'}
+
+
+def blender_command(blender, script, script_args, worker_args, threads=None):
+    cmd = [blender, "--background", "--factory-startup", "--python-exit-code", "1"]
+    if threads:
+        cmd += ["--threads", str(threads)]
+    cmd += ["--python", script, "--python", WORKER, "--", *script_args, *worker_args]
+    return cmd
+
+
+def probe_scene(blender, script, script_args):
+    """Build the scene once and return its frame range and movie settings."""
+    with tempfile.TemporaryDirectory() as tmp:
+        info_path = os.path.join(tmp, "info.json")
+        subprocess.run(blender_command(blender, script, script_args, ["--probe", info_path]),
+                       check=True, stdout=subprocess.DEVNULL)
+        with open(info_path) as fh:
+            return json.load(fh)
+
+
+def scene_frames(info):
+    return list(range(info["frame_start"], info["frame_end"] + 1, info["frame_step"]))
+
+
+def plan_chunks(frames, workers, min_chunk=4, chunks_per_worker=3, step=1):
+    """Split frames into chunks of consecutive (by step) frames.
+
+    Aims for a few chunks per worker so a slow chunk does not leave the other
+    workers idle at the end, without going below min_chunk frames per chunk
+    (each chunk pays Blender startup and scene build).
+    """
+    size = max(min_chunk, math.ceil(len(frames) / (workers * chunks_per_worker)))
+    return [run[i:i + size]
+            for run in contiguous_runs(frames, step)
+            for i in range(0, len(run), size)]
+
+
+def render_chunk(blender, script, script_args, chunk, directory, threads, retries):
+    """Render one chunk, retrying up to `retries` times; raises if it keeps failing."""
+    worker_args = ["--frames", f"{chunk[0]}-{chunk[-1]}", "--output", directory]
+    log_path = os.path.join(directory, f"chunk_{chunk[0]:04d}-{chunk[-1]:04d}.log")
+    for attempt in range(retries + 1):
+        with open(log_path, "a") as log:
+            result = subprocess.run(blender_command(blender, script, script_args, worker_args, threads),
+                                    stdout=log, stderr=subprocess.STDOUT)
+        if result.returncode == 0 and all(is_valid_frame(frame_path(directory, f)) for f in chunk):
+            return chunk
+        print(f"chunk {chunk[0]}-{chunk[-1]} failed (attempt {attempt + 1}), see {log_path}")
+    raise RuntimeError(f"chunk {chunk[0]}-{chunk[-1]} failed after {retries + 1} attempts")
+
+
+def output_path(info, script, path=None):
+    path = path or info["filepath"]
+    if path.startswith("//"):
+        # no .blend file: make '//' relative to the script
+        path = os.path.join(os.path.dirname(os.path.abspath(script)), path[2:])
+    return path
+
+
+def codec_args(settings):
+    """ffmpeg output options for Blender's movie settings."""
+    codec = CODECS.get(settings["codec"], "libx264")
+    args = ["-c:v", codec]
+    if codec in ("libx264", "libx265", "mpeg4", "mpeg1video", "mpeg2video", "libaom-av1", "libvpx-vp9"):
+        args += ["-pix_fmt", "yuv420p", "-g", str(settings["gopsize"])]
+        if settings["use_max_b_frames"]:
+            args += ["-bf", str(settings["max_b_frames"])]
+    crf = CRF.get(settings["constant_rate_factor"])
+    if crf is not None and codec in ("libx264", "libx265", "libaom-av1", "libvpx-vp9"):
+        args += ["-crf", str(crf)]
+    else:
+        args += ["-b:v", f"{settings['video_bitrate']}k"]
+    if codec in ("libx264", "libx265"):
+        args += ["-preset", PRESETS.get(settings["ffmpeg_preset"], "medium")]
+    return args + ["-f", CONTAINERS.get(settings["format"], "mp4")]
+
+
+def encode_command(ffmpeg, frame_files, info, output, concat_path, deliveries=()):
+    """ffmpeg command turning frame_files (one per output frame) into the movie.
+
+    With deliveries (dicts with "crop", "size" and "output", see delivery.py)
+    the frames are the master and each delivery is encoded from it instead.
+    """
+    settings = info["ffmpeg"]
+    fps = fractions.Fraction(info["fps"]) / fractions.Fraction(info["fps_base"]).limit_denominator(10000)
+    with open(concat_path, "w") as fh:
+        fh.write("ffconcat version 1.0\n")
+        for path in frame_files:
+            fh.write(f"file '{path}'\n")
+
+    # -r before the input stamps entry n at exactly n / fps (a rational such as
+    # 30000/1001) instead of summing per-entry float durations, and passthrough
+    # keeps the encoder from dropping or repeating frames to fix up the rounding
+    cmd = [ffmpeg, "-y", "-loglevel", "error", "-r", str(fps), "-f", "concat", "-safe", "0", "-i", concat_path]
+    output_args = ["-frames:v", str(len(frame_files)), "-fps_mode", "passthrough"] + codec_args(settings)
+    if not deliveries:
+        return cmd + output_args + [output]
+
+    # the master frames are decoded once and split into a crop and scale per format
+    cmd += ["-filter_complex", delivery_filter(deliveries)]
+    for i, delivery in enumerate(deliveries):
+        cmd += ["-map", f"[v{i}]"] + output_args + [delivery["output"]]
+    return cmd
+
+
+def encode(ffmpeg, frame_files, info, output, deliveries=()):
+    for path in [output] + [delivery["output"] for delivery in deliveries]:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    concat_path = os.path.join(os.path.dirname(frame_files[0]), "frames.ffconcat")
+    subprocess.run(encode_command(ffmpeg, frame_files, info, output, concat_path, deliveries), check=True)
+
+
+def render_parallel(script, script_args=(), workers=None, blender=None, ffmpeg=None,
+                    retries=2, min_chunk=4, cache_root=None, reuse_static=True, encode_settings=None):
+    """Render script's animation with a pool of Blender workers; returns the movie paths.
+
+    Frames already in the cache are not rendered again; with reuse_static,
+    frames inside a static span re-use the span's first frame. A scene set up
+    for delivery (`--deliver`) gets one movie per format, else one movie.
+    encode_settings (Blender ffmpeg settings by name, e.g.
+    {"constant_rate_factor": 'LOW'}) override the script's for the encode
+    only; they are not part of the frame cache key.
+    """
+    blender = blender or os.environ.get("BLENDER", "blender")
+    ffmpeg = ffmpeg or os.environ.get("FFMPEG", "ffmpeg")
+    cpus = os.cpu_count() or 1
+    workers = workers or max(1, cpus // 4)
+    threads = max(1, cpus // workers)
+    script_args = list(script_args)
+
+    info = probe_scene(blender, script, script_args)
+    info["ffmpeg"].update(encode_settings or {})
+    output = output_path(info, script)
+    deliveries = [dict(delivery, output=output_path(info, script, delivery["filepath"]))
+                  for delivery in info.get("deliveries", [])]
+    frames = scene_frames(info)
+    frames_dir = cache_dir(script, script_args, info["render_key"], cache_root)
+    os.makedirs(frames_dir, exist_ok=True)
+
+    sources = info["frame_sources"] if reuse_static else frames
+    unique = sorted(set(sources))
+    todo = missing_frames(frames_dir, unique)
+    chunks = plan_chunks(todo, workers, min_chunk, step=info["frame_step"])
+    print(f"Rendering {len(todo)} of {len(frames)} frames ({len(frames) - len(unique)} static, "
+          f"{len(unique) - len(todo)} cached) in {len(chunks)} chunks on {workers} workers, "
+          f"frames in {frames_dir}")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(render_chunk, blender, script, script_args, chunk, frames_dir, threads, retries)
+                for chunk in chunks]
+        for job in concurrent.futures.as_completed(jobs):
+            chunk = job.result()
+            print(f"  frames {chunk[0]}-{chunk[-1]} done")
+
+    encode(ffmpeg, [frame_path(frames_dir, source) for source in sources], info, output, deliveries)
+    outputs = [delivery["output"] for delivery in deliveries] or [output]
+    for path in outputs:
+        print(f"Wrote {path}")
+    return outputs
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    script_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, script_args = argv[:split], argv[split + 1:]
+    parser = argparse.ArgumentParser(prog="python -m insta_lib.render_pool",
+                                     description="Render an insta_* script with a pool of headless Blender processes.")
+    parser.add_argument("script", help="scene script, e.g. insta_parallel.py")
+    parser.add_argument("-j", "--workers", type=int, help="Blender processes (default: cores / 4)")
+    parser.add_argument("--retries", type=int, default=2, help="retries per failed chunk")
+    parser.add_argument("--min-chunk", type=int, default=4, help="smallest chunk in frames")
+    parser.add_argument("--blender", help="Blender executable (default: $BLENDER or blender)")
+    parser.add_argument("--ffmpeg", help="ffmpeg executable (default: $FFMPEG or ffmpeg)")
+    parser.add_argument("--cache", help="frame cache root (default: $INSTA_FRAME_CACHE or ~/.cache/insta_frames)")
+    parser.add_argument("--render-all", action="store_true", help="render every frame, even inside static spans")
+    encoding = parser.add_argument_group("encode settings", "override the script's movie settings; cached frames "
+                                                           "are re-used")
+    encoding.add_argument("--codec", choices=sorted(CODECS), help="Blender codec name, e.g. H265")
+    encoding.add_argument("--crf", choices=[*CRF, 'NONE'], dest="constant_rate_factor",
+                          help="Blender quality name, e.g. HIGH (NONE encodes at the script's bitrate)")
+    encoding.add_argument("--preset", choices=sorted(PRESETS), dest="ffmpeg_preset",
+                          help="Blender encoding speed, e.g. BEST")
+    args = parser.parse_args(argv)
+    encode_settings = {name: getattr(args, name) for name in ("codec", "constant_rate_factor", "ffmpeg_preset")
+                       if getattr(args, name) is not None}
+    render_parallel(args.script, script_args, args.workers, args.blender, args.ffmpeg,
+                    args.retries, args.min_chunk, args.cache, not args.render_all, encode_settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# runs inside Blender after an insta_* script, driven by render_pool.py:
+#
+#   blender -b --python insta_parallel.py --python insta_lib/render_worker.py -- --probe info.json
+#   blender -b --python insta_parallel.py --python insta_lib/render_worker.py -- --frames 1-40 --output DIR
+#
+# --probe writes the scene's frame range, movie settings, static-span frame
+# sources and delivery plan (see delivery.py) as JSON; --frames renders that
+# inclusive range (respecting frame_step) as a PNG sequence
+# DIR/frame_####.png instead of the script's FFMPEG output.
+
+import argparse
+import json
+import os
+import sys
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insta_lib.delivery import scene_deliveries
+from insta_lib.static_spans import frame_sources
+
+FFMPEG_SETTINGS = ("format", "codec", "constant_rate_factor", "ffmpeg_preset",
+                   "video_bitrate", "gopsize", "use_max_b_frames", "max_b_frames")
+
+
+def _args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="render_worker")
+    parser.add_argument("--probe")
+    parser.add_argument("--frames")
+    parser.add_argument("--output")
+    # the script itself may take arguments after `--` too
+    return parser.parse_known_args(argv)[0]
+
+
+def render_key(scene):
+    """Settings that change the rendered pixels (keys the frame cache)."""
+    render = scene.render
+    view = scene.view_settings
+    return {
+        "resolution": [render.resolution_x, render.resolution_y, render.resolution_percentage],
+        "engine": render.engine,
+        "film_transparent": render.film_transparent,
+        "cycles_samples": getattr(getattr(scene, "cycles", None), "samples", None),
+        "eevee_samples": scene.eevee.taa_render_samples,
+        "workbench_aa": scene.display.render_aa,
+        "color": [view.view_transform, view.look, view.exposure, view.gamma,
+                  scene.display_settings.display_device],
+    }
+
+
+def probe(scene, path):
+    render = scene.render
+    info = {
+        "render_key": render_key(scene),
+        "frame_start": scene.frame_start,
+        "frame_end": scene.frame_end,
+        "frame_step": scene.frame_step,
+        "fps": render.fps,
+        "fps_base": render.fps_base,
+        "file_format": render.image_settings.file_format,
+        "filepath": render.filepath,
+        "ffmpeg": {name: getattr(render.ffmpeg, name) for name in FFMPEG_SETTINGS},
+        "deliveries": scene_deliveries(scene),
+        "frame_sources": frame_sources(scene, list(range(scene.frame_start, scene.frame_end + 1,
+                                                         scene.frame_step))),
+    }
+    with open(path, "w") as fh:
+        json.dump(info, fh, indent=2)
+
+
+def render_frames(scene, frames, output):
+    start, end = (int(frame) for frame in frames.split("-"))
+    render = scene.render
+    scene.frame_start = start
+    scene.frame_end = end
+    render.image_settings.file_format = 'PNG'
+    render.image_settings.color_mode = 'RGB'
+    render.image_settings.color_depth = '8'
+    render.use_file_extension = True
+    render.use_overwrite = True
+    render.filepath = f"{output}/frame_####"
+    bpy.ops.render.render(animation=True, scene=scene.name)
+
+
+def main():
+    args = _args()
+    scene = bpy.context.scene
+    if args.probe:
+        probe(scene, args.probe)
+    if args.frames:
+        render_frames(scene, args.frames, args.output)
+
+
+main()
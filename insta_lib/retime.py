@@ -0,0 +1,64 @@
+# vectorized animation retiming for the insta_* scripts
+#
+# Keyframe times are rewritten with one NumPy transform per fcurve through
+# foreach_get/foreach_set instead of per-keyframe Python attribute access,
+# and actions shared by several objects are only retimed once. Shared
+# actions played from NLA strips (see shared_actions) are left as they are;
+# their strips are moved and time-scaled instead.
+
+import numpy as np
+
+from .keyframes import action_fcurves
+
+
+def unique_actions(objects):
+    """Actions assigned to objects, each listed once."""
+    actions = {}
+    for obj in objects:
+        anim = obj.animation_data
+        if anim and anim.action:
+            actions.setdefault(anim.action.as_pointer(), anim.action)
+    return list(actions.values())
+
+
+def nla_strips(objects):
+    """NLA strips on the objects' tracks."""
+    return [strip
+            for obj in objects if obj.animation_data
+            for track in obj.animation_data.nla_tracks
+            for strip in track.strips]
+
+
+def _scale_strips(objects, start_frame, speed_factor):
+    for obj in objects:
+        if obj.animation_data is None:
+            continue
+        for track in obj.animation_data.nla_tracks:
+            # move the last strip first when stretching so strips never overlap on the way
+            for strip in sorted(track.strips, key=lambda strip: strip.frame_start, reverse=speed_factor > 1):
+                new_start = start_frame + (strip.frame_start - start_frame) * speed_factor
+                strip.scale *= speed_factor
+                strip.frame_start_ui = new_start
+
+
+def scale_animation_speed(objects, start_frame, speed_factor):
+    """Stretch keyframe timing around start_frame by speed_factor (2 = half speed)."""
+    _scale_strips(objects, start_frame, speed_factor)
+    for action in unique_actions(objects):
+        for fcurve in action_fcurves(action):
+            points = fcurve.keyframe_points
+            if not len(points):
+                continue
+            buf = np.empty(2 * len(points), dtype=np.float64)
+            for prop in ("co", "handle_left", "handle_right"):
+                points.foreach_get(prop, buf)
+                buf[0::2] -= start_frame
+                buf[0::2] *= speed_factor
+                buf[0::2] += start_frame
+                points.foreach_set(prop, buf)
+
+
+def animation_frame_end(objects):
+    """Last keyframe frame over the objects' actions and NLA strips (0 if none are animated)."""
+    return max([action.frame_range[1] for action in unique_actions(objects)]
+               + [strip.frame_end for strip in nla_strips(objects)], default=0)
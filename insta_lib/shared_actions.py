@@ -0,0 +1,113 @@
+# shared NLA actions for the insta_* scripts
+#
+# Many objects in these scenes move along the same curve, only shifted in
+# time (a per-object start frame) and in space (a per-object start
+# position). KeyframeBatch gives each of them its own action. SharedActions
+# takes the same calls but stores every motion relative to its first key:
+# frames relative to the start frame, and location/rotation relative to the
+# start value, written to the delta_* channel while the plain property keeps
+# the start value. Identical relative motions are authored once as a shared
+# action, and each object plays it from an NLA strip placed at its start
+# frame. Actions and fcurves then scale with the number of distinct motion
+# shapes instead of the number of objects.
+#
+#   keys = SharedActions()
+#   keys.add_vector(obj, "location", (10, 40), (start_loc, end_loc))
+#   keys.flush()
+#
+# Every data path of an object gets its own track, so a location shape and
+# a color or highlight shape are shared independently of each other.
+
+import math
+
+import bpy
+
+from .keyframes import _INTERPOLATION, _ensure_fcurve, _write_fcurve
+from .profiling import count
+
+# properties animated as an offset from their start value
+_DELTA_PATHS = {'location': 'delta_location', 'rotation_euler': 'delta_rotation_euler'}
+
+# values closer than this count as the same motion
+_PRECISION = 6
+
+
+class SharedActions:
+    """Collect keyframes like KeyframeBatch, write them as shared actions on NLA strips."""
+
+    def __init__(self):
+        # (owner pointer, data_path) -> (owner, data_path, {index: {frame: (value, interpolation)}})
+        self._channels = {}
+        # motion shape -> action, kept across flushes so later batches reuse actions
+        self._actions = {}
+        self.key_count = 0
+
+    @property
+    def action_count(self):
+        return len(self._actions)
+
+    def add(self, owner, data_path, index, frames, values, interpolation='BEZIER'):
+        """Queue keys for one fcurve (one array index of data_path)."""
+        key = (owner.as_pointer(), data_path)
+        entry = self._channels.get(key)
+        if entry is None:
+            entry = self._channels[key] = (owner, data_path, {})
+        curve = entry[2].setdefault(index, {})
+        interp = _INTERPOLATION[interpolation]
+        for frame, value in zip(frames, values):
+            curve[float(frame)] = (float(value), interp)
+        self.key_count += len(frames)
+
+    def add_vector(self, owner, data_path, frames, vectors, interpolation='BEZIER'):
+        """Queue keys for every component of a vector property (location, color, ...)."""
+        vectors = [tuple(v) for v in vectors]
+        for index in range(len(vectors[0])):
+            self.add(owner, data_path, index, frames, [v[index] for v in vectors], interpolation)
+
+    def _shape(self, owner, data_path, curves):
+        """Relative motion of one property: (strip start, target path, shape key)."""
+        start = math.floor(min(min(keys) for keys in curves.values()))
+        target = _DELTA_PATHS.get(data_path, data_path)
+        channels = []
+        for index in sorted(curves):
+            keys = curves[index]
+            frames = sorted(keys)
+            base = 0.0
+            if target != data_path:
+                # the property keeps its first value, the delta channel moves from zero
+                base = keys[frames[0]][0]
+                getattr(owner, data_path)[index] = base
+            channels.append((index, tuple((round(frame - start, _PRECISION), round(keys[frame][0] - base, _PRECISION),
+                                           keys[frame][1]) for frame in frames)))
+        return start, target, tuple(channels)
+
+    def _new_action(self, owner, target, channels):
+        action = bpy.data.actions.new(f"Shared_{target}_{len(self._actions)}")
+        # fcurves are created through the owner so slotted actions (4.4+) get a slot for it
+        anim = owner.animation_data
+        anim.action = action
+        for index, keys in channels:
+            fcurve = _ensure_fcurve(action, owner, target, index)
+            _write_fcurve(fcurve, {frame: (value, interp) for frame, value, interp in keys})
+            count("keyframes", len(keys))
+        anim.action = None
+        return action
+
+    def flush(self):
+        """Write all queued keys as shared actions on NLA strips and reset the batch."""
+        for owner, data_path, curves in self._channels.values():
+            start, target, channels = self._shape(owner, data_path, curves)
+            anim = owner.animation_data or owner.animation_data_create()
+            shape = (target, channels)
+            action = self._actions.get(shape)
+            if action is None:
+                action = self._actions[shape] = self._new_action(owner, target, channels)
+            slot = action.slots[0] if getattr(action, "slots", None) else None
+
+            track = anim.nla_tracks.new()
+            track.name = data_path
+            strip = track.strips.new(action.name, start, action)
+            if slot is not None:
+                strip.action_slot = slot
+        self._channels.clear()
+        self.key_count = 0
@@ -0,0 +1,195 @@
+# static-span detection for render_pool.py
+#
+# Explainer animations hold still for long stretches. This pass reads every
+# fcurve that can affect a scene and finds the frames whose image cannot
+# differ from the previously rendered frame, so each static span is rendered
+# once and its image reused for the rest of the span.
+#
+# The analysis is analytic and conservative: a Bezier segment is static only
+# when both keys and the handles between them share one value, other
+# interpolations when both keys do (easings scale the key difference);
+# constant interpolation only changes on its keys. Plain NLA strips (see
+# shared_actions) are mapped from action time to scene time. Anything it
+# cannot reason about (drivers, fcurve modifiers, blended or repeated NLA
+# strips, simulations, frame handlers, time-dependent geometry nodes,
+# animated noise seeds) marks the affected frames, or the whole range, as
+# changing.
+
+import bpy
+import numpy as np
+
+from .keyframes import action_fcurves
+
+# modifiers whose result depends on the frame on their own
+_TIME_MODIFIERS = {'CLOTH', 'COLLISION', 'DYNAMIC_PAINT', 'EXPLODE', 'FLUID', 'OCEAN',
+                   'PARTICLE_SYSTEM', 'SOFT_BODY', 'WAVE', 'BUILD'}
+_TIME_NODES = {'GeometryNodeInputSceneTime', 'GeometryNodeSimulationInput',
+               'GeometryNodeSimulationOutput', 'GeometryNodeBake'}
+
+# enum value of Keyframe.interpolation
+_BEZIER = 2
+_CONSTANT = 0
+
+
+class _Unanalyzable(Exception):
+    pass
+
+
+def _animated_ids(scene):
+    """Every datablock whose animation can reach the scene's render."""
+    ids = [scene, *scene.objects]
+    if scene.world:
+        ids.append(scene.world)
+    for collection in (bpy.data.meshes, bpy.data.curves, bpy.data.cameras, bpy.data.lights,
+                       bpy.data.materials, bpy.data.node_groups, bpy.data.worlds,
+                       bpy.data.shape_keys, bpy.data.textures):
+        ids.extend(collection)
+    trees = [getattr(id_data, "node_tree", None) for id_data in ids]
+    ids.extend(tree for tree in trees if tree is not None)
+    return [id_data for id_data in ids if id_data.animation_data is not None]
+
+
+def _check_time_dependence(scene):
+    if bpy.app.handlers.frame_change_pre or bpy.app.handlers.frame_change_post:
+        raise _Unanalyzable("frame change handlers")
+    cycles = getattr(scene, "cycles", None)
+    if scene.render.engine == 'CYCLES' and cycles is not None and cycles.use_animated_seed:
+        raise _Unanalyzable("animated Cycles seed")
+    for obj in scene.objects:
+        for modifier in obj.modifiers:
+            if modifier.type in _TIME_MODIFIERS:
+                raise _Unanalyzable(f"{modifier.type} modifier on {obj.name}")
+    for tree in bpy.data.node_groups:
+        if any(node.bl_idname in _TIME_NODES for node in tree.nodes):
+            raise _Unanalyzable(f"time-dependent node group {tree.name}")
+
+
+def _fcurve_changes(fcurve, spans, points):
+    """Append the open spans (lo, hi) and jump frames where fcurve changes value."""
+    if fcurve.mute:
+        return
+    if fcurve.modifiers:
+        raise _Unanalyzable(f"fcurve modifiers on {fcurve.data_path}")
+    keys = fcurve.keyframe_points
+    count = len(keys)
+    if count == 0:
+        return
+    co = np.empty(2 * count)
+    left = np.empty(2 * count)
+    right = np.empty(2 * count)
+    interp = np.empty(count, dtype=np.int32)
+    keys.foreach_get("co", co)
+    keys.foreach_get("handle_left", left)
+    keys.foreach_get("handle_right", right)
+    keys.foreach_get("interpolation", interp)
+    x, y = co[0::2], co[1::2]
+
+    if fcurve.extrapolation == 'LINEAR' and count > 1:
+        if y[0] != left[1] or y[-1] != right[-1] or y[0] != y[1] or y[-1] != y[-2]:
+            spans.append((-np.inf, np.inf))
+            return
+
+    ends_equal = y[:-1] == y[1:]
+    flat = ends_equal & ((interp[:-1] != _BEZIER) | ((right[1::2][:-1] == y[:-1]) & (left[1::2][1:] == y[1:])))
+    constant = interp[:-1] == _CONSTANT
+    moving = ~flat & ~constant
+    spans.extend(zip(x[:-1][moving].tolist(), x[1:][moving].tolist()))
+    points.extend(x[1:][~ends_equal & constant].tolist())
+
+
+def _strip_changes(strip, spans, points, first_in_track):
+    """Append the changes of an NLA strip's action, in scene frames."""
+    if strip.mute:
+        return
+    if (strip.type != 'CLIP' or strip.use_animated_influence or strip.use_animated_time
+            or strip.use_reverse or strip.repeat != 1 or strip.blend_in or strip.blend_out
+            or strip.blend_type != 'REPLACE'):
+        raise _Unanalyzable(f"NLA strip {strip.name}")
+    local_spans = []
+    local_points = []
+    for fcurve in action_fcurves(strip.action):
+        _fcurve_changes(fcurve, local_spans, local_points)
+
+    # the strip plays [action_frame_start, action_frame_end] from frame_start, holding the ends
+    lo_action, hi_action = strip.action_frame_start, strip.action_frame_end
+
+    def to_scene(frame):
+        return strip.frame_start + (frame - lo_action) * strip.scale
+
+    for lo, hi in local_spans:
+        lo, hi = max(lo, lo_action), min(hi, hi_action)
+        if lo < hi:
+            spans.append((to_scene(lo), to_scene(hi)))
+    points.extend(to_scene(point) for point in local_points if lo_action < point <= hi_action)
+    # only the first strip of a track holds its first value before it starts
+    if not first_in_track or strip.extrapolation != 'HOLD':
+        points.append(strip.frame_start)
+    if strip.extrapolation == 'NOTHING':
+        points.append(float(np.nextafter(strip.frame_end, np.inf)))
+
+
+def frame_sources(scene, frames):
+    """For each frame in frames, the earlier frame whose render it can reuse.
+
+    frames are the frames that will be rendered, in order. A frame maps to
+    itself when it has to be rendered. Falls back to rendering every frame
+    when the scene has anything the analysis cannot see through.
+    """
+    spans = []
+    points = []
+    try:
+        _check_time_dependence(scene)
+        for id_data in _animated_ids(scene):
+            anim = id_data.animation_data
+            if anim.drivers:
+                raise _Unanalyzable(f"drivers on {id_data.name}")
+            for track in anim.nla_tracks:
+                if track.mute:
+                    continue
+                strips = sorted(track.strips, key=lambda strip: strip.frame_start)
+                for i, strip in enumerate(strips):
+                    _strip_changes(strip, spans, points, i == 0)
+            if anim.action:
+                for fcurve in action_fcurves(anim.action):
+                    _fcurve_changes(fcurve, spans, points)
+        for marker in scene.timeline_markers:
+            if marker.camera is not None:
+                points.append(marker.frame)
+    except _Unanalyzable as reason:
+        print(f"Static spans disabled: {reason}")
+        return list(frames)
+
+    frames_arr = np.asarray(frames, dtype=np.float64)
+    # changed[k]: the image at frames[k] may differ from the one at frames[k - 1]
+    changed = np.zeros(len(frames), dtype=np.int32)
+    changed[0] = 1
+    prev, cur = frames_arr[:-1], frames_arr[1:]
+    if spans:
+        lo, hi = np.asarray(spans).T
+        # pair (prev, cur] overlaps the open span (lo, hi) when cur > lo and prev < hi
+        first = np.searchsorted(cur, lo, side='right')
+        last = np.searchsorted(prev, hi, side='left')
+        delta = np.zeros(len(frames) + 1, dtype=np.int32)
+        valid = first < last
+        np.add.at(delta, first[valid] + 1, 1)
+        np.add.at(delta, last[valid] + 1, -1)
+        changed += np.cumsum(delta)[:-1]
+    if points:
+        # pair (prev, cur] contains the jump frame
+        points = np.asarray(points, dtype=np.float64)
+        index = np.searchsorted(cur, points, side='left')
+        inside = index < len(cur)
+        index, points = index[inside], points[inside]
+        index = index[prev[index] < points]
+        np.add.at(changed, index + 1, 1)
+    if scene.render.use_motion_blur:
+        # the shutter reaches into the neighbouring frames
+        blurred = changed.copy()
+        blurred[1:] += changed[:-1]
+        blurred[:-1] += changed[1:]
+        changed = blurred
+
+    sources = []
+    for frame, is_changed in zip(frames, changed.tolist()):
+        sources.append(frame if is_changed or not sources else sources[-1])
+    return sources
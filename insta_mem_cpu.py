@@ -1,120 +1,167 @@
 # script that shows how data travels from DRAM to CPU core in blender animation
 
+import os
+import sys
+
 import bpy
 import mathutils
 
-# Clear all existing objects
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
-
-# Create black material
-def create_black_material(name="BlackMat"):
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = False
-    mat.diffuse_color = (0, 0, 0, 1)
-    return mat
-
-black_mat = create_black_material()
-
-# Create Memory block (cube)
-bpy.ops.mesh.primitive_cube_add(size=2, location=(-5, 0, 0))
-memory = bpy.context.object
-memory.name = "Memory"
-memory.data.materials.append(black_mat)
-
-# Create CPU core (as a black cylinder)
-bpy.ops.mesh.primitive_cylinder_add(radius=1, depth=2, location=(5, 0, 0))
-cpu_core = bpy.context.object
-cpu_core.name = "CPU_Core"
-cpu_core.data.materials.append(black_mat)
-
-# Create Data packet (blue sphere)
-bpy.ops.mesh.primitive_uv_sphere_add(radius=0.5, location=(-5, 0, 1.5))
-packet = bpy.context.object
-packet.name = "Data_Packet"
+# Make the shared insta_lib helpers importable when run via `blender --python`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-mat_packet = bpy.data.materials.new(name="PacketMat")
-mat_packet.diffuse_color = (0, 0, 1, 1)
-packet.data.materials.append(mat_packet)
+from insta_lib.assets import AssetLibrary
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.labels import LabelBatch
+from insta_lib.lod import apply_lod
+from insta_lib.materials import get_material, object_color_material
+from insta_lib.packet_pool import key_pool, plan_pool
+from insta_lib.presets import apply_render_presets, param_overrides
+from insta_lib.primitives import link_objects, new_object, primitive_mesh, set_object_material
+from insta_lib.profiling import phase, profile_report
+from insta_lib.reset import reset_scene
 
 # Add Labels 
-def create_label(text, location, color=(0, 0, 1, 1)):
-    bpy.ops.object.text_add(location=location)
-    txt_obj = bpy.context.object
-    txt_obj.data.body = text
-    txt_obj.data.align_x = 'CENTER'
-    txt_obj.data.size = 0.7
-    txt_obj.data.extrude = 0.05
-    txt_obj.rotation_euler = (1.5708, 0, 0.7854)
-    mat = bpy.data.materials.new(name=f"Mat_{text}")
-    mat.diffuse_color = color
-    txt_obj.data.materials.append(mat)
-    return txt_obj
-
-create_label("Memory", (-5, 0, 2.5))
-create_label("CPU Core", (5, 0, 2.5))
-
-# Animate Data Packet 
-start_frame = 1
-end_frame = 100
-
-packet.location = mathutils.Vector((-5, 0, 1.5))
-packet.keyframe_insert(data_path="location", frame=start_frame)
-
-packet.location = mathutils.Vector((5, 0, 1.5))
-packet.keyframe_insert(data_path="location", frame=end_frame - 20)
-
-# Processing pulse effect
-process_start = end_frame - 20
-process_end = end_frame
-
-mat_packet.diffuse_color = (0, 0, 1, 1)
-mat_packet.keyframe_insert(data_path="diffuse_color", frame=process_start)
-
-mat_packet.diffuse_color = (1, 0, 0, 1)
-mat_packet.keyframe_insert(data_path="diffuse_color", frame=process_start + 10)
-
-mat_packet.diffuse_color = (0, 0, 1, 1)
-mat_packet.keyframe_insert(data_path="diffuse_color", frame=process_end)
-
-# Camera 
-cam_data = bpy.data.cameras.new("Camera")
-camera = bpy.data.objects.new("Camera", cam_data)
-bpy.context.collection.objects.link(camera)
-
-camera.location = (10, -10, 6)
-camera.rotation_euler = mathutils.Euler((1.1, 0, 0.8), 'XYZ')
-bpy.context.scene.camera = camera
-
-# Lighting
-bpy.ops.object.light_add(type='SUN', location=(0, -10, 10))
-sun = bpy.context.object
-sun.data.energy = 3
-
-bpy.ops.object.light_add(type='AREA', location=(0, 10, 5))
-area = bpy.context.object
-area.data.energy = 1000
-area.data.size = 10
-
-# Background color (light blue) 
-bpy.context.scene.world.use_nodes = False
-bpy.context.scene.world.color = (0.7, 0.85, 1.0)
-
-# Instagram render resolution 
-bpy.context.scene.render.resolution_x = 1080
-bpy.context.scene.render.resolution_y = 1080
-bpy.context.scene.render.resolution_percentage = 100
-bpy.context.scene.frame_end = end_frame
-
-# Set output path and format for MP4 video 
-output_path = "//data_packet_animation.mp4"  # Use '//' for relative to .blend file
-scene = bpy.context.scene
-
-scene.render.image_settings.file_format = 'FFMPEG'
-scene.render.ffmpeg.format = 'MPEG4'
-scene.render.ffmpeg.codec = 'H264'
-scene.render.ffmpeg.constant_rate_factor = 'HIGH'  # Or use 'MEDIUM', 'LOSSLESS'
-scene.render.ffmpeg.ffmpeg_preset = 'GOOD'  # Encoding speed
-scene.render.filepath = output_path
-
-print("🎬 Export settings applied. To render to MP4, go to Render > Render Animation or press Ctrl+F12.")
+def create_label(labels, text, location, color=(0, 0, 1, 1)):
+    labels.add(text, location, rotation=(1.5708, 0, 0.7854), color=color,
+               size=0.7, extrude=0.05, align_x='CENTER')
+
+def add_light(scene, name, light_type, location, energy):
+    light = bpy.data.objects.new(name, bpy.data.lights.new(name, type=light_type))
+    light.location = location
+    light.data.energy = energy
+    scene.collection.objects.link(light)
+    return light
+
+def build(scene=None, start_frame=1, end_frame=100, packet_count=1, packet_interval=20, lod=False):
+    """Build the memory-to-core animation into scene (the current scene by default).
+
+    packet_count packets leave memory every packet_interval frames, each taking
+    end_frame - start_frame frames for the trip and the processing pulse. They
+    are drawn from a pool sized to the packets in flight at once. lod puts
+    the packets and the core on meshes tessellated for their size on screen
+    (off by default: reduced meshes are smooth-shaded, so the frames change
+    slightly).
+    """
+    assets = AssetLibrary()
+    if scene is None:
+        scene = bpy.context.scene
+
+    # Clear all existing objects
+    with phase("clear"):
+        reset_scene(scene)
+
+    # Memory, core and packet meshes, the black material and the baked labels of earlier builds
+    assets.load()
+
+    with phase("objects"):
+        # Shared black material
+        black_mat = get_material((0, 0, 0, 1))
+
+        # Create Memory block (cube)
+        memory = new_object("Memory", primitive_mesh('CUBE', size=2), location=(-5, 0, 0))
+        set_object_material(memory, black_mat)
+
+        # Create CPU core (as a black cylinder)
+        cpu_core = new_object("CPU_Core", primitive_mesh('CYLINDER', radius=1, depth=2), location=(5, 0, 0))
+        set_object_material(cpu_core, black_mat)
+
+        # Packet stream: travel to the core, then pulse while being processed
+        memory_pos = mathutils.Vector((-5, 0, 1.5))
+        core_pos = mathutils.Vector((5, 0, 1.5))
+        travel = end_frame - 20 - start_frame
+        events = [(start_frame + i * packet_interval, ((0, memory_pos), (travel, core_pos)), end_frame - start_frame)
+                  for i in range(packet_count)]
+        slot_count, trips = plan_pool(events)
+
+        # Create Data packets (blue spheres)
+        packets = []
+        for slot in range(slot_count):
+            packet = new_object("Data_Packet" if slot == 0 else f"Data_Packet_{slot}",
+                                primitive_mesh('UV_SPHERE', radius=0.5), location=memory_pos)
+
+            # Packet color lives on the object so the material can stay shared
+            packet.color = (0, 0, 1, 1)
+            set_object_material(packet, object_color_material())
+            packets.append(packet)
+
+        link_objects([memory, cpu_core] + packets, scene.collection)
+
+        labels = LabelBatch()
+        create_label(labels, "Memory", (-5, 0, 2.5))
+        create_label(labels, "CPU Core", (5, 0, 2.5))
+        labels.flush(scene.collection)
+
+    # Animate Data Packet 
+    with phase("keyframes"):
+        keys = KeyframeBatch()
+        key_pool(keys, packets, trips)
+
+        # Processing pulse effect
+        for trip in trips:
+            process_start = trip.spawn + travel
+            process_end = trip.end
+
+            keys.add_vector(packets[trip.slot], "color", (process_start, process_start + 10, process_end),
+                            ((0, 0, 1, 1), (1, 0, 0, 1), (0, 0, 1, 1)))
+        keys.flush()
+
+    # Camera 
+    with phase("camera"):
+        cam_data = bpy.data.cameras.new("Camera")
+        camera = bpy.data.objects.new("Camera", cam_data)
+        scene.collection.objects.link(camera)
+
+        camera.location = (10, -10, 6)
+        camera.rotation_euler = mathutils.Euler((1.1, 0, 0.8), 'XYZ')
+        scene.camera = camera
+
+    # Lighting
+    with phase("lights_world"):
+        add_light(scene, "Sun", 'SUN', (0, -10, 10), energy=3)
+
+        area = add_light(scene, "Area", 'AREA', (0, 10, 5), energy=1000)
+        area.data.size = 10
+
+        # Background color (light blue) 
+        if scene.world is None:
+            scene.world = bpy.data.worlds.new("World")
+        scene.world.use_nodes = False
+        scene.world.color = (0.7, 0.85, 1.0)
+
+    with phase("render_setup"):
+        # Instagram render resolution 
+        scene.render.resolution_x = 1080
+        scene.render.resolution_y = 1080
+        scene.render.resolution_percentage = 100
+        scene.frame_end = max(trip.end for trip in trips)
+
+        # Set output path and format for MP4 video 
+        output_path = "//data_packet_animation.mp4"  # Use '//' for relative to .blend file
+
+        scene.render.image_settings.file_format = 'FFMPEG'
+        scene.render.ffmpeg.format = 'MPEG4'
+        scene.render.ffmpeg.codec = 'H264'
+        scene.render.ffmpeg.constant_rate_factor = 'HIGH'  # Or use 'MEDIUM', 'LOSSLESS'
+        scene.render.ffmpeg.ffmpeg_preset = 'GOOD'  # Encoding speed
+        scene.render.filepath = output_path
+
+    # Tessellate the packets and the core for the camera and resolution set above
+    if lod:
+        apply_lod(scene)
+
+    # Add the meshes and labels this build had to create to the library
+    assets.save()
+
+    return scene
+
+if __name__ == "__main__":
+    # A single packet unless a stream is asked for (--set packet_count=500 --set packet_interval=4)
+    build(**param_overrides())
+
+    # Render presets after `--` go on top of the HIGH quality H264 settings above
+    apply_render_presets()
+
+    # With INSTA_PROFILE=1, the cost of the packet pool against the packet count
+    profile_report()
+
+    print("🎬 Export settings applied. To render to MP4, go to Render > Render Animation or press Ctrl+F12.")
@@ -1,147 +1,190 @@
 # script that shows parallel processing in blender animation
 
+import os
+import sys
+
 import bpy
 import math
-
-# Clear scene
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete(use_global=False)
-
-# Set render settings for IG Reels (portrait video)
-scene = bpy.context.scene
-scene.render.resolution_x = 1080
-scene.render.resolution_y = 1920
-scene.render.fps = 30
-scene.frame_start = 1
-scene.frame_end = 200
-scene.render.image_settings.file_format = 'FFMPEG'
-scene.render.ffmpeg.format = 'MPEG4'
-scene.render.ffmpeg.codec = 'H264'
-scene.render.ffmpeg.constant_rate_factor = 'HIGH'
-scene.render.ffmpeg.ffmpeg_preset = 'GOOD'
-scene.render.filepath = "//ig_reel_output.mp4"
+from mathutils import Vector
+
+# Make the shared insta_lib helpers importable when run via `blender --python`
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from insta_lib.assets import AssetLibrary
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.labels import LabelBatch
+from insta_lib.lod import apply_lod, remove_lod
+from insta_lib.presets import apply_render_presets, param_overrides
+from insta_lib.primitives import primitive_mesh
+from insta_lib.profiling import phase, profile_report
+from insta_lib.reconcile import Reconciler
+from insta_lib.reset import reset_scene
+from insta_lib.retime import animation_frame_end, scale_animation_speed
+from insta_lib.shared_actions import SharedActions
 
 # Helper functions
-def create_cylinder(name, location):
-    bpy.ops.mesh.primitive_cylinder_add(radius=0.3, depth=1, location=location)
-    obj = bpy.context.active_object
-    obj.name = name
-    return obj
-
-def create_sphere(name, location):
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=0.2, location=location)
-    obj = bpy.context.active_object
-    obj.name = name
-    return obj
-
-def create_cube(name, location):
-    bpy.ops.mesh.primitive_cube_add(size=0.3, location=location)
-    obj = bpy.context.active_object
-    obj.name = name
-    return obj
-
-def create_text(name, text, location, size=0.5):
-    bpy.ops.object.text_add(location=location)
-    txt = bpy.context.active_object
-    txt.name = name
-    txt.data.body = text
-    txt.scale = (size, size, size)
-    return txt
-
-def animate_location(obj, frame_start, frame_end, start_loc, end_loc):
-    obj.location = start_loc
-    obj.keyframe_insert(data_path="location", frame=frame_start)
-    obj.location = end_loc
-    obj.keyframe_insert(data_path="location", frame=frame_end)
-
-def scale_animation_speed(obj, start_frame, speed_factor):
-    if not obj.animation_data or not obj.animation_data.action:
-        return
-    for fcurve in obj.animation_data.action.fcurves:
-        for keyframe in fcurve.keyframe_points:
-            old_frame = keyframe.co.x
-            # Scale frame timing
-            keyframe.co.x = (old_frame - start_frame) * speed_factor + start_frame
-            keyframe.handle_left.x = (keyframe.handle_left.x - start_frame) * speed_factor + start_frame
-            keyframe.handle_right.x = (keyframe.handle_right.x - start_frame) * speed_factor + start_frame
+# Primitive objects share one mesh per shape and are declared through the build's Reconciler
+def create_cylinder(rec, name, location):
+    return rec.object(name, primitive_mesh('CYLINDER', radius=0.3, depth=1), location=location)
+
+def create_sphere(rec, name, location):
+    return rec.object(name, primitive_mesh('UV_SPHERE', radius=0.2), location=location)
+
+def create_cube(rec, name, location):
+    return rec.object(name, primitive_mesh('CUBE', size=0.3), location=location)
+
+def create_text(labels, text, location, size=0.5):
+    labels.add(text, location, size=size)
+
+def animate_location(keys, obj, frame_start, frame_end, start_loc, end_loc):
+    keys.add_vector(obj, "location", (frame_start, frame_end), (start_loc, end_loc))
 
 # Create vertical layout (bottom to top)
 core_y = 6
 thread_y = 3
 task_y = 0
 
-# Create Cores (top)
-cores = []
-for i in range(4):
-    x = i * 1.5 - 2.25
-    core = create_cylinder(f"Core_{i+1}", location=(x, core_y, 0))
-    create_text(f"CoreLabel_{i+1}", f"Core {i+1}", location=(x - 0.4, core_y + 0.7, 0), size=0.4)
-    cores.append(core)
-
-# Create Threads (middle)
-threads = []
-for i in range(8):
-    x = (i % 4) * 1.5 - 2.25
-    y = thread_y - (i // 4) * 1.2
-    thread = create_sphere(f"Thread_{i+1}", location=(x, y, 0))
-    create_text(f"ThreadLabel_{i+1}", f"Thread {i+1}", location=(x - 0.3, y + 0.5, 0.4), size=0.3)
-    threads.append(thread)
-
-# Create Tasks (bottom)
-tasks = []
-for i in range(10):
-    x = (i % 5) * 1.2 - 2.4
-    y = task_y - (i // 5) * 1.2
-    task = create_cube(f"Task_{i+1}", location=(x, y, 0))
-    create_text(f"TaskLabel_{i+1}", f"Task {i+1}", location=(x - 0.4, y + 0.4, 0), size=0.3)
-    tasks.append(task)
-
-# Animate threads (move up toward cores)
-thread_gap = 10
-for i, thread in enumerate(threads):
-    start_frame = 1 + i * thread_gap
-    end_frame = start_frame + 40
-    start_loc = thread.location.copy()
-    end_loc = start_loc.copy()
-    end_loc.y = core_y - 1.2
-    animate_location(thread, start_frame, end_frame, start_loc, end_loc)
-
-# Animate tasks (move up to cores)
-task_gap = 8
-for i, task in enumerate(tasks):
-    start_frame = 1 + i * task_gap
-    end_frame = start_frame + 30
-    core_target = cores[i % len(cores)].location.copy()
-    core_target.z += 0.5  # hover above core
-    animate_location(task, start_frame, end_frame, task.location.copy(), core_target)
-
-# Add vertical camera view
-bpy.ops.object.camera_add(location=(0, 1, 12), rotation=(math.radians(90), 0, 0))
-cam = bpy.context.active_object
-scene.camera = cam
-
-# Add light
-bpy.ops.object.light_add(type='SUN', location=(0, 0, 10))
-light = bpy.context.active_object
-light.data.energy = 4
-
-# --- SPEED CONTROL ---
-speed_factor = 1  # Change this to 1, 2, or 4 for normal, half, or quarter speed
-
-start_frame = scene.frame_start
-
-# Apply speed scaling to all animated objects
-for obj in threads + tasks:
-    scale_animation_speed(obj, start_frame, speed_factor)
-
-# Adjust scene frame end to accommodate slower animation durations
-# Find max frame of all keyframes after scaling
-max_frame = 0
-for obj in threads + tasks:
-    if obj.animation_data and obj.animation_data.action:
-        for fcurve in obj.animation_data.action.fcurves:
-            for kp in fcurve.keyframe_points:
-                if kp.co.x > max_frame:
-                    max_frame = kp.co.x
-
-scene.frame_end = int(max_frame) + 10  # add a bit of buffer
+def build(scene=None, core_count=4, thread_count=8, task_count=10, speed_factor=1, shared_actions=False,
+          reconcile=False, lod=False):
+    """Build the cores/threads/tasks animation into scene (the current scene by default).
+
+    speed_factor 1, 2 or 4 plays the animation at normal, half or quarter speed.
+    shared_actions plays identical moves (e.g. a row of threads) from one shared
+    relative action on NLA strips.
+    reconcile updates a previous build of the scene in place instead of
+    rebuilding it: only changed objects and keys are written. lod puts the
+    cores and threads on meshes tessellated for their size on screen (off by
+    default: reduced meshes are smooth-shaded, so the frames change slightly).
+    """
+    assets = AssetLibrary()
+    if scene is None:
+        scene = bpy.context.scene
+
+    # Clear scene (or keep what a previous build made, to reconcile against)
+    with phase("clear"):
+        if not reconcile:
+            reset_scene(scene)
+        rec = Reconciler(scene, "insta_parallel")
+
+    # Thread, task and result meshes and the baked labels of earlier builds
+    assets.load()
+
+    # Set render settings for IG Reels (portrait video)
+    with phase("render_setup"):
+        scene.render.resolution_x = 1080
+        scene.render.resolution_y = 1920
+        scene.render.fps = 30
+        scene.frame_start = 1
+        scene.frame_end = 200
+        scene.render.image_settings.file_format = 'FFMPEG'
+        scene.render.ffmpeg.format = 'MPEG4'
+        scene.render.ffmpeg.codec = 'H264'
+        scene.render.ffmpeg.constant_rate_factor = 'HIGH'
+        scene.render.ffmpeg.ffmpeg_preset = 'GOOD'
+        scene.render.filepath = "//ig_reel_output.mp4"
+
+    with phase("objects"):
+        row_offset = (core_count - 1) * 0.75
+        labels = LabelBatch()
+
+        # Create Cores (top)
+        cores = []
+        for i in range(core_count):
+            x = i * 1.5 - row_offset
+            core = create_cylinder(rec, f"Core_{i+1}", location=(x, core_y, 0))
+            create_text(labels, f"Core {i+1}", location=(x - 0.4, core_y + 0.7, 0), size=0.4)
+            cores.append(core)
+
+        # Create Threads (middle), one row per core_count threads
+        # (start positions are kept as declared: a reconciled object's location shows the current frame)
+        threads = []
+        thread_starts = []
+        for i in range(thread_count):
+            x = (i % core_count) * 1.5 - row_offset
+            y = thread_y - (i // core_count) * 1.2
+            thread = create_sphere(rec, f"Thread_{i+1}", location=(x, y, 0))
+            create_text(labels, f"Thread {i+1}", location=(x - 0.3, y + 0.5, 0.4), size=0.3)
+            threads.append(thread)
+            thread_starts.append(Vector((x, y, 0)))
+
+        # Create Tasks (bottom)
+        tasks = []
+        task_starts = []
+        for i in range(task_count):
+            x = (i % 5) * 1.2 - 2.4
+            y = task_y - (i // 5) * 1.2
+            task = create_cube(rec, f"Task_{i+1}", location=(x, y, 0))
+            create_text(labels, f"Task {i+1}", location=(x - 0.4, y + 0.4, 0), size=0.3)
+            tasks.append(task)
+            task_starts.append(Vector((x, y, 0)))
+        labels.flush(scene.collection, reconciler=rec)
+
+    with phase("keyframes"):
+        # Animate threads (move up toward cores)
+        # keys are written at normal speed and retimed below, so the speed is part of what they depend on
+        keys = rec.keys(SharedActions() if shared_actions else KeyframeBatch(), salt=speed_factor)
+        thread_gap = 10
+        for i, (thread, start_loc) in enumerate(zip(threads, thread_starts)):
+            start_frame = 1 + i * thread_gap
+            end_frame = start_frame + 40
+            end_loc = start_loc.copy()
+            end_loc.y = core_y - 1.2
+            animate_location(keys, thread, start_frame, end_frame, start_loc, end_loc)
+
+        # Animate tasks (move up to cores)
+        task_gap = 8
+        for i, (task, task_start) in enumerate(zip(tasks, task_starts)):
+            start_frame = 1 + i * task_gap
+            end_frame = start_frame + 30
+            core_target = cores[i % len(cores)].location.copy()
+            core_target.z += 0.5  # hover above core
+            animate_location(keys, task, start_frame, end_frame, task_start, core_target)
+        rewritten = keys.flush()
+
+    with phase("camera"):
+        # Add vertical camera view
+        cam = rec.object("Camera", lambda: bpy.data.cameras.new("Camera"),
+                         location=(0, 1, 12), rotation=(math.radians(90), 0, 0))
+        if scene.camera != cam:  # reassigning rebuilds the depsgraph relations
+            scene.camera = cam
+
+    with phase("lights_world"):
+        # Add light
+        rec.object("Sun", lambda: bpy.data.lights.new("Sun", type='SUN'), location=(0, 0, 10),
+                   data_settings={"energy": 4})
+    rec.finish()
+
+    # --- SPEED CONTROL ---
+    with phase("keyframes"):
+        start_frame = scene.frame_start
+
+        # Apply speed scaling to the objects that got new keys (reconciled ones are already scaled)
+        scale_animation_speed(rewritten, start_frame, speed_factor)
+
+        # Adjust scene frame end to accommodate slower animation durations
+        # Find max keyframe frame after scaling from the action frame ranges
+        max_frame = animation_frame_end(threads + tasks)
+
+        scene.frame_end = int(max_frame) + 10  # add a bit of buffer
+
+    # Tessellate cylinders and spheres for the camera over the final frame range
+    if lod:
+        apply_lod(scene)
+    elif reconcile:
+        # objects an earlier lod=True build left unchanged are still on its LOD meshes
+        remove_lod(scene)
+
+    # Add the labels baked for new thread and task counts to the library
+    assets.save()
+
+    return scene
+
+if __name__ == "__main__":
+    # 8 threads and 10 tasks on 4 cores by default (--set thread_count=100 --set task_count=100 --set speed_factor=2)
+    build(**param_overrides())
+
+    # Render presets after `--` (--draft, --frame-step 2) for a quick look at the tall Reels frame
+    apply_render_presets()
+
+    # With INSTA_PROFILE=1, where the build of many threads and tasks spends its time (labels, keys)
+    profile_report()
@@ -0,0 +1,50 @@
+# the tests build the insta_* scripts against the recording fake bpy in fake_bpy/
+#
+#   python -m pytest tests
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(TESTS)
+
+# the fake wins over a pip-installed bpy (and a Blender session's modules)
+for _name in ("bpy", "bmesh", "mathutils"):
+    sys.modules.pop(_name, None)
+sys.path[:0] = [os.path.join(TESTS, "fake_bpy"), REPO]
+# profiling hooks itself in at import when this is set
+os.environ.pop("INSTA_PROFILE", None)
+# builds read and write no asset library unless a test points this at one
+os.environ["INSTA_ASSET_CACHE"] = "0"
+
+import bpy  # noqa: E402
+
+from insta_lib.batch import load_builder  # noqa: E402
+
+
+@pytest.fixture
+def fake_bpy():
+    """The fake bpy, reset to the startup file with an empty recorder."""
+    bpy.reset()
+    yield bpy
+    bpy.reset()
+
+
+@pytest.fixture
+def build(fake_bpy):
+    """build(script, **params): build a repo script into the current scene; returns the recorder.
+
+    The recorder is reset first, so it holds what this build asked for; the
+    script's printed output is dropped.
+    """
+    def build(script, **params):
+        builder = load_builder(os.path.join(REPO, script))
+        fake_bpy.recorder.reset()
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder.build(fake_bpy.context.scene, **params)
+        return fake_bpy.recorder
+    return build
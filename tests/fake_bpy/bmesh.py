@@ -0,0 +1,83 @@
+# plain-Python stand-in for Blender's bmesh (see bpy.py in this folder)
+#
+# Only what primitives.py builds with: new(), the create_* ops with the
+# vertex and face layout of the real ones, a UV layer stub and to_mesh().
+
+import math
+import types
+
+
+class _Layers:
+    def __init__(self):
+        self._names = []
+
+    def new(self, name=""):
+        self._names.append(name)
+        return name
+
+
+class BMesh:
+    def __init__(self):
+        self.verts = []  # [(x, y, z)]
+        self.faces = []  # [(vertex index, ...)]
+        self.loops = types.SimpleNamespace(layers=types.SimpleNamespace(uv=_Layers()))
+
+    def _add(self, verts, faces):
+        offset = len(self.verts)
+        self.verts.extend(tuple(float(v) for v in vert) for vert in verts)
+        self.faces.extend(tuple(offset + i for i in face) for face in faces)
+
+    def to_mesh(self, mesh):
+        mesh._set_geometry(self.verts, self.faces)
+
+    def free(self):
+        self.verts = self.faces = None
+
+
+def new():
+    return BMesh()
+
+
+def _ring(segments, radius, z):
+    return [(radius * math.cos(2 * math.pi * i / segments), radius * math.sin(2 * math.pi * i / segments), z)
+            for i in range(segments)]
+
+
+def create_cube(bm, size=2.0, matrix=None, calc_uvs=False):
+    half = size / 2
+    verts = [(x, y, z) for x in (-half, half) for y in (-half, half) for z in (-half, half)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    bm._add(verts, faces)
+    return {"verts": verts}
+
+
+def create_uvsphere(bm, u_segments=32, v_segments=16, radius=1.0, matrix=None, calc_uvs=False):
+    verts = [(0.0, 0.0, radius)]
+    for ring in range(1, v_segments):
+        angle = math.pi * ring / v_segments
+        verts += _ring(u_segments, radius * math.sin(angle), radius * math.cos(angle))
+    verts.append((0.0, 0.0, -radius))
+    bottom = len(verts) - 1
+
+    def at(ring, i):
+        return 1 + ring * u_segments + i % u_segments
+
+    faces = [(0, at(0, i), at(0, i + 1)) for i in range(u_segments)]
+    for ring in range(v_segments - 2):
+        faces += [(at(ring, i), at(ring + 1, i), at(ring + 1, i + 1), at(ring, i + 1)) for i in range(u_segments)]
+    faces += [(at(v_segments - 2, i), bottom, at(v_segments - 2, i + 1)) for i in range(u_segments)]
+    bm._add(verts, faces)
+    return {"verts": verts}
+
+
+def create_cone(bm, cap_ends=True, cap_tris=False, segments=32, radius1=1.0, radius2=1.0, depth=2.0,
+                matrix=None, calc_uvs=False):
+    verts = _ring(segments, radius1, -depth / 2) + _ring(segments, radius2, depth / 2)
+    faces = [(i, (i + 1) % segments, segments + (i + 1) % segments, segments + i) for i in range(segments)]
+    if cap_ends:
+        faces += [tuple(reversed(range(segments))), tuple(range(segments, 2 * segments))]
+    bm._add(verts, faces)
+    return {"verts": verts}
+
+
+ops = types.SimpleNamespace(create_cube=create_cube, create_uvsphere=create_uvsphere, create_cone=create_cone)
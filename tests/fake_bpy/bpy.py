@@ -0,0 +1,1822 @@
+# recording stand-in for Blender's bpy, for building the insta_* scripts under plain CPython
+#
+# tests/conftest.py puts this folder (bpy, bmesh, mathutils) ahead of any real
+# Blender module, so `import bpy` in the scripts and insta_lib lands here. The
+# fake keeps a small but real data model: datablocks live in bpy.data with
+# Blender's unique-name rules, objects are linked into scene collections,
+# users are counted from what every datablock references, actions hold
+# fcurves with keyframe arrays (foreach_get/foreach_set as in Blender), and
+# meshes hold vertex, loop and polygon arrays. On top of that `recorder`
+# counts what a build asks of Blender:
+#
+#   recorder.ops         operator calls by idname ("object.select_all")
+#   recorder.datablocks  datablocks created, by bpy.data collection ("meshes")
+#   recorder.removed     datablocks removed, by collection
+#   recorder.keyframes   keyframes inserted (keyframe_points.add/insert, keyframe_insert)
+#   recorder.appended    datablocks appended from a library, by collection (also in datablocks)
+#
+# reset() starts over from the factory startup file (cube, camera, light).
+#
+# There is no depsgraph: matrix_world follows location/rotation/scale,
+# parents and track-to constraints right away, and frame_set() evaluates
+# object actions and plain NLA strips. Operators only record the call,
+# render.render included. A .blend library is a pickle of the datablocks
+# written to it.
+
+import copy as _copy
+import math
+import os
+import pickle
+import types as _types
+from collections import Counter
+
+from mathutils import Color, Euler, Matrix, Vector
+
+
+class Recorder:
+    """What the code under test asked of Blender since the last reset."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ops = Counter()
+        self.datablocks = Counter()
+        self.removed = Counter()
+        self.keyframes = 0
+        self.appended = Counter()
+
+    @property
+    def op_calls(self):
+        return sum(self.ops.values())
+
+    @property
+    def datablocks_created(self):
+        return sum(self.datablocks.values())
+
+
+recorder = Recorder()
+
+
+def _flatten(value, out):
+    if isinstance(value, Matrix):
+        # foreach_get hands out Blender's column-major matrix memory
+        for column in value.col:
+            out.extend(column)
+    elif isinstance(value, (str, bytes)):
+        raise TypeError("foreach access needs numeric properties")
+    elif hasattr(value, "__iter__"):
+        for item in value:
+            _flatten(item, out)
+    else:
+        out.append(value)
+    return out
+
+
+def _values(seq):
+    return seq.tolist() if hasattr(seq, "tolist") else list(seq)
+
+
+def _fill(seq, values):
+    if len(seq) != len(values):
+        raise RuntimeError(f"internal error setting the array: expected {len(values)} items, got {len(seq)}")
+    seq[:] = values
+
+
+class _Settings(_types.SimpleNamespace):
+    """Plain settings struct (render, cycles, constraint, ...): any attribute can be set."""
+
+
+# custom properties
+
+
+class _IDPropertyGroup(dict):
+    def to_dict(self):
+        return {key: value.to_dict() if isinstance(value, _IDPropertyGroup) else value for key, value in self.items()}
+
+
+class _PropertyHolder:
+    """Custom properties (obj["name"]) as on IDs, modifiers and other structs."""
+
+    def _custom(self):
+        props = self.__dict__.get("_props")
+        if props is None:
+            props = self.__dict__["_props"] = {}
+        return props
+
+    def __getitem__(self, key):
+        return self._custom()[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(value, dict):
+            value = _IDPropertyGroup(value)
+        self._custom()[key] = value
+
+    def __delitem__(self, key):
+        del self._custom()[key]
+
+    def __contains__(self, key):
+        return key in self._custom()
+
+    def get(self, key, default=None):
+        return self._custom().get(key, default)
+
+    def keys(self):
+        return self._custom().keys()
+
+    def pop(self, key, *default):
+        return self._custom().pop(key, *default)
+
+
+# collections
+
+
+class bpy_prop_collection:
+    """Sequence of structs, looked up by index or name."""
+
+    def _items(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        return iter(list(self._items()))
+
+    def __len__(self):
+        return len(self._items())
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+            return item
+        return list(self._items())[key]
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self.get(key) is not None
+        return any(item is key for item in self._items())
+
+    def get(self, key, default=None):
+        for item in self._items():
+            if getattr(item, "name", None) == key:
+                return item
+        return default
+
+    def find(self, key):
+        for index, item in enumerate(self._items()):
+            if getattr(item, "name", None) == key:
+                return index
+        return -1
+
+    def keys(self):
+        return [item.name for item in self._items()]
+
+    def values(self):
+        return list(self._items())
+
+    def items(self):
+        return [(item.name, item) for item in self._items()]
+
+    def foreach_get(self, attr, seq):
+        _fill(seq, _flatten([getattr(item, attr) for item in self._items()], []))
+
+    def foreach_set(self, attr, seq):
+        items = list(self._items())
+        values = _values(seq)
+        if not items:
+            return
+        width = len(values) // len(items)
+        for i, item in enumerate(items):
+            chunk = values[i * width:(i + 1) * width]
+            current = getattr(item, attr)
+            if hasattr(current, "__setitem__"):
+                current[:] = chunk
+            else:
+                setattr(item, attr, chunk[0])
+
+
+class _List(bpy_prop_collection):
+    def __init__(self, items=()):
+        self._list = list(items)
+
+    def _items(self):
+        return self._list
+
+
+class IDCollection(bpy_prop_collection):
+    """One bpy.data collection (bpy.data.meshes, ...): unique names, creation recorded."""
+
+    def __init__(self, key, factory):
+        self._key = key
+        self._factory = factory
+        self._by_name = {}
+
+    def _items(self):
+        return self._by_name.values()
+
+    def get(self, key, default=None):
+        return self._by_name.get(key, default)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return key in self._by_name
+        return self._by_name.get(getattr(key, "name", None)) is key
+
+    def _unique(self, name, skip=None):
+        name = name[:63]
+        if name not in self._by_name or self._by_name[name] is skip:
+            return name
+        base, dot, suffix = name.rpartition(".")
+        if not (dot and suffix.isdigit()):
+            base = name
+        number = 1
+        while f"{base}.{number:03d}" in self._by_name:
+            number += 1
+        return f"{base}.{number:03d}"
+
+    def _add(self, id_data, name):
+        id_data._name = self._unique(name)
+        id_data._collection = self
+        self._by_name[id_data._name] = id_data
+        recorder.datablocks[self._key] += 1
+        return id_data
+
+    def _rename(self, id_data, name):
+        del self._by_name[id_data._name]
+        id_data._name = self._unique(name, skip=id_data)
+        self._by_name[id_data._name] = id_data
+
+    def new(self, name, *args, **kwargs):
+        return self._add(self._factory(*args, **kwargs), name)
+
+    def remove(self, id_data, do_unlink=True, do_id_user=True, do_ui_user=True):
+        data.batch_remove([id_data])
+
+
+class _Meshes(IDCollection):
+    def new_from_object(self, obj, preserve_all_data_layers=False, depsgraph=None):
+        mesh = Mesh()
+        if obj.type == 'MESH':
+            source = obj.data
+            mesh._set_geometry(_vertex_tuples(source), _face_tuples(source))
+            mesh.materials._list = list(source.materials)
+        elif obj.type == 'FONT':
+            mesh._set_geometry(*_glyph_quads(obj.data))
+            mesh.materials._list = list(obj.data.materials)
+        return self._add(mesh, obj.name)
+
+
+# datablocks
+
+
+class ID(_PropertyHolder):
+    """Base of every datablock."""
+
+    _collection = None
+
+    def __init__(self):
+        self._name = ""
+        self.animation_data = None
+        self.use_fake_user = False
+        self.library = None
+        self.tag = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    @property
+    def name_full(self):
+        return self._name
+
+    @property
+    def users(self):
+        return data._users(self) + int(self.use_fake_user)
+
+    @property
+    def original(self):
+        return self
+
+    is_evaluated = False
+
+    def as_pointer(self):
+        return id(self)
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            self.animation_data = AnimData(self)
+        return self.animation_data
+
+    def animation_data_clear(self):
+        self.animation_data = None
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def copy(self):
+        """A new datablock like this one: embedded data (node trees) is copied, used datablocks are shared."""
+        clone = _copy.deepcopy(self, {ref.as_pointer(): ref for ref in self._refs()})
+        clone.use_fake_user = False
+        return self._collection._add(clone, self._name)
+
+    def _refs(self):
+        """Datablocks this one uses (each reference is one user)."""
+        refs = []
+        if self.animation_data is not None:
+            refs += self.animation_data._refs()
+        refs += [value for value in self._custom().values() if isinstance(value, ID)]
+        return refs
+
+    def _unlink(self, removed):
+        """Drop references to removed datablocks."""
+        if self.animation_data is not None:
+            self.animation_data._unlink(removed)
+        for key, value in list(self._custom().items()):
+            if isinstance(value, ID) and value.as_pointer() in removed:
+                del self._custom()[key]
+
+    def __getstate__(self):
+        # pickled into a library on its own, without the bpy.data collection it is in
+        state = dict(self.__dict__)
+        state.pop("_collection", None)
+        return state
+
+    def __repr__(self):
+        return f"bpy.data.{self._collection._key if self._collection else 'ids'}['{self._name}']"
+
+
+def _vector_property(attribute, size=3, default=0.0, factory=Vector):
+    def get(self):
+        return self.__dict__[attribute]
+
+    def set(self, value):
+        values = [float(v) for v in value]
+        if len(values) != size:
+            raise ValueError(f"sequence expected {size} items, got {len(values)}")
+        self.__dict__[attribute][:] = values
+    return property(get, set)
+
+
+class Object(ID):
+    def __init__(self, object_data):
+        super().__init__()
+        self.data = object_data
+        self.__dict__.update(_location=Vector(), _rotation_euler=Euler(), _scale=Vector((1, 1, 1)),
+                             _delta_location=Vector(), _delta_rotation_euler=Euler(),
+                             _delta_scale=Vector((1, 1, 1)), _color=Vector((1, 1, 1, 1)))
+        self.rotation_mode = 'XYZ'
+        self.hide_viewport = False
+        self.hide_render = False
+        self.hide_select = False
+        self.parent = None
+        self.pass_index = 0
+        self.display_type = 'TEXTURED'
+        self.modifiers = _Modifiers()
+        self.constraints = _Constraints()
+        self._slot_links = []
+        self._slot_materials = []
+
+    location = _vector_property("_location")
+    rotation_euler = _vector_property("_rotation_euler")
+    scale = _vector_property("_scale")
+    delta_location = _vector_property("_delta_location")
+    delta_rotation_euler = _vector_property("_delta_rotation_euler")
+    delta_scale = _vector_property("_delta_scale")
+    color = _vector_property("_color", size=4)
+
+    @property
+    def type(self):
+        if self.data is None:
+            return 'EMPTY'
+        if isinstance(self.data, Curve):
+            return 'FONT' if self.data.type == 'FONT' else 'CURVE'
+        return {Mesh: 'MESH', Camera: 'CAMERA', Light: 'LIGHT'}[type(self.data)]
+
+    @property
+    def material_slots(self):
+        count = len(self.data.materials) if isinstance(self.data, (Mesh, Curve)) else 0
+        while len(self._slot_links) < count:
+            self._slot_links.append('DATA')
+            self._slot_materials.append(None)
+        return _List(MaterialSlot(self, index) for index in range(count))
+
+    @property
+    def active_material(self):
+        slots = self.material_slots
+        return slots[0].material if len(slots) else None
+
+    @property
+    def matrix_basis(self):
+        rotation = Euler([a + b for a, b in zip(self.rotation_euler, self.delta_rotation_euler)], self.rotation_mode)
+        return Matrix.LocRotScale(self.location + self.delta_location, rotation,
+                                  [a * b for a, b in zip(self.scale, self.delta_scale)])
+
+    @property
+    def matrix_world(self):
+        matrix = self.matrix_basis
+        if self.parent is not None:
+            matrix = self.parent.matrix_world @ matrix
+        for constraint in self.constraints:
+            if constraint.type == 'TRACK_TO' and constraint.target is not None and not constraint.mute:
+                matrix = _track_to(matrix, constraint.target.matrix_world.translation)
+        return matrix
+
+    @property
+    def bound_box(self):
+        low, high = (0.0,) * 3, (0.0,) * 3
+        if isinstance(self.data, Mesh) and len(self.data.vertices):
+            co = self.data.vertices._data["co"]
+            axes = [co[axis::3] for axis in range(3)]
+            low, high = tuple(min(a) for a in axes), tuple(max(a) for a in axes)
+        x, y, z = zip(low, high)
+        return [(x[0], y[0], z[0]), (x[0], y[0], z[1]), (x[0], y[1], z[1]), (x[0], y[1], z[0]),
+                (x[1], y[0], z[0]), (x[1], y[0], z[1]), (x[1], y[1], z[1]), (x[1], y[1], z[0])]
+
+    def keyframe_insert(self, data_path, index=-1, frame=None, group=""):
+        frame = context.scene.frame_current if frame is None else frame
+        value = _read_path(self, data_path)
+        indices = range(len(value)) if index == -1 and hasattr(value, "__len__") else [max(index, 0)]
+        action = self.animation_data_create().action
+        if action is None:
+            action = self.animation_data.action = data.actions.new(f"{self.name}Action")
+        for i in indices:
+            fcurve = action.fcurves.find(data_path, index=i) or action.fcurves.new(data_path, index=i)
+            fcurve.keyframe_points.insert(frame, float(value[i] if hasattr(value, "__len__") else value))
+        return True
+
+    def select_get(self):
+        return False
+
+    def select_set(self, state):
+        pass
+
+    def _refs(self):
+        refs = super()._refs()
+        if isinstance(self.data, ID):
+            refs.append(self.data)
+        refs += [mat for link, mat in zip(self._slot_links, self._slot_materials) if link == 'OBJECT' and mat]
+        if self.parent is not None:
+            refs.append(self.parent)
+        for modifier in self.modifiers:
+            refs += modifier._refs()
+        refs += [c.target for c in self.constraints if getattr(c, "target", None) is not None]
+        return refs
+
+    def _unlink(self, removed):
+        super()._unlink(removed)
+        if self.data is not None and self.data.as_pointer() in removed:
+            self.data = None
+        self._slot_materials = [None if mat is not None and mat.as_pointer() in removed else mat
+                                for mat in self._slot_materials]
+        if self.parent is not None and self.parent.as_pointer() in removed:
+            self.parent = None
+        for modifier in self.modifiers:
+            modifier._unlink(removed)
+        for constraint in self.constraints:
+            if getattr(constraint, "target", None) is not None and constraint.target.as_pointer() in removed:
+                constraint.target = None
+
+
+def _track_to(matrix, target):
+    """matrix turned so its -Z axis points at target with Y up (TRACK_NEGATIVE_Z, UP_Y)."""
+    location = matrix.translation
+    scale = [column.length for column in matrix.to_3x3().col]
+    z_axis = (location - target).normalized()
+    x_axis = Vector((0, 0, 1)).cross(z_axis)
+    if x_axis.length < 1e-9:
+        x_axis = Vector((1, 0, 0))
+    x_axis = x_axis.normalized()
+    y_axis = z_axis.cross(x_axis)
+    axes = [x_axis * scale[0], y_axis * scale[1], z_axis * scale[2]]
+    rows = [[axes[j][i] for j in range(3)] + [location[i]] for i in range(3)]
+    return Matrix(rows + [[0.0, 0.0, 0.0, 1.0]])
+
+
+class MaterialSlot:
+    def __init__(self, obj, index):
+        self._obj = obj
+        self._index = index
+
+    @property
+    def link(self):
+        return self._obj._slot_links[self._index]
+
+    @link.setter
+    def link(self, value):
+        self._obj._slot_links[self._index] = value
+
+    @property
+    def material(self):
+        if self.link == 'OBJECT':
+            return self._obj._slot_materials[self._index]
+        return self._obj.data.materials[self._index]
+
+    @material.setter
+    def material(self, value):
+        if self.link == 'OBJECT':
+            self._obj._slot_materials[self._index] = value
+        else:
+            self._obj.data.materials[self._index] = value
+
+    @property
+    def name(self):
+        return self.material.name if self.material else ""
+
+
+class _Modifiers(bpy_prop_collection):
+    def __init__(self):
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def new(self, name, type):
+        modifier = Modifier(name, type)
+        self._list.append(modifier)
+        return modifier
+
+    def remove(self, modifier):
+        self._list.remove(modifier)
+
+    def clear(self):
+        self._list.clear()
+
+
+class Modifier(_PropertyHolder):
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+        self.show_render = True
+        self.node_group = None
+
+    def _refs(self):
+        refs = [self.node_group] if self.node_group is not None else []
+        return refs + [value for value in self._custom().values() if isinstance(value, ID)]
+
+    def _unlink(self, removed):
+        if self.node_group is not None and self.node_group.as_pointer() in removed:
+            self.node_group = None
+        for key, value in list(self._custom().items()):
+            if isinstance(value, ID) and value.as_pointer() in removed:
+                self._custom()[key] = None
+
+
+class _Constraints(_Modifiers):
+    def new(self, type):
+        constraint = _Settings(type=type, name=type.title().replace("_", " "), target=None, mute=False,
+                               influence=1.0)
+        self._list.append(constraint)
+        return constraint
+
+
+class _Elements(bpy_prop_collection):
+    """Mesh element arrays (vertices, loops, ...) stored flat per attribute."""
+
+    def __init__(self, **layout):
+        # attribute -> (width, default)
+        self._layout = layout
+        self._data = {name: [] for name in layout}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _items(self):
+        return [_Element(self, index) for index in range(self._count)]
+
+    def add(self, count):
+        for name, (width, default) in self._layout.items():
+            self._data[name].extend([default] * (width * count))
+        self._count += count
+
+    def _resize(self, count):
+        for name, (width, default) in self._layout.items():
+            values = self._data[name][:width * count]
+            self._data[name] = values + [default] * (width * count - len(values))
+        self._count = count
+
+    def foreach_get(self, attr, seq):
+        _fill(seq, self._data[attr])
+
+    def foreach_set(self, attr, seq):
+        values = _values(seq)
+        if len(values) != len(self._data[attr]):
+            raise RuntimeError(f"internal error setting the array: expected {len(self._data[attr])} items")
+        self._data[attr] = values
+
+
+class _Element:
+    def __init__(self, elements, index):
+        object.__setattr__(self, "_elements", elements)
+        object.__setattr__(self, "index", index)
+
+    def __getattr__(self, name):
+        width, _ = self._elements._layout[name]
+        values = self._elements._data[name][self.index * width:(self.index + 1) * width]
+        return Vector(values) if width == 3 else values[0] if width == 1 else tuple(values)
+
+    def __setattr__(self, name, value):
+        width, _ = self._elements._layout[name]
+        values = list(value) if width > 1 else [value]
+        self._elements._data[name][self.index * width:(self.index + 1) * width] = values
+
+
+_ATTRIBUTE_LAYOUT = {'FLOAT': ("value", 1, 0.0), 'INT': ("value", 1, 0), 'BOOLEAN': ("value", 1, False),
+                     'FLOAT_VECTOR': ("vector", 3, 0.0), 'FLOAT_COLOR': ("color", 4, 0.0),
+                     'BYTE_COLOR': ("color", 4, 0.0), 'FLOAT2': ("vector", 2, 0.0)}
+
+
+class _Attribute:
+    def __init__(self, mesh, name, data_type, domain):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        prop, width, default = _ATTRIBUTE_LAYOUT[data_type]
+        self.data = _Elements(**{prop: (width, default)})
+        self.data.add(len(mesh._domain(domain)))
+
+
+class _Attributes(bpy_prop_collection):
+    def __init__(self, mesh):
+        self._mesh = mesh
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def new(self, name, type, domain):
+        if self.get(name) is not None:
+            raise RuntimeError(f"attribute {name!r} already exists")
+        attribute = _Attribute(self._mesh, name, type, domain)
+        self._list.append(attribute)
+        return attribute
+
+    def remove(self, attribute):
+        self._list.remove(attribute)
+
+
+class _Materials(bpy_prop_collection):
+    """Material list of a mesh or curve; entries may be None."""
+
+    def __init__(self):
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def __setitem__(self, index, material):
+        self._list[index] = material
+
+    def append(self, material):
+        self._list.append(material)
+
+    def pop(self, index=-1):
+        return self._list.pop(index)
+
+    def clear(self):
+        self._list.clear()
+
+
+class Mesh(ID):
+    def __init__(self):
+        super().__init__()
+        self.vertices = _Elements(co=(3, 0.0))
+        self.edges = _Elements(vertices=(2, 0))
+        self.loops = _Elements(vertex_index=(1, 0))
+        self.polygons = _Elements(loop_start=(1, 0), loop_total=(1, 0), use_smooth=(1, False),
+                                  material_index=(1, 0))
+        self.attributes = _Attributes(self)
+        self.materials = _Materials()
+
+    def _domain(self, domain):
+        return {'POINT': self.vertices, 'EDGE': self.edges, 'CORNER': self.loops, 'FACE': self.polygons}[domain]
+
+    def _set_geometry(self, verts, faces):
+        self.vertices._resize(0)
+        self.vertices.add(len(verts))
+        self.vertices._data["co"] = [float(v) for vert in verts for v in vert]
+        self.loops._resize(0)
+        self.loops.add(sum(len(face) for face in faces))
+        self.loops._data["vertex_index"] = [i for face in faces for i in face]
+        self.polygons._resize(0)
+        self.polygons.add(len(faces))
+        starts, start = [], 0
+        for face in faces:
+            starts.append(start)
+            start += len(face)
+        self.polygons._data["loop_start"] = starts
+        self.update(calc_edges=True)
+
+    def update(self, calc_edges=False, calc_edges_loose=False):
+        starts = self.polygons._data["loop_start"]
+        ends = starts[1:] + [len(self.loops)]
+        self.polygons._data["loop_total"] = [end - start for start, end in zip(starts, ends)]
+        if calc_edges:
+            edges = {tuple(sorted(edge)) for face in _face_tuples(self) for edge in zip(face, face[1:] + face[:1])}
+            self.edges._resize(0)
+            self.edges.add(len(edges))
+            self.edges._data["vertices"] = [i for edge in sorted(edges) for i in edge]
+
+    def shade_smooth(self):
+        self.polygons._data["use_smooth"] = [True] * len(self.polygons)
+
+    def shade_flat(self):
+        self.polygons._data["use_smooth"] = [False] * len(self.polygons)
+
+    def set_sharp_from_angle(self, angle=math.radians(30)):
+        pass
+
+    def validate(self, verbose=False, clean_customdata=True):
+        return False
+
+    def _refs(self):
+        return super()._refs() + [mat for mat in self.materials if mat is not None]
+
+    def _unlink(self, removed):
+        super()._unlink(removed)
+        self.materials._list = [None if mat is not None and mat.as_pointer() in removed else mat
+                                for mat in self.materials]
+
+
+def _vertex_tuples(mesh):
+    co = mesh.vertices._data["co"]
+    return [tuple(co[i:i + 3]) for i in range(0, len(co), 3)]
+
+
+def _face_tuples(mesh):
+    loops = mesh.loops._data["vertex_index"]
+    starts = mesh.polygons._data["loop_start"]
+    ends = starts[1:] + [len(loops)]
+    return [tuple(loops[start:end]) for start, end in zip(starts, ends)]
+
+
+def _glyph_quads(curve):
+    """One quad per visible character, as a stand-in for the tessellated text."""
+    size = curve.size
+    advance = 0.6 * size
+    shift = {'LEFT': 0.0, 'CENTER': -0.5, 'RIGHT': -1.0}.get(curve.align_x, 0.0) * advance * len(curve.body)
+    verts, faces = [], []
+    for i, char in enumerate(curve.body):
+        if char.isspace():
+            continue
+        x = shift + i * advance
+        start = len(verts)
+        verts += [(x, 0.0, 0.0), (x + 0.5 * size, 0.0, 0.0), (x + 0.5 * size, 0.7 * size, 0.0), (x, 0.7 * size, 0.0)]
+        faces.append((start, start + 1, start + 2, start + 3))
+    return verts, faces
+
+
+class Curve(ID):
+    def __init__(self, type='CURVE'):
+        super().__init__()
+        self.type = type
+        self.body = ""
+        self.size = 1.0
+        self.extrude = 0.0
+        self.bevel_depth = 0.0
+        self.align_x = 'LEFT'
+        self.align_y = 'TOP_BASELINE'
+        self.font = None
+        self.materials = _Materials()
+
+    def _refs(self):
+        return super()._refs() + [mat for mat in self.materials if mat is not None]
+
+
+class Camera(ID):
+    def __init__(self):
+        super().__init__()
+        self.type = 'PERSP'
+        self.lens = 50.0
+        self.sensor_width = 36.0
+        self.sensor_height = 24.0
+        self.sensor_fit = 'AUTO'
+        self.ortho_scale = 6.0
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+        self.display_size = 1.0
+        self.dof = _Settings(use_dof=False, focus_object=None, focus_distance=10.0, aperture_fstop=2.8)
+
+    def view_frame(self, scene=None):
+        """Corners of the view at depth 1 in camera space (top right first, as Blender)."""
+        width, height = 1.0, 1.0
+        if scene is not None:
+            width = scene.render.resolution_x * scene.render.pixel_aspect_x
+            height = scene.render.resolution_y * scene.render.pixel_aspect_y
+        fit = self.sensor_fit
+        if fit == 'AUTO':
+            fit = 'HORIZONTAL' if width >= height else 'VERTICAL'
+        if self.type == 'ORTHO':
+            span = self.ortho_scale / 2
+        else:
+            span = (self.sensor_height if self.sensor_fit == 'VERTICAL' else self.sensor_width) / (2 * self.lens)
+        if fit == 'HORIZONTAL':
+            x, y = span, span * height / width
+        else:
+            x, y = span * width / height, span
+        return [Vector((x, y, -1)), Vector((x, -y, -1)), Vector((-x, -y, -1)), Vector((-x, y, -1))]
+
+
+class Light(ID):
+    def __init__(self, type='POINT'):
+        super().__init__()
+        self.type = type
+        self.energy = 10.0
+        self.color = Color((1, 1, 1))
+        self.shadow_soft_size = 0.25
+        self.size = 0.25
+        self.angle = math.radians(0.526)
+        self.use_shadow = True
+
+
+class Socket:
+    def __init__(self, node, name, identifier, is_output):
+        self.node = node
+        self.name = name
+        self.identifier = identifier
+        self.is_output = is_output
+        self.default_value = 0.0
+        self.enabled = True
+        self.hide = False
+
+    @property
+    def links(self):
+        end = "from_socket" if self.is_output else "to_socket"
+        return [link for link in self.node._tree.links if getattr(link, end) is self]
+
+    @property
+    def is_linked(self):
+        return bool(self.links)
+
+
+class _Sockets(bpy_prop_collection):
+    def __init__(self, node, sockets, is_output, open_ended):
+        self._node = node
+        self._is_output = is_output
+        # nodes without a socket table grow the sockets they are asked for
+        self._open = open_ended
+        self._list = [Socket(node, name, identifier, is_output) for name, identifier in sockets]
+
+    def _items(self):
+        return self._list
+
+    def get(self, key, default=None):
+        for socket in self._list:
+            if socket.name == key:
+                return socket
+        if self._open:
+            socket = Socket(self._node, key, key, self._is_output)
+            self._list.append(socket)
+            return socket
+        return default
+
+    def __getitem__(self, key):
+        if isinstance(key, int) and key >= len(self._list) and self._open:
+            for index in range(len(self._list), key + 1):
+                self._list.append(Socket(self._node, f"Socket_{index}", f"Socket_{index}", self._is_output))
+        return super().__getitem__(key)
+
+
+def _sockets(*names):
+    return [(name, name) if isinstance(name, str) else name for name in names]
+
+
+# bl_idname -> (default name, inputs, outputs); other nodes grow sockets on demand
+_NODE_TYPES = {
+    'ShaderNodeBsdfPrincipled': ("Principled BSDF",
+                                 _sockets("Base Color", "Metallic", "Roughness", "IOR", "Alpha", "Normal",
+                                          "Emission Color", "Emission Strength"),
+                                 _sockets("BSDF")),
+    'ShaderNodeOutputMaterial': ("Material Output", _sockets("Surface", "Volume", "Displacement"), []),
+    'ShaderNodeBackground': ("Background", _sockets("Color", "Strength", "Weight"), _sockets("Background")),
+    'ShaderNodeOutputWorld': ("World Output", _sockets("Surface", "Volume"), []),
+    'ShaderNodeMix': ("Mix",
+                      _sockets(("Factor", "Factor_Float"), ("Factor", "Factor_Vector"), ("A", "A_Float"),
+                               ("B", "B_Float"), ("A", "A_Vector"), ("B", "B_Vector"), ("A", "A_Color"),
+                               ("B", "B_Color")),
+                      _sockets(("Result", "Result_Float"), ("Result", "Result_Vector"), ("Result", "Result_Color"))),
+    'ShaderNodeObjectInfo': ("Object Info", [],
+                             _sockets("Location", "Color", "Alpha", "Object Index", "Material Index", "Random")),
+    'ShaderNodeAttribute': ("Attribute", [], _sockets("Color", "Vector", "Fac", "Alpha")),
+}
+
+
+def _node_name(bl_idname):
+    for prefix in ("ShaderNode", "GeometryNode", "CompositorNode", "Node"):
+        if bl_idname.startswith(prefix):
+            bl_idname = bl_idname[len(prefix):]
+            break
+    return "".join(f" {c}" if c.isupper() and i else c for i, c in enumerate(bl_idname))
+
+
+class Node:
+    def __init__(self, tree, bl_idname, name):
+        self._tree = tree
+        self.bl_idname = bl_idname
+        self.name = name
+        self.label = ""
+        self.location = Vector((0, 0))
+        self.width = 140.0
+        self.mute = False
+        _, inputs, outputs = _NODE_TYPES.get(bl_idname, (None, None, None))
+        self.inputs = _Sockets(self, inputs or [], False, inputs is None)
+        self.outputs = _Sockets(self, outputs or [], True, outputs is None)
+
+
+class _Nodes(bpy_prop_collection):
+    def __init__(self, tree):
+        self._tree = tree
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def new(self, type):
+        name = _NODE_TYPES.get(type, (_node_name(type),))[0]
+        names = {node.name for node in self._list}
+        unique, number = name, 1
+        while unique in names:
+            unique, number = f"{name}.{number:03d}", number + 1
+        node = Node(self._tree, type, unique)
+        self._list.append(node)
+        return node
+
+    def remove(self, node):
+        self._list.remove(node)
+        self._tree.links._list = [link for link in self._tree.links._list
+                                  if link.from_node is not node and link.to_node is not node]
+
+    def clear(self):
+        self._list.clear()
+        self._tree.links._list.clear()
+
+
+class _Links(bpy_prop_collection):
+    def __init__(self):
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def new(self, input, output, verify_limits=True):
+        link = _Settings(from_socket=input, to_socket=output, from_node=input.node, to_node=output.node,
+                         is_valid=True, is_muted=False)
+        if verify_limits:
+            self._list = [other for other in self._list if other.to_socket is not output]
+        self._list.append(link)
+        return link
+
+    def remove(self, link):
+        self._list.remove(link)
+
+
+class _Interface:
+    def __init__(self):
+        self.items_tree = _List()
+
+    def new_socket(self, name, description="", in_out='INPUT', socket_type='NodeSocketFloat', parent=None):
+        item = _Settings(name=name, description=description, in_out=in_out, socket_type=socket_type,
+                         item_type='SOCKET', identifier=f"Socket_{len(self.items_tree)}", default_value=None)
+        self.items_tree._list.append(item)
+        return item
+
+
+class NodeTree(ID):
+    def __init__(self, type='ShaderNodeTree'):
+        super().__init__()
+        self.bl_idname = type
+        self.type = {'ShaderNodeTree': 'SHADER', 'GeometryNodeTree': 'GEOMETRY',
+                     'CompositorNodeTree': 'COMPOSITING'}.get(type, 'CUSTOM')
+        self.nodes = _Nodes(self)
+        self.links = _Links()
+        self.interface = _Interface()
+
+
+def _shader_tree(shader, output):
+    """Embedded node tree with a shader node feeding an output, as use_nodes creates it."""
+    tree = NodeTree('ShaderNodeTree')
+    tree._name = "Shader Nodetree"
+    node = tree.nodes.new(shader)
+    out = tree.nodes.new(output)
+    node.location = Vector((10, 300))
+    out.location = Vector((300, 300))
+    tree.links.new(node.outputs[0], out.inputs[0])
+    return tree, node
+
+
+class Material(ID):
+    def __init__(self):
+        super().__init__()
+        self.diffuse_color = Vector((0.8, 0.8, 0.8, 1.0))
+        self.roughness = 0.4
+        self.metallic = 0.0
+        self.blend_method = 'OPAQUE'
+        self.node_tree = None
+        self._use_nodes = False
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = bool(value)
+        if value and self.node_tree is None:
+            self.node_tree, bsdf = _shader_tree('ShaderNodeBsdfPrincipled', 'ShaderNodeOutputMaterial')
+            bsdf.inputs['Base Color'].default_value = (0.8, 0.8, 0.8, 1.0)
+
+
+class World(ID):
+    def __init__(self):
+        super().__init__()
+        self.color = Color((0.05, 0.05, 0.05))
+        self.node_tree = None
+        self._use_nodes = False
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = bool(value)
+        if value and self.node_tree is None:
+            self.node_tree, background = _shader_tree('ShaderNodeBackground', 'ShaderNodeOutputWorld')
+            background.inputs['Color'].default_value = (0.05, 0.05, 0.05, 1.0)
+
+
+class Image(ID):
+    def __init__(self, width=0, height=0, alpha=False):
+        super().__init__()
+        self.size = (width, height)
+        self.filepath = ""
+
+
+class Text(ID):
+    def __init__(self):
+        super().__init__()
+        self.body = ""
+
+
+# libraries
+
+class Library(ID):
+    def __init__(self):
+        super().__init__()
+        self.filepath = ""
+
+
+class _LibraryLoad:
+    """bpy.data.libraries.load(): names to append go into data_to, the datablocks come out of it."""
+
+    def __init__(self, filepath):
+        self._filepath = filepath
+        self._blocks = None
+        self._to = None
+
+    def __enter__(self):
+        try:
+            with open(self._filepath, "rb") as fh:
+                self._blocks = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError) as exc:
+            raise OSError(f"load: {self._filepath} failed to open blend file") from exc
+        keys = [collection._key for collection in data._collections()]
+        data_from = _types.SimpleNamespace(**{key: list(self._blocks.get(key, ())) for key in keys})
+        self._to = _types.SimpleNamespace(**{key: [] for key in keys})
+        return data_from, self._to
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            return False
+        library = data.libraries.new(os.path.basename(self._filepath))
+        library.filepath = self._filepath
+        # appended as local datablocks; what they use is not appended along here
+        for key, names in vars(self._to).items():
+            blocks = self._blocks.get(key, {})
+            appended = [getattr(data, key)._add(blocks[name], name) if name in blocks else None for name in names]
+            recorder.appended[key] += sum(id_data is not None for id_data in appended)
+            setattr(self._to, key, appended)
+        return False
+
+
+class _Libraries(IDCollection):
+    def write(self, filepath, datablocks, path_remap='NONE', fake_user=False, compress=False):
+        blocks = {}
+        for id_data in datablocks:
+            blocks.setdefault(id_data._collection._key, {})[id_data.name] = id_data
+        with open(filepath, "wb") as fh:
+            pickle.dump(blocks, fh)
+
+    def load(self, filepath, link=False, relative=False):
+        return _LibraryLoad(filepath)
+
+
+# animation
+
+# Keyframe.interpolation enum values, as foreach_get/foreach_set see them
+_INTERPOLATIONS = ('CONSTANT', 'LINEAR', 'BEZIER')
+
+
+class Keyframe:
+    def __init__(self, points, index):
+        self._points = points
+        self._index = index
+
+    def _pair(name):
+        def get(self):
+            values = self._points._data[name]
+            return Vector(values[2 * self._index:2 * self._index + 2])
+
+        def set(self, value):
+            self._points._data[name][2 * self._index:2 * self._index + 2] = [float(v) for v in value]
+        return property(get, set)
+
+    co = _pair("co")
+    handle_left = _pair("handle_left")
+    handle_right = _pair("handle_right")
+    del _pair
+
+    @property
+    def interpolation(self):
+        return _INTERPOLATIONS[self._points._data["interpolation"][self._index]]
+
+    @interpolation.setter
+    def interpolation(self, value):
+        self._points._data["interpolation"][self._index] = _INTERPOLATIONS.index(value)
+
+
+class _KeyframePoints(bpy_prop_collection):
+    def __init__(self, fcurve):
+        self._fcurve = fcurve
+        self._data = {"co": [], "handle_left": [], "handle_right": [], "interpolation": []}
+
+    def __len__(self):
+        return len(self._data["interpolation"])
+
+    def _items(self):
+        return [Keyframe(self, index) for index in range(len(self))]
+
+    def add(self, count=1):
+        for name in ("co", "handle_left", "handle_right"):
+            self._data[name].extend([0.0] * (2 * count))
+        self._data["interpolation"].extend([_INTERPOLATIONS.index('BEZIER')] * count)
+        recorder.keyframes += count
+
+    def insert(self, frame, value, options=set(), keyframe_type='KEYFRAME'):
+        co = self._data["co"]
+        for index in range(len(self)):
+            if co[2 * index] == frame:
+                co[2 * index + 1] = float(value)
+                recorder.keyframes += 1
+                self._fcurve.update()
+                return Keyframe(self, index)
+        self.add(1)
+        co[-2:] = [float(frame), float(value)]
+        self._fcurve.update()
+        return Keyframe(self, self._data["co"][0::2].index(float(frame)))
+
+    def foreach_get(self, attr, seq):
+        _fill(seq, self._data[attr])
+
+    def foreach_set(self, attr, seq):
+        values = _values(seq)
+        if len(values) != len(self._data[attr]):
+            raise RuntimeError(f"internal error setting the array: expected {len(self._data[attr])} items")
+        self._data[attr] = [int(v) for v in values] if attr == "interpolation" else [float(v) for v in values]
+
+    def clear(self):
+        for values in self._data.values():
+            values.clear()
+
+    def remove(self, keyframe, fast=False):
+        index = keyframe._index
+        for name in ("co", "handle_left", "handle_right"):
+            del self._data[name][2 * index:2 * index + 2]
+        del self._data["interpolation"][index]
+
+
+class FCurve:
+    def __init__(self, data_path, index=0, group=None):
+        self.data_path = data_path
+        self.array_index = index
+        self.group = group
+        self.keyframe_points = _KeyframePoints(self)
+        self.modifiers = _List()
+        self.mute = False
+        self.hide = False
+        self.lock = False
+        self.select = False
+        self.extrapolation = 'CONSTANT'
+
+    def update(self):
+        """Sort the keys by frame and recompute auto-clamped handles."""
+        points = self.keyframe_points._data
+        count = len(self.keyframe_points)
+        order = sorted(range(count), key=lambda i: points["co"][2 * i])
+        co = [points["co"][2 * i + k] for i in order for k in (0, 1)]
+        interpolation = [points["interpolation"][i] for i in order]
+        x, y = co[0::2], co[1::2]
+        left, right = [], []
+        for i in range(count):
+            x_prev = x[i - 1] if i else x[i] - 1.0
+            x_next = x[i + 1] if i + 1 < count else x[i] + 1.0
+            slope = 0.0
+            if 0 < i < count - 1 and (y[i - 1] - y[i]) * (y[i] - y[i + 1]) > 0:
+                slope = (y[i + 1] - y[i - 1]) / (x[i + 1] - x[i - 1])
+            left += [x[i] - (x[i] - x_prev) / 3, y[i] - slope * (x[i] - x_prev) / 3]
+            right += [x[i] + (x_next - x[i]) / 3, y[i] + slope * (x_next - x[i]) / 3]
+        points.update(co=co, handle_left=left, handle_right=right, interpolation=interpolation)
+
+    def evaluate(self, frame):
+        points = self.keyframe_points._data
+        co, left, right = points["co"], points["handle_left"], points["handle_right"]
+        count = len(self.keyframe_points)
+        if not count:
+            return 0.0
+        if frame <= co[0]:
+            return co[1]
+        if frame >= co[2 * count - 2]:
+            return co[2 * count - 1]
+        i = max(k for k in range(count) if co[2 * k] <= frame)
+        x0, y0, x1, y1 = co[2 * i], co[2 * i + 1], co[2 * i + 2], co[2 * i + 3]
+        interpolation = _INTERPOLATIONS[points["interpolation"][i]]
+        if interpolation == 'CONSTANT':
+            return y0
+        t = (frame - x0) / (x1 - x0)
+        if interpolation == 'LINEAR':
+            return y0 + (y1 - y0) * t
+        # value of the Bezier segment, taking its parameter as linear in time
+        h0, h1 = right[2 * i + 1], left[2 * i + 3]
+        return (1 - t) ** 3 * y0 + 3 * (1 - t) ** 2 * t * h0 + 3 * (1 - t) * t ** 2 * h1 + t ** 3 * y1
+
+
+class _FCurves(bpy_prop_collection):
+    def __init__(self):
+        self._list = []
+
+    def _items(self):
+        return self._list
+
+    def new(self, data_path, index=0, action_group=""):
+        if self.find(data_path, index=index) is not None:
+            raise RuntimeError(f"F-Curve '{data_path}[{index}]' already exists in action")
+        fcurve = FCurve(data_path, index, action_group or None)
+        self._list.append(fcurve)
+        return fcurve
+
+    def find(self, data_path, index=0):
+        for fcurve in self._list:
+            if fcurve.data_path == data_path and fcurve.array_index == index:
+                return fcurve
+        return None
+
+    def remove(self, fcurve):
+        self._list.remove(fcurve)
+
+    def clear(self):
+        self._list.clear()
+
+
+class Action(ID):
+    def __init__(self):
+        super().__init__()
+        self.fcurves = _FCurves()
+        self.id_root = 'OBJECT'
+        self.use_frame_range = False
+
+    @property
+    def frame_range(self):
+        frames = [frame for fcurve in self.fcurves for frame in fcurve.keyframe_points._data["co"][0::2]]
+        if not frames:
+            return Vector((0.0, 0.0))
+        return Vector((min(frames), max(frames)))
+
+
+class NlaStrip:
+    def __init__(self, track, name, start, action):
+        self._track = track
+        self.name = name
+        self.action = action
+        self.action_frame_start, self.action_frame_end = action.frame_range
+        self.frame_start = float(start)
+        self.scale = 1.0
+        self.repeat = 1.0
+        self.type = 'CLIP'
+        self.blend_type = 'REPLACE'
+        self.extrapolation = 'HOLD' if not track.strips else 'HOLD_FORWARD'
+        self.mute = False
+        self.influence = 1.0
+        self.blend_in = 0.0
+        self.blend_out = 0.0
+        self.use_auto_blend = False
+        self.use_animated_influence = False
+        self.use_animated_time = False
+        self.use_reverse = False
+        self.use_sync_length = False
+
+    @property
+    def frame_end(self):
+        return self.frame_start + (self.action_frame_end - self.action_frame_start) * self.scale * self.repeat
+
+    @property
+    def frame_start_ui(self):
+        return self.frame_start
+
+    @frame_start_ui.setter
+    def frame_start_ui(self, value):
+        self.frame_start = float(value)
+
+    def _action_frame(self, frame):
+        """Action time the strip plays at a scene frame, or None where it does not play."""
+        if frame < self.frame_start and self.extrapolation != 'HOLD':
+            return None
+        if frame > self.frame_end and self.extrapolation == 'NOTHING':
+            return None
+        frame = min(max(frame, self.frame_start), self.frame_end)
+        return self.action_frame_start + (frame - self.frame_start) / self.scale
+
+
+class _NlaStrips(_List):
+    def __init__(self, track):
+        super().__init__()
+        self._track = track
+
+    def new(self, name, start, action):
+        strip = NlaStrip(self._track, name, start, action)
+        for other in self._list:
+            if strip.frame_start < other.frame_end and other.frame_start < strip.frame_end:
+                raise RuntimeError("Unable to add strip (the track does not have any space to accommodate "
+                                   "this new strip)")
+        self._list.append(strip)
+        return strip
+
+    def remove(self, strip):
+        self._list.remove(strip)
+
+
+class NlaTrack:
+    def __init__(self, name):
+        self.name = name
+        self.mute = False
+        self.is_solo = False
+        self.lock = False
+        self.strips = _NlaStrips(self)
+
+
+class _NlaTracks(_List):
+    def new(self, prev=None):
+        track = NlaTrack("NlaTrack" if not self._list else f"NlaTrack.{len(self._list):03d}")
+        self._list.append(track)
+        return track
+
+    def remove(self, track):
+        self._list.remove(track)
+
+
+class AnimData:
+    def __init__(self, id_data):
+        self.id_data = id_data
+        self._action = None
+        self.nla_tracks = _NlaTracks()
+        self.drivers = _List()
+        self.action_extrapolation = 'HOLD'
+        self.action_blend_type = 'REPLACE'
+        self.action_influence = 1.0
+        self.use_nla = True
+
+    @property
+    def action(self):
+        return self._action
+
+    @action.setter
+    def action(self, action):
+        if action is not None and not isinstance(action, Action):
+            raise TypeError("AnimData.action expects an Action")
+        self._action = action
+
+    def _refs(self):
+        refs = [self._action] if self._action is not None else []
+        return refs + [strip.action for track in self.nla_tracks for strip in track.strips if strip.action]
+
+    def _unlink(self, removed):
+        if self._action is not None and self._action.as_pointer() in removed:
+            self._action = None
+        for track in self.nla_tracks:
+            for strip in track.strips:
+                if strip.action is not None and strip.action.as_pointer() in removed:
+                    strip.action = None
+
+
+def _read_path(obj, data_path):
+    if data_path.startswith('["'):
+        return obj[data_path[2:-2]]
+    return getattr(obj, data_path)
+
+
+def _write_path(obj, data_path, index, value):
+    if data_path.startswith('["'):
+        obj[data_path[2:-2]] = value
+        return
+    current = getattr(obj, data_path)
+    if hasattr(current, "__setitem__"):
+        current[index] = value
+    elif isinstance(current, bool):
+        setattr(obj, data_path, bool(value))
+    else:
+        setattr(obj, data_path, type(current)(value))
+
+
+def _evaluate_animation(id_data, frame):
+    """Write the values the object's NLA strips and action give at frame."""
+    anim = id_data.animation_data
+    if anim is None:
+        return
+    for track in anim.nla_tracks:
+        if track.mute:
+            continue
+        for strip in sorted(track.strips, key=lambda strip: strip.frame_start):
+            local = strip._action_frame(frame) if strip.action and not strip.mute else None
+            if local is None:
+                continue
+            for fcurve in strip.action.fcurves:
+                _write_path(id_data, fcurve.data_path, fcurve.array_index, fcurve.evaluate(local))
+    if anim.action is not None:
+        for fcurve in anim.action.fcurves:
+            if not fcurve.mute:
+                _write_path(id_data, fcurve.data_path, fcurve.array_index, fcurve.evaluate(frame))
+
+
+# scenes and collections
+
+
+class _CollectionObjects(bpy_prop_collection):
+    def __init__(self, collection):
+        self._collection = collection
+        self._list = []
+        self._pointers = set()
+
+    def _items(self):
+        return self._list
+
+    def link(self, obj):
+        if obj.as_pointer() in self._pointers:
+            raise RuntimeError(f"Object '{obj.name}' already in collection '{self._collection.name}'")
+        self._list.append(obj)
+        self._pointers.add(obj.as_pointer())
+
+    def unlink(self, obj):
+        if obj.as_pointer() not in self._pointers:
+            raise RuntimeError(f"Object '{obj.name}' not in collection '{self._collection.name}'")
+        self._list.remove(obj)
+        self._pointers.discard(obj.as_pointer())
+
+    def _drop(self, removed):
+        if self._pointers & removed:
+            self._list = [obj for obj in self._list if obj.as_pointer() not in removed]
+            self._pointers -= removed
+
+
+class _CollectionChildren(_List):
+    def link(self, child):
+        if child in self._list:
+            raise RuntimeError(f"Collection '{child.name}' already in collection")
+        self._list.append(child)
+
+    def unlink(self, child):
+        self._list.remove(child)
+
+
+class Collection(ID):
+    def __init__(self):
+        super().__init__()
+        self.objects = _CollectionObjects(self)
+        self.children = _CollectionChildren()
+        self.hide_render = False
+        self.hide_viewport = False
+
+    @property
+    def all_objects(self):
+        found = {}
+        stack = [self]
+        while stack:
+            collection = stack.pop(0)
+            for obj in collection.objects:
+                found.setdefault(obj.as_pointer(), obj)
+            stack += list(collection.children)
+        return _List(found.values())
+
+    def _refs(self):
+        return super()._refs() + list(self.objects) + list(self.children)
+
+    def _unlink(self, removed):
+        super()._unlink(removed)
+        self.objects._drop(removed)
+        self.children._list = [child for child in self.children if child.as_pointer() not in removed]
+
+
+_ENGINES = ('BLENDER_EEVEE_NEXT', 'BLENDER_WORKBENCH', 'CYCLES')
+
+
+class RenderSettings:
+    def __init__(self):
+        self._engine = 'BLENDER_EEVEE_NEXT'
+        self.resolution_x = 1920
+        self.resolution_y = 1080
+        self.resolution_percentage = 100
+        self.pixel_aspect_x = 1.0
+        self.pixel_aspect_y = 1.0
+        self.fps = 24
+        self.fps_base = 1.0
+        self.filepath = "/tmp/"
+        self.film_transparent = False
+        self.use_motion_blur = False
+        self.use_persistent_data = False
+        self.use_file_extension = True
+        self.threads_mode = 'AUTO'
+        self.image_settings = _Settings(file_format='PNG', color_mode='RGBA', color_depth='8', compression=15)
+        self.ffmpeg = _Settings(format='MPEG4', codec='H264', constant_rate_factor='MEDIUM', ffmpeg_preset='GOOD',
+                                gopsize=18, audio_codec='NONE')
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, value):
+        if value not in _ENGINES:
+            raise TypeError(f"bpy_struct: item.attr = val: enum \"{value}\" not found in {_ENGINES}")
+        self._engine = value
+
+
+class ViewLayer:
+    def __init__(self, scene):
+        self._scene = scene
+        self.name = "ViewLayer"
+        self.use = True
+
+    def update(self):
+        """Nothing to evaluate: matrices are computed when asked for."""
+
+
+class _TimelineMarkers(_List):
+    def new(self, name, frame=1):
+        marker = _Settings(name=name, frame=frame, camera=None, select=False)
+        self._list.append(marker)
+        return marker
+
+
+class Scene(ID):
+    def __init__(self):
+        super().__init__()
+        self.collection = Collection()
+        self.collection._name = "Scene Collection"
+        self.camera = None
+        self.world = None
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+        self.frame_step = 1
+        self.render = RenderSettings()
+        self.view_layers = _List([ViewLayer(self)])
+        self.timeline_markers = _TimelineMarkers()
+        self.cycles = _Settings(samples=4096, preview_samples=1024, use_denoising=True, use_animated_seed=False,
+                                device='CPU')
+        self.eevee = _Settings(taa_render_samples=64, taa_samples=16)
+        self.display = _Settings(render_aa='8', shading=_Settings(light='STUDIO', color_type='MATERIAL'))
+        self.view_settings = _Settings(view_transform='AgX', look='None', exposure=0.0, gamma=1.0)
+        self.use_nodes = False
+
+    @property
+    def objects(self):
+        return self.collection.all_objects
+
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = int(frame)
+        for obj in self.objects:
+            _evaluate_animation(obj, frame + subframe)
+
+    def _refs(self):
+        refs = super()._refs() + self.collection._refs()
+        return refs + [id_data for id_data in (self.camera, self.world) if id_data is not None]
+
+    def _unlink(self, removed):
+        super()._unlink(removed)
+        self.collection._unlink(removed)
+        if self.camera is not None and self.camera.as_pointer() in removed:
+            self.camera = None
+        if self.world is not None and self.world.as_pointer() in removed:
+            self.world = None
+
+
+class BlendData:
+    """bpy.data: every datablock of the session."""
+
+    def __init__(self):
+        self.filepath = ""
+        self.is_dirty = False
+        self.actions = IDCollection("actions", Action)
+        self.cameras = IDCollection("cameras", Camera)
+        self.collections = IDCollection("collections", Collection)
+        self.curves = IDCollection("curves", Curve)
+        self.images = IDCollection("images", Image)
+        self.libraries = _Libraries("libraries", Library)
+        self.lights = IDCollection("lights", Light)
+        self.materials = IDCollection("materials", Material)
+        self.meshes = _Meshes("meshes", Mesh)
+        self.node_groups = IDCollection("node_groups", NodeTree)
+        self.objects = IDCollection("objects", Object)
+        self.scenes = IDCollection("scenes", Scene)
+        self.shape_keys = IDCollection("shape_keys", ID)
+        self.texts = IDCollection("texts", Text)
+        self.textures = IDCollection("textures", ID)
+        self.worlds = IDCollection("worlds", World)
+
+    def _collections(self):
+        return [value for value in vars(self).values() if isinstance(value, IDCollection)]
+
+    def _all_ids(self):
+        return [id_data for collection in self._collections() for id_data in collection]
+
+    def _users(self, target):
+        return sum(1 for id_data in self._all_ids() for used in id_data._refs() if used is target)
+
+    def user_map(self, subset=None, key_types=None, value_types=None):
+        ids = self._all_ids()
+        users = {id_data: set() for id_data in (subset if subset is not None else ids)}
+        for user in ids:
+            for used in user._refs():
+                if used in users:
+                    users[used].add(user)
+        return users
+
+    def batch_remove(self, ids):
+        ids = list(ids)
+        for id_data in ids:
+            collection = id_data._collection
+            if collection is None or collection.get(id_data.name) is not id_data:
+                raise ReferenceError(f"{id_data!r} is not in bpy.data")
+        removed = set()
+        for id_data in ids:
+            if id_data.as_pointer() in removed:
+                continue
+            del id_data._collection._by_name[id_data.name]
+            recorder.removed[id_data._collection._key] += 1
+            removed.add(id_data.as_pointer())
+        for id_data in self._all_ids():
+            id_data._unlink(removed)
+        if context.scene.as_pointer() in removed:
+            context.scene = next(iter(self.scenes), None)
+
+    def orphans_purge(self, do_local_ids=True, do_linked_ids=True, do_recursive=False):
+        total = 0
+        while True:
+            orphans = [id_data for id_data in self._all_ids()
+                       if not isinstance(id_data, Scene) and id_data.users == 0]
+            if not orphans:
+                return total
+            self.batch_remove(orphans)
+            total += len(orphans)
+            if not do_recursive:
+                return total
+
+
+class _Context:
+    def __init__(self, scene):
+        self.scene = scene
+
+    @property
+    def collection(self):
+        return self.scene.collection
+
+    @property
+    def view_layer(self):
+        return self.scene.view_layers[0]
+
+
+# operators
+
+
+class _BPyOpsSubModOp:
+    """An operator: calling it only records the call."""
+
+    def __init__(self, module, func):
+        self._module = module
+        self._func = func
+
+    def idname(self):
+        return f"{self._module.upper()}_OT_{self._func}"
+
+    def idname_py(self):
+        return f"{self._module}.{self._func}"
+
+    def poll(self, *args):
+        return True
+
+    def __call__(self, *args, **kwargs):
+        recorder.ops[self.idname_py()] += 1
+        return {'FINISHED'}
+
+
+class _BPyOpsSubMod:
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, func):
+        if func.startswith("__"):
+            raise AttributeError(func)
+        return _BPyOpsSubModOp(self._module, func)
+
+
+class _BPyOps:
+    def __getattr__(self, module):
+        if module.startswith("__"):
+            raise AttributeError(module)
+        return _BPyOpsSubMod(module)
+
+
+ops = _BPyOps()
+
+
+def _persistent(func):
+    return func
+
+
+app = _types.SimpleNamespace(
+    version=(4, 2, 0),
+    version_string="4.2.0 (fake bpy)",
+    background=True,
+    binary_path="",
+    handlers=_types.SimpleNamespace(depsgraph_update_pre=[], depsgraph_update_post=[], frame_change_pre=[],
+                                    frame_change_post=[], load_pre=[], load_post=[], render_pre=[],
+                                    render_post=[], persistent=_persistent),
+)
+
+
+def _abspath(path, start=None, library=None):
+    if path.startswith("//"):
+        base = start if start is not None else os.path.dirname(data.filepath) or os.getcwd()
+        return os.path.join(base, path[2:])
+    return path
+
+
+path = _types.SimpleNamespace(abspath=_abspath, basename=lambda path: os.path.basename(path[2:] if
+                                                                                     path.startswith("//") else path))
+
+types = _types.SimpleNamespace(
+    bpy_prop_collection=bpy_prop_collection, bpy_struct=object, ID=ID, Action=Action, AnimData=AnimData,
+    Camera=Camera, Collection=Collection, Curve=Curve, FCurve=FCurve, Image=Image, Keyframe=Keyframe,
+    Library=Library, Light=Light, Material=Material, MaterialSlot=MaterialSlot, Mesh=Mesh, Modifier=Modifier,
+    NlaStrip=NlaStrip, NlaTrack=NlaTrack, Node=Node, NodeSocket=Socket, NodeTree=NodeTree, Object=Object,
+    Scene=Scene, Text=Text, TextCurve=Curve, ViewLayer=ViewLayer, World=World,
+)
+
+
+def reset():
+    """Start over from the factory startup file and clear the recorder."""
+    global data, context
+    import bmesh
+
+    for handlers in vars(app.handlers).values():
+        if isinstance(handlers, list):
+            handlers.clear()
+    data = BlendData()
+    scene = data.scenes.new("Scene")
+    context = _Context(scene)
+    scene.world = data.worlds.new("World")
+    collection = data.collections.new("Collection")
+    scene.collection.children.link(collection)
+
+    cube_mesh = data.meshes.new("Cube")
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=2.0)
+    bm.to_mesh(cube_mesh)
+    cube_mesh.materials.append(data.materials.new("Material"))
+    cube = data.objects.new("Cube", cube_mesh)
+    camera = data.objects.new("Camera", data.cameras.new("Camera"))
+    camera.location = (7.36, -6.93, 4.96)
+    camera.rotation_euler = (1.109, 0.0, 0.815)
+    light = data.objects.new("Light", data.lights.new("Light", type='POINT'))
+    light.location = (4.08, 1.01, 5.9)
+    light.data.energy = 1000.0
+    for obj in (cube, light, camera):
+        collection.objects.link(obj)
+    scene.camera = camera
+    recorder.reset()
+
+
+data = None
+context = None
+reset()
@@ -0,0 +1,287 @@
+# plain-Python stand-in for Blender's mathutils (see bpy.py in this folder)
+#
+# Vector, Color, Euler and Matrix with the operations the insta_* scripts and
+# insta_lib use. Values are Python floats; matrices are lists of rows.
+
+import math
+
+
+class _Array:
+    """Fixed-size float sequence with in-place item and slice assignment."""
+
+    _size = None
+
+    def __init__(self, values=None):
+        values = [0.0] * (self._size or 3) if values is None else [float(v) for v in values]
+        if self._size is not None and len(values) != self._size:
+            raise ValueError(f"{type(self).__name__} needs {self._size} values, got {len(values)}")
+        self._values = values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [float(v) for v in value]
+            if len(range(*index.indices(len(self._values)))) != len(value):
+                raise ValueError("slice assignment cannot resize")
+            self._values[index] = value
+        else:
+            self._values[index] = float(value)
+
+    def __eq__(self, other):
+        try:
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(({', '.join(f'{v:.4f}' for v in self._values)}))"
+
+    def copy(self):
+        return type(self)(self._values)
+
+    def to_tuple(self, precision=None):
+        if precision is None:
+            return tuple(self._values)
+        return tuple(round(v, precision) for v in self._values)
+
+
+def _axis(index):
+    def get(self):
+        return self._values[index]
+
+    def set(self, value):
+        self._values[index] = float(value)
+    return property(get, set)
+
+
+class Vector(_Array):
+    x, y, z, w = (_axis(i) for i in range(4))
+
+    def _zip(self, other, op):
+        if len(other) != len(self):
+            raise ValueError("vectors of different sizes")
+        return Vector([op(a, b) for a, b in zip(self, other)])
+
+    def __add__(self, other):
+        return self._zip(other, lambda a, b: a + b)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._zip(other, lambda a, b: a - b)
+
+    def __rsub__(self, other):
+        return self._zip(other, lambda a, b: b - a)
+
+    def __iadd__(self, other):
+        self._values = (self + other)._values
+        return self
+
+    def __isub__(self, other):
+        self._values = (self - other)._values
+        return self
+
+    def __mul__(self, scalar):
+        if isinstance(scalar, (_Array, list, tuple)):
+            return self._zip(scalar, lambda a, b: a * b)
+        return Vector([v * scalar for v in self])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector([v / scalar for v in self])
+
+    def __neg__(self):
+        return Vector([-v for v in self])
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Vector([sum(self[i] * other[i][j] for i in range(len(self))) for j in range(other.col_size)])
+        return self.dot(other)
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+    def cross(self, other):
+        ax, ay, az = self
+        bx, by, bz = other
+        return Vector((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx))
+
+    @property
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def normalized(self):
+        length = self.length
+        return Vector([v / length for v in self]) if length else self.copy()
+
+    def normalize(self):
+        self._values = self.normalized()._values
+
+    def to_3d(self):
+        return Vector((list(self) + [0.0, 0.0, 0.0])[:3])
+
+    def to_4d(self):
+        return Vector((list(self) + [0.0, 0.0, 0.0])[:3] + [1.0])
+
+
+class Color(_Array):
+    _size = 3
+    r, g, b = (_axis(i) for i in range(3))
+
+
+class Euler(_Array):
+    _size = 3
+    x, y, z = (_axis(i) for i in range(3))
+
+    def __init__(self, angles=(0.0, 0.0, 0.0), order='XYZ'):
+        super().__init__(angles)
+        self.order = order
+
+    def copy(self):
+        return Euler(self._values, self.order)
+
+    def to_matrix(self):
+        """3x3 rotation; XYZ order applies X first."""
+        rotations = {axis: _axis_rotation(axis, angle) for axis, angle in zip("XYZ", self)}
+        matrix = Matrix.Identity(3)
+        for axis in self.order:
+            matrix = rotations[axis] @ matrix
+        return matrix
+
+
+def _axis_rotation(axis, angle):
+    c, s = math.cos(angle), math.sin(angle)
+    if axis == 'X':
+        return Matrix(((1, 0, 0), (0, c, -s), (0, s, c)))
+    if axis == 'Y':
+        return Matrix(((c, 0, s), (0, 1, 0), (-s, 0, c)))
+    return Matrix(((c, -s, 0), (s, c, 0), (0, 0, 1)))
+
+
+class Matrix:
+    """Row-major matrix; matrix[i] is row i as in mathutils."""
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = Matrix.Identity(4)._rows
+        self._rows = [[float(v) for v in row] for row in rows]
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls.Identity(4)
+        matrix.translation = vector
+        return matrix
+
+    @classmethod
+    def Diagonal(cls, vector):
+        return cls([[vector[i] if i == j else 0.0 for j in range(len(vector))] for i in range(len(vector))])
+
+    @classmethod
+    def LocRotScale(cls, location, rotation, scale):
+        rot = Matrix.Identity(3)
+        if isinstance(rotation, Euler):
+            rot = rotation.to_matrix()
+        elif isinstance(rotation, Matrix):
+            rot = rotation.to_3x3()
+        elif rotation is not None:
+            raise TypeError("rotation must be an Euler, a Matrix or None")
+        scale = scale if scale is not None else (1.0, 1.0, 1.0)
+        location = location if location is not None else (0.0, 0.0, 0.0)
+        rows = [[rot[i][j] * scale[j] for j in range(3)] + [location[i]] for i in range(3)]
+        return cls(rows + [[0.0, 0.0, 0.0, 1.0]])
+
+    @property
+    def row_size(self):
+        return len(self._rows)
+
+    @property
+    def col_size(self):
+        return len(self._rows[0])
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return (Vector(row) for row in self._rows)
+
+    def __getitem__(self, index):
+        return Vector(self._rows[index])
+
+    def __setitem__(self, index, row):
+        self._rows[index] = [float(v) for v in row]
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Matrix(" + ", ".join(str(tuple(round(v, 4) for v in row)) for row in self._rows) + ")"
+
+    def copy(self):
+        return Matrix(self._rows)
+
+    @property
+    def col(self):
+        return [Vector([row[j] for row in self._rows]) for j in range(self.col_size)]
+
+    @property
+    def translation(self):
+        return Vector([row[3] for row in self._rows[:3]])
+
+    @translation.setter
+    def translation(self, vector):
+        for row, value in zip(self._rows, vector):
+            row[3] = float(value)
+
+    def to_3x3(self):
+        return Matrix([row[:3] for row in self._rows[:3]])
+
+    def to_4x4(self):
+        rows = [list(row[:3]) + [row[3] if len(row) > 3 else 0.0] for row in self._rows[:3]]
+        return Matrix(rows + [[0.0, 0.0, 0.0, 1.0]])
+
+    def transposed(self):
+        return Matrix([list(column) for column in zip(*self._rows)])
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            columns = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, column)) for column in columns] for row in self._rows])
+        vector = list(other)
+        if len(vector) == 3 and self.col_size == 4:
+            # points are transformed with an implicit w = 1
+            result = [sum(a * b for a, b in zip(row, vector + [1.0])) for row in self._rows]
+            return Vector(result[:3])
+        return Vector([sum(a * b for a, b in zip(row, vector)) for row in self._rows])
+
+    def inverted(self):
+        size = len(self._rows)
+        work = [row[:] + [1.0 if i == j else 0.0 for j in range(size)] for i, row in enumerate(self._rows)]
+        for column in range(size):
+            pivot = max(range(column, size), key=lambda r: abs(work[r][column]))
+            if abs(work[pivot][column]) < 1e-12:
+                raise ValueError("matrix does not have an inverse")
+            work[column], work[pivot] = work[pivot], work[column]
+            scale = work[column][column]
+            work[column] = [v / scale for v in work[column]]
+            for r in range(size):
+                if r != column and work[r][column]:
+                    factor = work[r][column]
+                    work[r] = [a - factor * b for a, b in zip(work[r], work[column])]
+        return Matrix([row[size:] for row in work])
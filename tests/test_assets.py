@@ -0,0 +1,87 @@
+# asset library: a repeat build appends its prototypes instead of building them
+
+import os
+import re
+
+import pytest
+
+from insta_lib import labels
+
+
+@pytest.fixture
+def asset_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("INSTA_ASSET_CACHE", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def fresh_build(fake_bpy, build):
+    """build() as a new Blender session would run it: nothing in bpy.data or the label cache."""
+    def fresh_build(script, **params):
+        fake_bpy.reset()
+        labels._geometry.clear()
+        return build(script, **params)
+    return fresh_build
+
+
+def scene_signature(bpy):
+    return sorted((obj.name, obj.data.name if obj.data else None,
+                   tuple(slot.material.name if slot.material else None for slot in obj.material_slots))
+                  for obj in bpy.data.objects)
+
+
+def test_repeat_build_appends_prototypes(fake_bpy, asset_cache, fresh_build):
+    recorder = fresh_build("insta_parallel.py", thread_count=12, task_count=12)
+    assert recorder.appended == {}
+    assert len(os.listdir(asset_cache)) == 1
+    first = scene_signature(fake_bpy)
+
+    recorder = fresh_build("insta_parallel.py", thread_count=12, task_count=12)
+    # primitives and the baked labels, with no text converted
+    assert recorder.appended["meshes"] == len(fake_bpy.data.meshes)
+    assert recorder.datablocks["meshes"] == recorder.appended["meshes"]
+    assert recorder.datablocks["curves"] == 0
+    assert len(fake_bpy.data.libraries) == 0
+    assert scene_signature(fake_bpy) == first
+
+
+def test_instancer_and_materials_are_not_duplicated(fake_bpy, asset_cache, fresh_build):
+    fresh_build("insta_gpu_tensor.py", use_instancing=True)
+    recorder = fresh_build("insta_gpu_tensor.py", use_instancing=True)
+    assert recorder.appended["node_groups"] == 1
+    assert recorder.appended["materials"] == recorder.datablocks["materials"] > 0
+    assert not [id_data.name for id_data in fake_bpy.data._all_ids() if re.search(r"\.\d{3}$", id_data.name)]
+
+
+def test_changed_parameters_reuse_the_library(fake_bpy, asset_cache, fresh_build):
+    fresh_build("insta_hpc_job.py")
+    # more servers and jobs, but the same server, packet and material prototypes
+    recorder = fresh_build("insta_hpc_job.py", rows=4, job_count=30)
+    assert recorder.appended["meshes"] == recorder.datablocks["meshes"] > 0
+    assert recorder.appended["materials"] == recorder.datablocks["materials"] > 0
+    assert len(os.listdir(asset_cache)) == 1
+
+
+def test_scripts_share_one_library(fake_bpy, asset_cache, fresh_build):
+    fresh_build("insta_mem_cpu.py")
+    recorder = fresh_build("insta_hpc_job.py")
+    # the black cube material and the packet sphere are mem_cpu's; the 2.5 head node cube is new
+    assert recorder.appended["materials"] > 0
+    assert recorder.datablocks["meshes"] == recorder.appended["meshes"] + 1
+    # mem_cpu's core cylinder and labels were appended but not used
+    assert not [mesh.name for mesh in fake_bpy.data.meshes if mesh.name.startswith(("Prim_CYLINDER", "Label"))]
+    assert len(os.listdir(asset_cache)) == 1
+
+    recorder = fresh_build("insta_mem_cpu.py")
+    assert recorder.datablocks["meshes"] == recorder.appended["meshes"]
+    assert recorder.datablocks["curves"] == 0
+
+
+def test_unreadable_library_is_rebuilt(fake_bpy, asset_cache, fresh_build):
+    fresh_build("insta_mem_cpu.py")
+    (library,) = asset_cache.iterdir()
+    library.write_bytes(library.read_bytes()[:10])
+    recorder = fresh_build("insta_mem_cpu.py")
+    assert recorder.appended == {}
+    recorder = fresh_build("insta_mem_cpu.py")
+    assert recorder.appended["meshes"] > 0
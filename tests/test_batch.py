@@ -0,0 +1,36 @@
+# batch runner: a script built into a batch scene sees what it would see alone
+
+import contextlib
+import io
+import os
+
+from insta_lib import batch_worker
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["insta_gpu_tensor.py", "insta_hpc_job.py", "insta_mem_cpu.py", "insta_parallel.py"]
+
+
+def world_state(scene):
+    world = scene.world
+    if world is None:
+        return None
+    background = None
+    if world.use_nodes:
+        background = tuple(world.node_tree.nodes["Background"].inputs["Color"].default_value)
+    return world.use_nodes, tuple(world.color), background
+
+
+def test_batch_scenes_get_the_standalone_world(fake_bpy, build):
+    expected = {}
+    for script in SCRIPTS:
+        fake_bpy.reset()
+        build(script)
+        expected[script] = world_state(fake_bpy.context.scene)
+    fake_bpy.reset()
+    world = fake_bpy.context.scene.world
+    # in one session, so a script that edits its world must not change the next one's
+    with contextlib.redirect_stdout(io.StringIO()):
+        scenes = [batch_worker.build_scene(os.path.join(REPO, script), {}, world) for script in SCRIPTS]
+    for script, scene in zip(SCRIPTS, scenes):
+        assert world_state(scene) == expected[script], script
+    assert len({scene.world.name for scene in scenes}) == len(scenes)
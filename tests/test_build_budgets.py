@@ -0,0 +1,169 @@
+# build budgets of the insta_* scripts, checked against the recording fake bpy
+#
+# Every script is built at a few sizes of its scale parameter. A build must
+# not call a single operator, and the datablocks and keyframes it makes must
+# stay within what its design allows: shared primitive meshes and palette
+# materials, objects only for what the scene shows, keys only on animated
+# channels. A builder change that puts bpy.ops or material creation back into
+# a loop fails here in milliseconds instead of showing up in a Blender run.
+
+import pytest
+
+from insta_lib.lod import LEVELS, SOURCE_KEY
+
+# camera and sun, plus the camera's track-to target where the camera is framed
+CAMERA_LIGHT = 2
+FRAMING = 1
+
+
+def count(bpy, kind):
+    """Datablocks of a kind left in bpy.data after the build."""
+    return len(getattr(bpy.data, kind))
+
+
+@pytest.mark.parametrize("grid_size", [2, 8, 16])
+def test_gpu_tensor(fake_bpy, build, grid_size):
+    recorder = build("insta_gpu_tensor.py", grid_size=grid_size)
+    blocks = 16
+    assert recorder.op_calls == 0, recorder.ops
+    assert recorder.datablocks["objects"] <= grid_size ** 2 + blocks + CAMERA_LIGHT + FRAMING
+    assert recorder.datablocks["materials"] <= 2
+    assert count(fake_bpy, "meshes") <= 2
+    # one action per block: location and color, 4 keys each
+    assert recorder.datablocks["actions"] <= blocks
+    assert recorder.keyframes <= blocks * (3 + 4) * 4
+
+
+@pytest.mark.parametrize("grid_size", [8, 64])
+def test_gpu_tensor_instanced_grid_is_one_object(fake_bpy, build, grid_size):
+    recorder = build("insta_gpu_tensor.py", grid_size=grid_size, use_instancing=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # grid and its unlinked prototype
+    assert recorder.datablocks["objects"] <= 2 + 16 + CAMERA_LIGHT + FRAMING
+    assert recorder.datablocks["node_groups"] <= 1
+    assert count(fake_bpy, "meshes") <= 3
+
+
+@pytest.mark.parametrize("job_count", [12, 48, 120])
+def test_hpc_job(fake_bpy, build, job_count):
+    rows, cols = 3, 4
+    recorder = build("insta_hpc_job.py", job_count=job_count, rows=rows, cols=cols, lod=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # head node, workers, one packet per job
+    assert recorder.datablocks["objects"] <= 1 + rows * cols + job_count + CAMERA_LIGHT
+    assert recorder.datablocks["materials"] <= 2
+    # head and server cubes, the packet sphere and its levels of detail
+    assert count(fake_bpy, "meshes") <= 3 + len(LEVELS)
+    assert recorder.datablocks["actions"] <= job_count
+    # location over the arc (3 keys) and the color switch (2 keys) per packet
+    assert recorder.keyframes <= job_count * (3 * 3 + 4 * 2)
+
+
+@pytest.mark.parametrize("job_count", [12, 120])
+def test_hpc_job_packet_pool(fake_bpy, build, job_count):
+    rows, cols = 3, 4
+    recorder = build("insta_hpc_job.py", job_count=job_count, rows=rows, cols=cols, packet_pool=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # no more packets than can be on their way or on a worker at once
+    packets = recorder.datablocks["objects"] - (1 + rows * cols + CAMERA_LIGHT)
+    assert packets <= 2 * rows * cols
+    assert recorder.datablocks["actions"] <= packets
+    # per trip: 5 location and 2 visibility keys, 3 color keys (x3 / x4 components)
+    assert recorder.keyframes <= job_count * (5 * 3 + 3 * 2 + 3 * 4)
+
+
+@pytest.mark.parametrize("job_count", [12, 120])
+def test_hpc_job_shared_actions(fake_bpy, build, job_count):
+    rows, cols = 3, 4
+    recorder = build("insta_hpc_job.py", job_count=job_count, rows=rows, cols=cols, shared_actions=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # one flight per worker and one color change, however many jobs there are
+    assert recorder.datablocks["actions"] <= rows * cols + 1
+    assert recorder.keyframes <= (rows * cols + 1) * 3 * 4
+
+
+@pytest.mark.parametrize("size", [3, 30])
+def test_hpc_job_instanced_workers(fake_bpy, build, size):
+    recorder = build("insta_hpc_job.py", rows=size, cols=size, use_instancing=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # head node, grid and prototype, 12 packets
+    assert recorder.datablocks["objects"] <= 3 + 12 + CAMERA_LIGHT
+
+
+@pytest.mark.parametrize("thread_count, task_count", [(8, 10), (40, 50), (100, 100)])
+def test_parallel(fake_bpy, build, thread_count, task_count):
+    core_count = 4
+    recorder = build("insta_parallel.py", core_count=core_count, thread_count=thread_count,
+                     task_count=task_count, lod=True)
+    assert recorder.op_calls == 0, recorder.ops
+    # every label baked into one object, converted through one temporary text object
+    assert recorder.datablocks["objects"] <= core_count + thread_count + task_count + 2 + CAMERA_LIGHT
+    assert recorder.datablocks["curves"] <= 1
+    assert count(fake_bpy, "curves") == 0
+    # cylinder, sphere, cube, labels and levels of detail; converted texts are removed again
+    assert count(fake_bpy, "meshes") <= 4 + 2 * len(LEVELS)
+    assert recorder.datablocks["actions"] <= thread_count + task_count
+    # two location keys per thread and task
+    assert recorder.keyframes <= (thread_count + task_count) * 3 * 2
+
+
+@pytest.mark.parametrize("packet_count", [1, 20, 200])
+def test_mem_cpu(fake_bpy, build, packet_count):
+    packet_interval = 20
+    recorder = build("insta_mem_cpu.py", packet_count=packet_count, packet_interval=packet_interval)
+    assert recorder.op_calls == 0, recorder.ops
+    # the pool holds the packets in flight at once: a trip takes 99 frames plus 3 to be reused
+    slots = min(packet_count, -(-102 // packet_interval))
+    # memory, core, packets, labels (and the text object they are converted with), camera, sun and area light
+    assert recorder.datablocks["objects"] <= 2 + slots + 2 + 3
+    assert recorder.datablocks["materials"] <= 3
+    assert recorder.datablocks["actions"] <= slots
+    # per trip: 4 location keys x3, 3 visibility keys x2, 3 color keys x4
+    assert recorder.keyframes <= packet_count * (4 * 3 + 3 * 2 + 3 * 4)
+
+
+@pytest.mark.parametrize("script", ["insta_hpc_job.py", "insta_parallel.py", "insta_mem_cpu.py"])
+def test_default_build_keeps_full_primitives(fake_bpy, build, script):
+    # level of detail changes the shading, so only lod=True may swap meshes
+    build(script)
+    assert not [mesh.name for mesh in fake_bpy.data.meshes if SOURCE_KEY in mesh]
+
+
+@pytest.mark.parametrize("script, params", [
+    ("insta_gpu_tensor.py", {}),
+    ("insta_gpu_tensor.py", {"use_instancing": True}),
+    ("insta_hpc_job.py", {}),
+    ("insta_hpc_job.py", {"packet_pool": True, "max_width": 2}),
+    ("insta_parallel.py", {"speed_factor": 2}),
+    ("insta_parallel.py", {"shared_actions": True}),
+])
+def test_reconcile_unchanged_build_writes_nothing(fake_bpy, build, script, params):
+    build(script, **params)
+    recorder = build(script, reconcile=True, **params)
+    assert recorder.op_calls == 0, recorder.ops
+    assert recorder.datablocks_created == 0, recorder.datablocks
+    assert sum(recorder.removed.values()) == 0, recorder.removed
+    assert recorder.keyframes == 0
+
+
+def mesh_signature(bpy):
+    return (sorted((obj.name, obj.data.name) for obj in bpy.data.objects if obj.type == 'MESH'),
+            sorted(mesh.name for mesh in bpy.data.meshes))
+
+
+def test_reconcile_without_lod_matches_a_fresh_build(fake_bpy, build):
+    build("insta_parallel.py")
+    fresh = mesh_signature(fake_bpy)
+    fake_bpy.reset()
+    build("insta_parallel.py", lod=True)
+    assert [mesh.name for mesh in fake_bpy.data.meshes if SOURCE_KEY in mesh]
+    build("insta_parallel.py", reconcile=True)
+    assert mesh_signature(fake_bpy) == fresh
+
+
+def test_reconcile_smaller_grid_only_removes(fake_bpy, build):
+    build("insta_gpu_tensor.py", grid_size=4)
+    recorder = build("insta_gpu_tensor.py", grid_size=3, reconcile=True)
+    assert recorder.datablocks["objects"] == 0
+    assert recorder.removed["objects"] == 4 * 4 - 3 * 3
+    assert count(fake_bpy, "objects") == 3 * 3 + 16 + CAMERA_LIGHT + FRAMING
@@ -0,0 +1,56 @@
+# the recording fake bpy itself: what the build budgets rely on it to see
+
+from mathutils import Vector
+
+
+def test_operator_calls_are_recorded(fake_bpy):
+    fake_bpy.ops.mesh.primitive_cube_add(size=2)
+    fake_bpy.ops.mesh.primitive_cube_add(size=1)
+    fake_bpy.ops.object.select_all(action='DESELECT')
+    assert fake_bpy.recorder.ops == {"mesh.primitive_cube_add": 2, "object.select_all": 1}
+    assert fake_bpy.recorder.op_calls == 3
+
+
+def test_keyframes_are_recorded(fake_bpy):
+    obj = fake_bpy.data.objects.new("Box", None)
+    obj.location = (1, 2, 3)
+    obj.keyframe_insert("location", frame=1)
+    assert obj.animation_data.action.fcurves.find("color", index=0) is None
+    fcurve = obj.animation_data.action.fcurves.new("hide_render")
+    fcurve.keyframe_points.add(4)
+    assert fake_bpy.recorder.keyframes == 3 + 4
+    assert fake_bpy.recorder.datablocks == {"objects": 1, "actions": 1}
+
+
+def test_names_users_and_removal(fake_bpy):
+    mesh = fake_bpy.data.meshes.new("Cube")
+    assert mesh.name == "Cube.001"
+    obj = fake_bpy.data.objects.new("Cube", mesh)
+    assert obj.name == "Cube.001" and mesh.users == 1
+    fake_bpy.context.collection.objects.link(obj)
+    assert obj.users == 1 and obj in fake_bpy.context.scene.objects.values()
+
+    fake_bpy.data.batch_remove([obj])
+    assert mesh.users == 0
+    assert "Cube.001" not in fake_bpy.data.objects
+    assert fake_bpy.recorder.removed == {"objects": 1}
+
+
+def test_matrix_world_follows_transform(fake_bpy):
+    obj = fake_bpy.data.objects.new("Empty", None)
+    obj.location = (1, 2, 3)
+    obj.scale = (2, 2, 2)
+    assert obj.matrix_world @ Vector((1, 0, 0)) == Vector((3, 2, 3))
+    assert obj.matrix_world.inverted() @ Vector((3, 2, 3)) == Vector((1, 0, 0))
+
+
+def test_copy_shares_used_datablocks(fake_bpy):
+    world = fake_bpy.context.scene.world
+    world.use_nodes = True
+    world.animation_data_create().action = fake_bpy.data.actions.new("WorldAction")
+    clone = world.copy()
+    assert clone.name == "World.001" and clone.users == 0
+    assert clone.node_tree is not world.node_tree
+    assert clone.animation_data.action is world.animation_data.action
+    clone.color = (1, 0, 0)
+    assert tuple(world.color) == (0.05, 0.05, 0.05)
@@ -0,0 +1,30 @@
+# scene_bounds for smart_camera_setup, on the fake bpy
+
+import pytest
+
+from insta_lib.framing import scene_bounds
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.primitives import link_objects, new_object, primitive_mesh
+
+
+@pytest.fixture
+def scene(fake_bpy):
+    """The startup scene without its default cube."""
+    fake_bpy.data.batch_remove([fake_bpy.data.objects["Cube"]])
+    return fake_bpy.context.scene
+
+
+def test_scene_bounds_covers_the_animated_extent(scene):
+    (box,) = link_objects([new_object("Box", primitive_mesh('CUBE', size=2))], scene.collection)
+    keys = KeyframeBatch()
+    keys.add_vector(box, "location", (1, 21), ((0, 0, 0), (10, 0, 0)))
+    keys.flush()
+    low, high = scene_bounds(scene)
+    assert tuple(low) == pytest.approx((-1, -1, -1)) and tuple(high) == pytest.approx((1, 1, 1))
+    low, high = scene_bounds(scene, frame_range=(1, 21))
+    assert tuple(low) == pytest.approx((-1, -1, -1)) and tuple(high) == pytest.approx((11, 1, 1))
+    assert scene.frame_current == 1
+
+
+def test_scene_bounds_of_nothing(scene):
+    assert scene_bounds(scene) is None
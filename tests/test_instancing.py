@@ -0,0 +1,34 @@
+# geometry-nodes instancing: an instanced grid stands in for the objects it replaces
+
+import pytest
+
+from insta_lib.instancing import grid_points
+
+
+def test_grid_point_order():
+    assert grid_points(3, 2, 1).tolist() == [[0, 0, 0], [0, 1, 0], [1, 0, 0], [1, 1, 0], [2, 0, 0], [2, 1, 0]]
+    assert grid_points(3, 2, 1, row_major=True).tolist() == [[0, 0, 0], [1, 0, 0], [2, 0, 0],
+                                                             [0, 1, 0], [1, 1, 0], [2, 1, 0]]
+
+
+@pytest.fixture
+def job_landings(fake_bpy, build):
+    """job_landings(**params): where every hpc_job packet ends up."""
+    def job_landings(**params):
+        fake_bpy.reset()
+        build("insta_hpc_job.py", **params)
+        scene = fake_bpy.context.scene
+        scene.frame_set(scene.frame_end)
+        return {obj.name: tuple(obj.location) for obj in fake_bpy.data.objects if obj.name.startswith("Job_")}
+    return job_landings
+
+
+@pytest.mark.parametrize("rows, cols", [(3, 4), (5, 2)])
+def test_instanced_workers_get_the_same_jobs(job_landings, rows, cols):
+    params = dict(job_count=40, rows=rows, cols=cols, policy="least_loaded", seed=3)
+    objects = job_landings(**params)
+    instanced = job_landings(use_instancing=True, **params)
+    assert objects.keys() == instanced.keys()
+    assert len({location[:2] for location in objects.values()}) == rows * cols
+    for name, location in objects.items():
+        assert instanced[name] == pytest.approx(location, abs=1e-5), name
@@ -0,0 +1,37 @@
+# level of detail: which primitives apply_lod may reduce, on the fake bpy
+
+import math
+
+import pytest
+
+from insta_lib.lod import apply_lod
+from insta_lib.primitives import link_objects, new_object, primitive_mesh
+
+
+@pytest.fixture
+def scene(fake_bpy):
+    """The startup scene with a camera 10 units above the origin, looking down."""
+    scene = fake_bpy.context.scene
+    fake_bpy.data.batch_remove([fake_bpy.data.objects["Cube"], fake_bpy.data.objects["Camera"]])
+    camera = fake_bpy.data.objects.new("Camera", fake_bpy.data.cameras.new("Camera"))
+    camera.location = (0, 0, 10)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+    scene.render.resolution_x = scene.render.resolution_y = 1080
+    return scene
+
+
+def test_tall_cylinder_reaching_into_view_keeps_its_segments(scene):
+    # lying along x: its center is out of view, its near end well inside it
+    mesh = primitive_mesh('CYLINDER', radius=0.1, depth=10)
+    (obj,) = link_objects([new_object("Rod", mesh, location=(7, 0, 0), rotation=(0, math.radians(90), 0))],
+                          scene.collection)
+    apply_lod(scene)
+    assert obj.data == mesh
+
+
+def test_primitive_out_of_view_is_reduced(scene):
+    mesh = primitive_mesh('CYLINDER', radius=0.1, depth=0.2)
+    (obj,) = link_objects([new_object("Stub", mesh, location=(7, 0, 0))], scene.collection)
+    apply_lod(scene)
+    assert obj.data.name == primitive_mesh('CYLINDER', radius=0.1, depth=0.2, vertices=8).name
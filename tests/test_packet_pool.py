@@ -0,0 +1,90 @@
+# pooled packet streams: plan_pool is plain Python, key_pool runs on the fake bpy
+
+import random
+
+import pytest
+
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.packet_pool import key_pool, plan_pool
+
+# a slot is reused at the earliest this many frames after its trip ends
+REUSE_GAP = 3
+
+
+def random_events(count, seed):
+    rng = random.Random(seed)
+    return [(rng.randint(1, 500), [(0, 0, 0), (1, 0, 0)], rng.randint(1, 60)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_trips_on_a_slot_never_overlap(seed):
+    events = random_events(300, seed)
+    slot_count, trips = plan_pool(events)
+    assert sorted(trip.event for trip in trips) == list(range(len(events)))
+    by_slot = {}
+    for trip in trips:
+        assert 0 <= trip.slot < slot_count
+        assert (trip.spawn, trip.end) == (events[trip.event][0], events[trip.event][0] + events[trip.event][2])
+        by_slot.setdefault(trip.slot, []).append(trip)
+    for slot_trips in by_slot.values():
+        for before, after in zip(slot_trips, slot_trips[1:]):
+            assert after.spawn >= before.end + REUSE_GAP
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_slot_count_is_the_peak_concurrency(seed):
+    events = random_events(300, seed)
+    slot_count, _ = plan_pool(events)
+    # trips in flight at once, each holding its slot until it can be reused
+    boundaries = sorted([(spawn, 1) for spawn, _, _ in events]
+                        + [(spawn + duration + REUSE_GAP, -1) for spawn, _, duration in events],
+                        key=lambda boundary: (boundary[0], boundary[1]))
+    in_flight = peak = 0
+    for _, delta in boundaries:
+        in_flight += delta
+        peak = max(peak, in_flight)
+    assert slot_count == peak
+
+
+def test_steady_stream_reuses_slots():
+    events = [(1 + 10 * i, [(0, 0, 0), (5, 0, 0)], 79) for i in range(1000)]
+    slot_count, trips = plan_pool(events)
+    assert slot_count == 9
+    assert [trip.slot for trip in trips[:10]] == [0, 1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+
+def test_stream_can_be_a_generator():
+    stream = ((1 + 10 * i, [(0, 0, 0), (5, 0, 0)], 79) for i in range(1000))
+    slot_count, trips = plan_pool(stream)
+    assert slot_count == 9 and len(trips) == 1000
+    assert [trip.event for trip in trips] == list(range(1000))
+
+
+def test_path_longer_than_its_duration_is_rejected():
+    with pytest.raises(ValueError, match="event 1"):
+        plan_pool([(1, [(0, (0, 0, 0)), (20, (1, 0, 0))], 20), (5, [(0, (0, 0, 0)), (30, (1, 0, 0))], 20)])
+
+
+def test_waypoints_spread_evenly_or_at_given_offsets():
+    _, (trip,) = plan_pool([(10, [(0, 0, 0), (1, 0, 0), (2, 0, 0)], 20)])
+    assert trip.waypoints == ((10, (0, 0, 0)), (20.0, (1, 0, 0)), (30.0, (2, 0, 0)))
+    _, (trip,) = plan_pool([(10, [(0, (0, 0, 0)), (15, (3, 0, 0))], 20)])
+    assert trip.waypoints == ((10, (0, 0, 0)), (25, (3, 0, 0)))
+
+
+def test_pooled_object_is_shown_only_during_its_trips(fake_bpy):
+    _, trips = plan_pool([(10, [(0, 0, 0), (4, 0, 0)], 20), (40, [(0, 2, 0), (0, 6, 0)], 10)])
+    packet = fake_bpy.data.objects.new("Packet", None)
+    fake_bpy.context.scene.collection.objects.link(packet)
+    keys = KeyframeBatch()
+    key_pool(keys, [packet], trips)
+    keys.flush()
+
+    scene = fake_bpy.context.scene
+    for frame, shown, location in [(5, False, (0, 0, 0)), (10, True, (0, 0, 0)), (30, True, (4, 0, 0)),
+                                   (35, False, None), (40, True, (0, 2, 0)), (50, True, (0, 6, 0)),
+                                   (60, False, (0, 6, 0))]:
+        scene.frame_set(frame)
+        assert packet.hide_render == (not shown), frame
+        if location is not None:
+            assert tuple(packet.location) == pytest.approx(location), frame
@@ -0,0 +1,50 @@
+# render presets: a --draft render is a fast preview of the final frame
+
+import pytest
+
+from insta_lib.materials import OBJECT_COLOR_KEY
+from insta_lib.presets import apply_render_presets
+
+
+def test_draft_scene_settings(fake_bpy):
+    scene = fake_bpy.context.scene
+    scene.render.filepath = "/out/movie.mp4"
+    apply_render_presets(scene, ["blender", "--", "--draft"])
+    assert scene.render.engine == 'BLENDER_WORKBENCH'
+    assert scene.render.resolution_percentage == 25
+    assert scene.display.render_aa == 'FXAA'
+    assert scene.display.shading.color_type == 'OBJECT'
+    assert scene.display.shading.light == 'STUDIO'
+    assert scene.render.filepath == "/out/movie_draft.mp4"
+
+
+def test_without_flags_nothing_changes(fake_bpy):
+    scene = fake_bpy.context.scene
+    apply_render_presets(scene, ["blender"])
+    assert scene.render.engine == 'BLENDER_EEVEE_NEXT'
+    assert scene.display.shading.color_type == 'MATERIAL'
+
+
+@pytest.mark.parametrize("script, params", [
+    ("insta_hpc_job.py", {}),
+    ("insta_hpc_job.py", {"use_instancing": True}),
+    ("insta_gpu_tensor.py", {}),
+    ("insta_gpu_tensor.py", {"use_instancing": True}),
+    ("insta_parallel.py", {}),
+    ("insta_mem_cpu.py", {}),
+])
+def test_draft_object_colors_match_the_palette(fake_bpy, build, script, params):
+    build(script, **params)
+    scene = fake_bpy.context.scene
+    apply_render_presets(scene, ["blender", "--", "--draft"])
+    for obj in scene.objects:
+        materials = [slot.material for slot in obj.material_slots if slot.material is not None]
+        if not materials:
+            continue
+        if OBJECT_COLOR_KEY not in materials[0]:
+            assert tuple(obj.color) == tuple(materials[0].diffuse_color), obj.name
+    # packets and blocks start in their own (non-default) colors, instanced grids in theirs
+    colored = [obj for obj in scene.objects if obj.material_slots and obj.material_slots[0].material is not None
+               and OBJECT_COLOR_KEY in obj.material_slots[0].material]
+    colored += [obj for obj in scene.objects if obj.modifiers]
+    assert all(tuple(obj.color) != (1.0, 1.0, 1.0, 1.0) for obj in colored), [obj.name for obj in colored]
@@ -0,0 +1,123 @@
+# render_pool: encode overrides re-use the frame cache, and the encode writes
+# every frame file as exactly one output frame, in order
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from insta_lib import render_pool
+from insta_lib.frame_cache import PNG_END, PNG_SIGNATURE, frame_path
+from insta_lib.render_pool import encode
+
+FFMPEG = os.environ.get("FFMPEG") or shutil.which("ffmpeg")
+needs_ffmpeg = pytest.mark.skipif(not FFMPEG, reason="needs ffmpeg (on PATH or $FFMPEG)")
+
+H264 = {"codec": 'H264', "format": 'MPEG4', "gopsize": 18, "use_max_b_frames": False, "max_b_frames": 0,
+        "constant_rate_factor": 'MEDIUM', "video_bitrate": 6000, "ffmpeg_preset": 'REALTIME'}
+LOSSLESS = dict(H264, codec='FFV1', format='MKV')
+
+
+@pytest.fixture
+def pool_calls(monkeypatch, tmp_path):
+    """render_pool without Blender or ffmpeg: the probe returns a fixed
+    40-frame scene and the frames each chunk rendered and the settings each
+    encode used are recorded."""
+    script = tmp_path / "insta_test.py"
+    script.write_text("# scene script\n")
+    calls = {"script": str(script), "rendered": [], "encoded": []}
+
+    def probe_scene(blender, script, script_args):
+        return {"render_key": {"resolution": [1080, 1080, 100]}, "frame_start": 1, "frame_end": 40,
+                "frame_step": 1, "fps": 30, "fps_base": 1.0, "filepath": str(tmp_path / "out.mp4"),
+                "ffmpeg": dict(H264), "deliveries": [], "frame_sources": list(range(1, 41))}
+
+    def render_chunk(blender, script, script_args, chunk, directory, threads, retries):
+        for frame in chunk:
+            with open(frame_path(directory, frame), "wb") as fh:
+                fh.write(PNG_SIGNATURE + PNG_END)
+        calls["rendered"].extend(chunk)
+        return chunk
+
+    def encode(ffmpeg, frame_files, info, output, deliveries=()):
+        calls["encoded"].append(dict(info["ffmpeg"]))
+
+    monkeypatch.setattr(render_pool, "probe_scene", probe_scene)
+    monkeypatch.setattr(render_pool, "render_chunk", render_chunk)
+    monkeypatch.setattr(render_pool, "encode", encode)
+    return calls
+
+
+def test_encode_overrides_reuse_every_cached_frame(pool_calls, tmp_path, capsys):
+    cache = str(tmp_path / "frames")
+    render_pool.main([pool_calls["script"], "-j", "2", "--cache", cache])
+    assert sorted(pool_calls["rendered"]) == list(range(1, 41))
+
+    render_pool.main([pool_calls["script"], "-j", "2", "--cache", cache,
+                      "--crf", "LOW", "--preset", "BEST", "--codec", "H265"])
+    assert sorted(pool_calls["rendered"]) == list(range(1, 41))  # nothing rendered again
+    assert pool_calls["encoded"][0] == H264
+    assert pool_calls["encoded"][1] == dict(H264, constant_rate_factor='LOW', ffmpeg_preset='BEST', codec='H265')
+    assert len(os.listdir(cache)) == 1
+
+
+def test_script_arguments_key_the_cache(pool_calls, tmp_path, capsys):
+    cache = str(tmp_path / "frames")
+    render_pool.main([pool_calls["script"], "--cache", cache])
+    render_pool.main([pool_calls["script"], "--cache", cache, "--", "--set", "rows=4"])
+    assert len(pool_calls["rendered"]) == 80
+    assert len(os.listdir(cache)) == 2
+
+
+def frame_hashes(path):
+    """MD5 of every decoded video frame in path, as RGB."""
+    out = subprocess.run([FFMPEG, "-v", "error", "-i", path, "-map", "0:v", "-pix_fmt", "rgb24",
+                          "-f", "framemd5", "-"], check=True, capture_output=True, text=True).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in out.splitlines() if line and not line.startswith("#")]
+
+
+@pytest.fixture(scope="module")
+def frames(tmp_path_factory):
+    """Three distinct 16x16 PNG frames."""
+    root = tmp_path_factory.mktemp("frames")
+    paths = []
+    for i, color in enumerate(("red", "green", "blue")):
+        path = str(root / f"{i:04d}.png")
+        subprocess.run([FFMPEG, "-loglevel", "error", "-f", "lavfi", "-i", f"color=c={color}:s=16x16",
+                        "-frames:v", "1", path], check=True)
+        paths.append(path)
+    return paths
+
+
+# 30 and 29.97 fps have no exact float frame duration; a dropped or repeated
+# frame anywhere shifts the cycling colors out of step from there on
+@needs_ffmpeg
+@pytest.mark.parametrize("fps,fps_base", [(30, 1.0), (24, 1.0), (30, 1.001), (60, 1.001)])
+def test_encode_keeps_every_frame_in_order(frames, tmp_path, fps, fps_base):
+    frame_files = [frames[i % 3] for i in range(600)]
+    output = str(tmp_path / "out.mkv")
+    encode(FFMPEG, frame_files, {"fps": fps, "fps_base": fps_base, "ffmpeg": LOSSLESS}, output)
+
+    source = {path: frame_hashes(path)[0] for path in frames}
+    assert frame_hashes(output) == [source[path] for path in frame_files]
+
+
+@needs_ffmpeg
+def test_repeated_frames_are_encoded_once_each(frames, tmp_path):
+    # static spans (see static_spans.py) repeat their first frame's file
+    frame_files = [frames[0]] * 7 + [frames[1]] * 113 + [frames[2]] * 61 + [frames[0]]
+    output = str(tmp_path / "out.mp4")
+    encode(FFMPEG, frame_files, {"fps": 30, "fps_base": 1.001, "ffmpeg": H264}, output)
+    assert len(frame_hashes(output)) == len(frame_files)
+
+
+@needs_ffmpeg
+def test_every_delivery_gets_every_frame(frames, tmp_path):
+    frame_files = [frames[i % 3] for i in range(90)]
+    deliveries = [{"crop": (0.0, 0.0, 1.0, 1.0), "size": (16, 16), "output": str(tmp_path / "square.mp4")},
+                  {"crop": (0.25, 0.0, 0.5, 1.0), "size": (8, 16), "output": str(tmp_path / "portrait.mp4")}]
+    encode(FFMPEG, frame_files, {"fps": 30, "fps_base": 1.0, "ffmpeg": H264}, str(tmp_path / "master.mp4"),
+           deliveries)
+    for delivery in deliveries:
+        assert len(frame_hashes(delivery["output"])) == len(frame_files)
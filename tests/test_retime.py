@@ -0,0 +1,44 @@
+# retiming and the animation frame end, on the fake bpy
+
+import pytest
+
+from insta_lib.keyframes import KeyframeBatch
+from insta_lib.primitives import link_objects, new_object, primitive_mesh
+from insta_lib.retime import animation_frame_end, scale_animation_speed
+from insta_lib.shared_actions import SharedActions
+
+
+def moving_boxes(bpy, keys, starts):
+    boxes = link_objects([new_object(f"Box_{i}", primitive_mesh('CUBE', size=2)) for i in range(len(starts))],
+                         bpy.context.scene.collection)
+    for box, start in zip(boxes, starts):
+        keys.add_vector(box, "location", (start, start + 20), ((0, 0, 0), (10, 0, 0)))
+    keys.flush()
+    return boxes
+
+
+def key_frames(obj):
+    return sorted({point.co[0] for fcurve in obj.animation_data.action.fcurves for point in fcurve.keyframe_points})
+
+
+def test_scale_animation_speed_stretches_keys_around_the_start(fake_bpy):
+    boxes = moving_boxes(fake_bpy, KeyframeBatch(), [1, 11])
+    scale_animation_speed(boxes, 1, 2)
+    assert key_frames(boxes[0]) == [1.0, 41.0]
+    assert key_frames(boxes[1]) == [21.0, 61.0]
+    assert animation_frame_end(boxes) == 61
+
+
+def test_scale_animation_speed_moves_shared_strips(fake_bpy):
+    boxes = moving_boxes(fake_bpy, SharedActions(), [1, 11])
+    assert animation_frame_end(boxes) == 31
+    scale_animation_speed(boxes, 1, 2)
+    assert animation_frame_end(boxes) == 61
+    fake_bpy.context.scene.frame_set(61)
+    assert tuple(boxes[1].matrix_world.translation) == pytest.approx((10, 0, 0))
+    fake_bpy.context.scene.frame_set(21)
+    assert tuple(boxes[1].matrix_world.translation) == pytest.approx((0, 0, 0))
+
+
+def test_animation_frame_end_without_animation(fake_bpy):
+    assert animation_frame_end([fake_bpy.data.objects["Cube"]]) == 0
@@ -0,0 +1,108 @@
+# discrete-event scheduler: plain Python, no bpy
+
+import itertools
+
+import pytest
+
+from insta_lib.scheduler import POLICIES, Job, generate_jobs, simulate, summary
+
+
+def intervals_by_worker(placements):
+    by_worker = {}
+    for placement in placements:
+        for worker in placement.workers:
+            by_worker.setdefault(worker, []).append((placement.start, placement.end))
+    return by_worker
+
+
+def test_generate_jobs_is_seeded():
+    assert generate_jobs(50, seed=3, poisson=True) == generate_jobs(50, seed=3, poisson=True)
+    assert generate_jobs(50, seed=3, poisson=True) != generate_jobs(50, seed=4, poisson=True)
+    jobs = generate_jobs(5, interarrival=10)
+    assert [job.submit for job in jobs] == [0, 10, 20, 30, 40]
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_no_job_starts_before_it_is_submitted(policy):
+    jobs = generate_jobs(300, seed=1, interarrival=2, durations=(5, 40), widths=(1, 3), poisson=True)
+    placements = simulate(jobs, workers=6, policy=policy)
+    assert [placement.job for placement in placements] == jobs
+    for placement in placements:
+        assert placement.start >= placement.job.submit
+        assert placement.end == placement.start + placement.job.duration
+        assert len(set(placement.workers)) == placement.job.width
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_a_worker_runs_one_job_at_a_time(policy):
+    jobs = generate_jobs(300, seed=2, interarrival=1, durations=(5, 40), widths=(1, 4), poisson=True)
+    placements = simulate(jobs, workers=8, policy=policy)
+    for worker, intervals in intervals_by_worker(placements).items():
+        assert 0 <= worker < 8
+        intervals.sort()
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            assert start >= end, worker
+
+
+@pytest.mark.parametrize("policy", ["fifo", "least_loaded"])
+def test_in_order_policies_start_jobs_in_submit_order(policy):
+    jobs = generate_jobs(200, seed=5, interarrival=1, durations=(5, 30), widths=(1, 3))
+    placements = simulate(jobs, workers=4, policy=policy)
+    starts = [placement.start for placement in placements]
+    assert starts == sorted(starts)
+
+
+def test_ties_go_by_job_id_and_worker_index():
+    # submitted on the same frame: taken in job order, onto the workers in index order
+    jobs = [Job(0, 0, 10, 1), Job(1, 0, 10, 1), Job(2, 0, 10, 1)]
+    placements = simulate(jobs, workers=2)
+    assert [(p.workers, p.start) for p in placements] == [((0,), 0), ((1,), 0), ((0,), 10)]
+    # job order within a frame does not depend on the order of the list
+    assert simulate(list(reversed(jobs)), workers=2) == list(reversed(placements))
+
+
+def test_fifo_takes_the_longest_idle_worker_and_least_loaded_the_least_busy():
+    jobs = [Job(0, 0, 20, 1), Job(1, 0, 2, 1), Job(2, 10, 15, 1), Job(3, 40, 5, 1)]
+    # worker 0 was busy 0-20, worker 1 0-2 and 10-25: idle longer, busy less
+    assert simulate(jobs, workers=2, policy="fifo")[3].workers == (0,)
+    assert simulate(jobs, workers=2, policy="least_loaded")[3].workers == (1,)
+
+
+def test_contention_queues_a_wide_job_until_enough_workers_are_free():
+    jobs = [Job(0, 0, 10, 1), Job(1, 1, 5, 2), Job(2, 2, 5, 1)]
+    fifo = simulate(jobs, workers=2, policy="fifo")
+    assert [p.start for p in fifo] == [0, 10, 15]
+    # backfill runs the short job in the gap without delaying the wide one
+    backfill = simulate(jobs, workers=2, policy="backfill")
+    assert [p.start for p in backfill] == [0, 10, 2]
+
+
+def test_backfill_never_delays_the_head_of_the_queue():
+    jobs = [Job(0, 0, 10, 1), Job(1, 1, 5, 2), Job(2, 2, 20, 1)]
+    # the long job would hold a worker past frame 10, so it waits behind the wide one
+    assert [p.start for p in simulate(jobs, workers=2, policy="backfill")] == [0, 10, 15]
+
+
+def test_invalid_input_raises():
+    with pytest.raises(ValueError):
+        simulate([Job(0, 0, 5, 3)], workers=2)
+    with pytest.raises(ValueError):
+        simulate([Job(0, 0, 5, 1)], workers=2, policy="random")
+
+
+def test_summary():
+    placements = simulate([Job(0, 0, 10, 1), Job(1, 0, 10, 1), Job(2, 0, 10, 1)], workers=2)
+    assert summary(placements, 2) == {"makespan": 20, "mean_wait": 10 / 3, "max_wait": 10, "utilization": 0.75}
+    assert summary([], 2)["makespan"] == 0
+
+
+def test_busy_workers_never_exceed_the_cluster():
+    jobs = generate_jobs(500, seed=7, interarrival=0.5, durations=(3, 30), widths=(1, 5), poisson=True)
+    for policy in POLICIES:
+        placements = simulate(jobs, workers=10, policy=policy)
+        events = sorted(itertools.chain.from_iterable(
+            ((p.start, p.job.width), (p.end, -p.job.width)) for p in placements), key=lambda e: (e[0], e[1]))
+        running = 0
+        for _, delta in events:
+            running += delta
+            assert running <= 10, policy